@@ -0,0 +1,51 @@
+"""
+Production server: N uvicorn workers under gunicorn, forked from a parent
+that has already loaded the embedding model and read-only indexes.
+
+    gunicorn -c api/gunicorn_conf.py api.main:app
+"""
+
+import os
+import multiprocessing
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Import api.main (and with it the model and indexes, see when_ready) once, before forking
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+# Generation can legitimately take up to GENERATION_DEADLINE_S
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# Heartbeat files on tmpfs, so a slow disk can't get workers killed
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+# Query encoding threads per worker; workers * threads should not exceed the cores
+torch_threads = int(os.getenv("TORCH_THREADS_PER_WORKER", str(max(1, multiprocessing.cpu_count() // workers))))
+
+
+def when_ready(server):
+    from app.admission import LLM_MAX_CONCURRENCY
+    if workers > LLM_MAX_CONCURRENCY:
+        server.log.warning(
+            "WEB_CONCURRENCY=%d exceeds LLM_MAX_CONCURRENCY=%d: each worker still admits one "
+            "generation, so up to %d can reach Ollama at once",
+            workers, LLM_MAX_CONCURRENCY, workers
+        )
+    
+    # Runs in the parent after the app import and before the first worker is forked
+    if preload_app:
+        from app.preload import preload_shared_state
+        preload_shared_state()
+        server.log.info("Preloaded embedding model and indexes for %d workers", workers)
+
+
+def post_fork(server, worker):
+    # Workers share one Ollama, so each admits its share of LLM_MAX_CONCURRENCY
+    if preload_app:
+        from app.preload import reinit_after_fork
+        reinit_after_fork(torch_threads, workers)
+    else:
+        import torch
+        from app.admission import configure_worker_share
+        torch.set_num_threads(torch_threads)
+        configure_worker_share(workers)
@@ -4,14 +4,21 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
 from api.models import QueryRequest, QueryResponse, CitationResponse, HealthResponse
-from app.generation import generate_policy_response
+from app.generation import coalesced_policy_response, generate_policy_response
+from app.admission import AdmissionRejected
+from app.metrics import render_prometheus
+from app.query_log import get_query_logger, build_query_record
+from app.profiling import should_profile, run_profiled, list_profiles, read_profile, profile_access_allowed
 from db.session import engine
 
 load_dotenv()
@@ -74,11 +81,15 @@ async def health_check():
         health["status"] = "degraded"
     
     try:
-        import requests
-        ollama_url = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-        response = requests.get(f"{ollama_url}/api/tags", timeout=2)
-        if response.status_code == 200:
-            health["llm"] = "connected"
+        from app.llm_pool import get_backend_pool
+        pool = get_backend_pool()
+        healthy = pool.health_check()
+        total = len(pool.backends)
+        if healthy == total:
+            health["llm"] = "connected" if total == 1 else f"connected ({healthy}/{total} backends)"
+        elif healthy > 0:
+            health["llm"] = f"degraded ({healthy}/{total} backends)"
+            health["status"] = "degraded"
         else:
             health["llm"] = "unreachable"
             health["status"] = "degraded"
@@ -89,41 +100,119 @@ async def health_check():
     return HealthResponse(**health)
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return render_prometheus()
+
+
+def _check_profile_access(token: Optional[str]):
+    if not profile_access_allowed(token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/debug/profiles", include_in_schema=False)
+async def debug_profiles(x_profile_token: Optional[str] = Header(default=None)):
+    _check_profile_access(x_profile_token)
+    return list_profiles()
+
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse, include_in_schema=False)
+async def debug_profile(profile_id: str, x_profile_token: Optional[str] = Header(default=None)):
+    """Folded stacks for flamegraph.pl, speedscope or inferno."""
+    _check_profile_access(x_profile_token)
+    collapsed = read_profile(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return collapsed
+
+
+def _log_query(request: QueryRequest, status_code: int, response=None, error=None):
+    logger = get_query_logger()
+    if logger is None:
+        return
+    logger.log(build_query_record(
+        query=request.query,
+        limit=request.limit,
+        region=request.region,
+        content_type=request.content_type,
+        policy_source=request.policy_source,
+        priority=request.priority,
+        status_code=status_code,
+        response=response,
+        error=error
+    ))
+
+
 @app.post("/query", response_model=QueryResponse)
-async def query_policy(request: QueryRequest):
+async def query_policy(
+    request: QueryRequest,
+    http_response: Response,
+    profile: bool = False,
+    x_profile: Optional[str] = Header(default=None),
+    x_profile_token: Optional[str] = Header(default=None)
+):
+    params = dict(
+        query=request.query,
+        limit=request.limit,
+        region=request.region,
+        content_type=request.content_type,
+        policy_source=request.policy_source,
+        priority=request.priority
+    )
+    
     try:
-        response = generate_policy_response(
-            query=request.query,
-            limit=request.limit,
-            region=request.region,
-            content_type=request.content_type,
-            policy_source=request.policy_source
-        )
-        
-        citations = [
-            CitationResponse(
-                chunk_id=c.chunk_id,
-                policy_path=c.policy_path,
-                doc_id=c.doc_id,
-                doc_url=c.doc_url
+        # Generation is blocking; run it off the event loop so concurrent
+        # requests can overlap and identical ones can be coalesced
+        requested = (profile or x_profile in ("1", "true")) and profile_access_allowed(x_profile_token)
+        if should_profile(requested):
+            # Profiled requests skip coalescing so the sampled thread does the work itself.
+            # The label leaves out the query text: profiles outlive the request
+            response, profile_id = await run_in_threadpool(
+                run_profiled,
+                f"/query priority={request.priority} limit={request.limit}",
+                generate_policy_response,
+                **params
             )
-            for c in response.citations
-        ]
-        
-        return QueryResponse(
-            answer=response.answer,
-            refused=response.refused,
-            citations=citations,
-            refusal_reason=response.refusal_reason,
-            latency_ms=response.latency_ms,
-            num_tokens_generated=response.num_tokens_generated
+            http_response.headers["X-Profile-Id"] = profile_id
+        else:
+            response = await run_in_threadpool(coalesced_policy_response, **params)
+    
+    except AdmissionRejected as e:
+        _log_query(request, e.status_code, error=str(e))
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
         )
     
     except Exception as e:
+        _log_query(request, 500, error=str(e))
         raise HTTPException(
             status_code=500,
             detail=f"Internal processing error: {str(e)}"
         )
+    
+    _log_query(request, 200, response=response)
+    
+    citations = [
+        CitationResponse(
+            chunk_id=c.chunk_id,
+            policy_path=c.policy_path,
+            doc_id=c.doc_id,
+            doc_url=c.doc_url
+        )
+        for c in response.citations
+    ]
+    
+    return QueryResponse(
+        answer=response.answer,
+        refused=response.refused,
+        citations=citations,
+        refusal_reason=response.refusal_reason,
+        latency_ms=response.latency_ms,
+        num_tokens_generated=response.num_tokens_generated,
+        finish_reason=response.finish_reason
+    )
 
 
 if __name__ == "__main__":
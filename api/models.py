@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 class QueryRequest(BaseModel):
@@ -28,6 +28,10 @@ class QueryRequest(BaseModel):
         default=None,
         description="Filter by policy source (e.g., 'google_ads', 'youtube')"
     )
+    priority: Literal["interactive", "batch"] = Field(
+        default="interactive",
+        description="LLM queue lane; batch screening yields to interactive requests"
+    )
 
 
 class CitationResponse(BaseModel):
@@ -56,6 +60,10 @@ class QueryResponse(BaseModel):
         default=None,
         description="Approximate number of tokens in the answer"
     )
+    finish_reason: Optional[str] = Field(
+        default=None,
+        description="Why generation stopped (stop, refuse, max_tokens, deadline)"
+    )
 
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,185 @@
+import os
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from app.metrics import Counter, Gauge, Histogram
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "10"))
+
+# Lower value is served first; each lane has its own queue depth cap
+PRIORITY_LANES = {
+    "interactive": 0,
+    "batch": 1,
+}
+LANE_QUEUE_DEPTH = {
+    "interactive": int(os.getenv("LLM_MAX_QUEUE_DEPTH", "16")),
+    "batch": int(os.getenv("LLM_MAX_BATCH_QUEUE_DEPTH", "8")),
+}
+
+queue_depth = Gauge(
+    "policy_rag_llm_queue_depth",
+    "Requests waiting for an LLM slot"
+)
+active_generations = Gauge(
+    "policy_rag_llm_active_generations",
+    "LLM generations currently running"
+)
+queue_wait_ms = Histogram(
+    "policy_rag_llm_queue_wait_ms",
+    "Time spent waiting for an LLM slot in milliseconds"
+)
+rejections = Counter(
+    "policy_rag_llm_rejections_total",
+    "Requests rejected by LLM admission control"
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when the LLM stage cannot take more work.
+
+    status_code is 429 when the lane's queue is full and 503 when the request
+    waited out its queue-time budget. retry_after is a hint in seconds.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("priority", "lane", "admitted")
+
+    def __init__(self, priority: int, lane: str):
+        self.priority = priority
+        self.lane = lane
+        self.admitted = False
+
+
+class LLMAdmissionController:
+    """Bounded, prioritized work queue in front of the LLM.
+
+    At most max_concurrency generations run at once. Excess requests wait in
+    per-lane queues, interactive before batch, for up to queue_timeout_s.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        queue_timeout_s: float = LLM_QUEUE_TIMEOUT_S,
+        lane_queue_depth: Optional[Dict[str, int]] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout_s = queue_timeout_s
+        self.lane_queue_depth = dict(lane_queue_depth or LANE_QUEUE_DEPTH)
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting: List = []
+        self._lane_waiting = {lane: 0 for lane in PRIORITY_LANES}
+        self._seq = itertools.count()
+        # Moving average of generation time, used for Retry-After hints
+        self._avg_service_s = 2.0
+
+    def retry_after_hint(self) -> int:
+        backlog = len(self._waiting) + self._active
+        estimate = self._avg_service_s * backlog / max(self.max_concurrency, 1)
+        return max(1, math.ceil(estimate))
+
+    def _reject(self, message: str, status_code: int, lane: str, reason: str):
+        rejections.inc(lane=lane, reason=reason)
+        raise AdmissionRejected(message, status_code, self.retry_after_hint())
+
+    def _acquire(self, lane: str):
+        if lane not in PRIORITY_LANES:
+            raise ValueError(f"Unknown priority lane: {lane}")
+
+        start = time.monotonic()
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiting:
+                self._active += 1
+                active_generations.inc()
+                queue_wait_ms.observe(0, lane=lane)
+                return
+
+            if self._lane_waiting[lane] >= self.lane_queue_depth[lane]:
+                self._reject(
+                    f"LLM queue full for {lane} requests",
+                    429, lane, "queue_full"
+                )
+
+            ticket = _Ticket(PRIORITY_LANES[lane], lane)
+            heapq.heappush(self._waiting, (ticket.priority, next(self._seq), ticket))
+            self._lane_waiting[lane] += 1
+            queue_depth.inc(lane=lane)
+
+            deadline = start + self.queue_timeout_s
+            try:
+                while not ticket.admitted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting = [w for w in self._waiting if w[2] is not ticket]
+                        heapq.heapify(self._waiting)
+                        self._reject(
+                            f"Timed out after {self.queue_timeout_s:.0f}s waiting for an LLM slot",
+                            503, lane, "queue_timeout"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._lane_waiting[lane] -= 1
+                queue_depth.dec(lane=lane)
+
+        queue_wait_ms.observe((time.monotonic() - start) * 1000, lane=lane)
+
+    def _release(self, service_s: float):
+        with self._cond:
+            self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * service_s
+            if self._waiting:
+                # Hand the slot straight to the highest-priority waiter
+                _, _, ticket = heapq.heappop(self._waiting)
+                ticket.admitted = True
+                self._cond.notify_all()
+            else:
+                self._active -= 1
+                active_generations.dec()
+
+    @contextmanager
+    def slot(self, lane: str = "interactive") -> Iterator[None]:
+        """Hold one LLM slot for the duration of the block."""
+        self._acquire(lane)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - start)
+
+
+_controller_instance = None
+
+
+def get_admission_controller() -> LLMAdmissionController:
+    global _controller_instance
+    if _controller_instance is None:
+        _controller_instance = LLMAdmissionController()
+    return _controller_instance
+
+
+def worker_share(workers: int) -> int:
+    """Slots per worker so `workers` independent controllers stay within LLM_MAX_CONCURRENCY.
+
+    Rounded down; the minimum of 1 only exceeds the limit when there are
+    more workers than LLM_MAX_CONCURRENCY.
+    """
+    return max(1, LLM_MAX_CONCURRENCY // max(workers, 1))
+
+
+def configure_worker_share(workers: int):
+    """Give this process its share of LLM_MAX_CONCURRENCY when `workers` processes share one Ollama."""
+    global _controller_instance
+    _controller_instance = LLMAdmissionController(max_concurrency=worker_share(workers))
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.session import SessionLocal
+from db.corpus import get_current_doc_ids
+from app.metrics import Counter
+
+ANSWER_STORE_PATH = Path(os.getenv(
+    "ANSWER_STORE_PATH",
+    str(Path(__file__).parent.parent / "data" / "answer_store" / "answers.json")
+))
+# Cosine similarity between query and stored question needed to serve an answer
+ANSWER_MATCH_THRESHOLD = float(os.getenv("ANSWER_MATCH_THRESHOLD", "0.92"))
+DOC_IDS_REFRESH_S = float(os.getenv("ANSWER_STORE_REFRESH_S", "60"))
+
+precomputed_lookups = Counter(
+    "policy_rag_precomputed_lookups_total",
+    "Precomputed answer lookups by outcome"
+)
+
+
+@dataclass
+class PrecomputedAnswer:
+    question: str
+    answer: str
+    citations: List[Dict]
+    doc_ids: List[str]
+    corpus_version: str
+    created_at: float
+    embedding: List[float] = field(repr=False)
+
+
+class AnswerStore:
+    """Nearest-neighbour lookup of validated answers to canonical questions.
+
+    Entries record the versioned doc_ids they cite; an entry is only served
+    while all of those doc_ids are still in the corpus, so re-downloaded
+    policies expire it automatically.
+    """
+
+    def __init__(self, entries: List[PrecomputedAnswer]):
+        self.entries = entries
+        if entries:
+            matrix = np.asarray([e.embedding for e in entries], dtype=np.float32)
+            self._matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        else:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path: Path = ANSWER_STORE_PATH) -> "AnswerStore":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([PrecomputedAnswer(**entry) for entry in data["entries"]])
+
+    def save(self, path: Path = ANSWER_STORE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": [asdict(e) for e in self.entries]}, f, ensure_ascii=False)
+        # Atomic replace so serving processes never read a half-written file
+        os.replace(tmp_path, path)
+
+    def lookup(
+        self,
+        query_vector: np.ndarray,
+        valid_doc_ids: Set[str],
+        threshold: float = ANSWER_MATCH_THRESHOLD
+    ) -> Optional[Tuple[PrecomputedAnswer, float]]:
+        if not self.entries:
+            return None
+
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        query_vector = query_vector / np.linalg.norm(query_vector)
+        similarities = self._matrix @ query_vector
+
+        for index in np.argsort(-similarities):
+            similarity = float(similarities[index])
+            if similarity < threshold:
+                break
+            entry = self.entries[index]
+            if set(entry.doc_ids) <= valid_doc_ids:
+                return entry, similarity
+
+        return None
+
+    def expire(self, valid_doc_ids: Set[str]) -> "AnswerStore":
+        """Copy of the store without entries citing superseded documents."""
+        return AnswerStore([e for e in self.entries if set(e.doc_ids) <= valid_doc_ids])
+
+
+class _StoreHandle:
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._store: Optional[AnswerStore] = None
+        self._mtime: Optional[float] = None
+        self._doc_ids: Set[str] = set()
+        self._doc_ids_loaded_at = float("-inf")
+        self._doc_ids_refreshing = False
+
+    def get(self) -> Tuple[Optional[AnswerStore], Set[str]]:
+        """Current store and doc_ids; the doc_id query never runs under the lock.
+
+        The first call loads the doc_ids itself; later refreshes run in a
+        background thread and lookups keep using the previous set meanwhile.
+        """
+        with self._lock:
+            try:
+                mtime = self.path.stat().st_mtime
+            except FileNotFoundError:
+                self._store = None
+                return None, set()
+
+            if mtime != self._mtime:
+                self._store = AnswerStore.load(self.path)
+                self._mtime = mtime
+
+            refresh = (
+                not self._doc_ids_refreshing
+                and time.monotonic() - self._doc_ids_loaded_at > DOC_IDS_REFRESH_S
+            )
+            if refresh:
+                self._doc_ids_refreshing = True
+            first_load = self._doc_ids_loaded_at == float("-inf")
+
+        if refresh and first_load:
+            self._refresh_doc_ids()
+        elif refresh:
+            threading.Thread(target=self._refresh_doc_ids, name="answer-store-refresh", daemon=True).start()
+
+        with self._lock:
+            return self._store, self._doc_ids
+
+    def _refresh_doc_ids(self):
+        try:
+            db = SessionLocal()
+            try:
+                doc_ids = get_current_doc_ids(db)
+            finally:
+                db.close()
+            with self._lock:
+                self._doc_ids = doc_ids
+                self._doc_ids_loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._doc_ids_refreshing = False
+
+
+_handle = _StoreHandle(ANSWER_STORE_PATH)
+
+
+def answer_store_available() -> bool:
+    return ANSWER_STORE_PATH.exists()
+
+
+def preload_answer_store():
+    """Load the store and the current doc_ids now rather than on the first lookup."""
+    _handle.get()
+
+
+def lookup_precomputed_answer(query_vector: np.ndarray) -> Optional[Tuple[PrecomputedAnswer, float]]:
+    """Serve a stored answer for a close paraphrase of a canonical question, if any."""
+    store, doc_ids = _handle.get()
+    if store is None:
+        return None
+
+    match = store.lookup(query_vector, doc_ids)
+    precomputed_lookups.inc(outcome="hit" if match else "miss")
+    return match
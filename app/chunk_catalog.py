@@ -0,0 +1,132 @@
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.models import PolicyChunk, PolicySource, Region, ContentType
+from db.corpus import get_corpus_version
+
+# Filter and hydrate retrieval candidates in memory instead of querying Postgres per request
+CHUNK_CATALOG = os.getenv("CHUNK_CATALOG", "true").lower() == "true"
+# How often the corpus version is re-checked; the catalog reloads only when it changed
+CHUNK_CATALOG_REFRESH_S = float(os.getenv("CHUNK_CATALOG_REFRESH_S", "30"))
+
+_LOAD_BATCH = 5000
+
+# Enum columns are stored as uint8 codes: the member's position in its enum
+_REGIONS = list(Region)
+_CONTENT_TYPES = list(ContentType)
+_POLICY_SOURCES = list(PolicySource)
+
+
+def _code(enum_cls, members: List, value: str) -> int:
+    # Same parsing (and ValueError on unknown values) as HybridRetriever._apply_filters
+    return members.index(enum_cls(value.strip().lower()))
+
+
+class ChunkCatalog:
+    """Read-only, columnar copy of the policy_chunks columns retrieval needs.
+
+    Strings repeated across chunks (section, path, doc_id, URL) share one
+    object per distinct value; region, content_type and policy_source are
+    uint8 code arrays, so filtering candidates is a few vectorized compares.
+    Postgres stays the source of truth: a catalog is tied to the corpus
+    version it was loaded at and is replaced, never mutated.
+    """
+
+    def __init__(self, version: str, rows: Iterable):
+        self.version = version
+        self.chunk_ids: List[str] = []
+        self.chunk_texts: List[str] = []
+        self.policy_sections: List[str] = []
+        self.policy_paths: List[str] = []
+        self.policy_section_levels: List[str] = []
+        self.doc_ids: List[str] = []
+        self.doc_urls: List[str] = []
+        regions, content_types, policy_sources = [], [], []
+
+        shared: Dict[str, str] = {}
+        for row in rows:
+            self.chunk_ids.append(str(row.chunk_id))
+            self.chunk_texts.append(row.chunk_text)
+            self.policy_sections.append(shared.setdefault(row.policy_section, row.policy_section))
+            self.policy_paths.append(shared.setdefault(row.policy_path, row.policy_path))
+            self.policy_section_levels.append(shared.setdefault(row.policy_section_level, row.policy_section_level))
+            self.doc_ids.append(shared.setdefault(row.doc_id, row.doc_id))
+            doc_url = row.doc_url or ""
+            self.doc_urls.append(shared.setdefault(doc_url, doc_url))
+            regions.append(_REGIONS.index(row.region))
+            content_types.append(_CONTENT_TYPES.index(row.content_type))
+            policy_sources.append(_POLICY_SOURCES.index(row.policy_source))
+
+        self.regions = np.asarray(regions, dtype=np.uint8)
+        self.content_types = np.asarray(content_types, dtype=np.uint8)
+        self.policy_sources = np.asarray(policy_sources, dtype=np.uint8)
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self.chunk_ids)}
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def load(cls, db: Session) -> "ChunkCatalog":
+        # Version first: if the corpus changes during the load, the next check sees a new version and reloads
+        version = get_corpus_version(db)
+        rows = db.query(
+            PolicyChunk.chunk_id,
+            PolicyChunk.chunk_text,
+            PolicyChunk.policy_section,
+            PolicyChunk.policy_path,
+            PolicyChunk.policy_section_level,
+            PolicyChunk.doc_id,
+            PolicyChunk.doc_url,
+            PolicyChunk.policy_source,
+            PolicyChunk.region,
+            PolicyChunk.content_type
+        ).execution_options(yield_per=_LOAD_BATCH)
+        return cls(version, rows)
+
+    def filter(
+        self,
+        chunk_ids: List[str],
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None
+    ) -> Set[str]:
+        """chunk_ids present in the catalog and matching the filters."""
+        known = [chunk_id for chunk_id in chunk_ids if chunk_id in self._rows]
+        rows = np.fromiter((self._rows[chunk_id] for chunk_id in known), dtype=np.int64, count=len(known))
+
+        mask = np.ones(len(rows), dtype=bool)
+        if region:
+            mask &= self.regions[rows] == _code(Region, _REGIONS, region)
+        if content_type:
+            mask &= self.content_types[rows] == _code(ContentType, _CONTENT_TYPES, content_type)
+        if policy_source:
+            mask &= self.policy_sources[rows] == _code(PolicySource, _POLICY_SOURCES, policy_source)
+
+        return {chunk_id for chunk_id, keep in zip(known, mask) if keep}
+
+    def hydrate(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        """Same shape as HybridRetriever.hydrate; unknown ids are left out."""
+        hydrated = {}
+        for chunk_id in chunk_ids:
+            row = self._rows.get(chunk_id)
+            if row is None:
+                continue
+            hydrated[chunk_id] = {
+                "chunk_text": self.chunk_texts[row],
+                "policy_section": self.policy_sections[row],
+                "policy_path": self.policy_paths[row],
+                "policy_section_level": self.policy_section_levels[row],
+                "doc_id": self.doc_ids[row],
+                "doc_url": self.doc_urls[row],
+                "policy_source": _POLICY_SOURCES[self.policy_sources[row]].value,
+                "region": _REGIONS[self.regions[row]].value,
+                "content_type": _CONTENT_TYPES[self.content_types[row]].value
+            }
+        return hydrated
@@ -3,6 +3,7 @@ from typing import Set, List, Dict
 from app.schemas import Citation
 
 CITATION_PATTERN = re.compile(r"\[SOURCE:([a-f0-9\-]{36})\]")
+SENTENCE_END_PATTERN = re.compile(r"[.!?](?:\s*\[SOURCE:[a-f0-9\-]{36}\])*")
 
 
 def extract_citations(text: str) -> Set[str]:
@@ -18,6 +19,23 @@ def validate_citations(cited_ids: Set[str], retrieved_ids: Set[str]) -> bool:
     return cited_ids.issubset(retrieved_ids)
 
 
+def trim_partial_answer(text: str) -> str:
+    """Cut a truncated answer back to its last complete sentence.
+
+    Drops any dangling, half-written citation so partial output is validated
+    the same way as a complete answer.
+    """
+    ends = [m.end() for m in SENTENCE_END_PATTERN.finditer(text)]
+    if ends:
+        return text[:ends[-1]].strip()
+    
+    open_bracket = text.rfind("[")
+    if open_bracket != -1 and "]" not in text[open_bracket:]:
+        text = text[:open_bracket]
+    
+    return text.strip()
+
+
 def build_citations(cited_ids: Set[str], results: List[Dict]) -> List[Citation]:
     """Build Citation objects from cited chunk_ids and retrieval results."""
     result_map = {r["chunk_id"]: r for r in results}
@@ -0,0 +1,97 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.metrics import Counter, Gauge
+
+coalesced_requests = Counter(
+    "policy_rag_coalesced_requests_total",
+    "Requests served by awaiting an identical in-flight computation"
+)
+leader_requests = Counter(
+    "policy_rag_singleflight_leader_requests_total",
+    "Requests that ran the computation on behalf of identical concurrent requests"
+)
+inflight_keys = Gauge(
+    "policy_rag_singleflight_inflight",
+    "Distinct computations currently in flight"
+)
+
+
+def normalize_query_key(
+    query: str,
+    limit: int,
+    region: Optional[str] = None,
+    content_type: Optional[str] = None,
+    policy_source: Optional[str] = None,
+    priority: str = "interactive"
+) -> Tuple:
+    """Build a dedup key that treats case and whitespace variations as identical.
+
+    The priority lane is part of the key: a waiter is served under its leader's
+    admission ticket, so an interactive request must never wait on a batch leader.
+    """
+    def _norm(value: Optional[str]) -> Optional[str]:
+        return value.strip().lower() if value else None
+
+    return (
+        " ".join(query.lower().split()),
+        limit,
+        _norm(region),
+        _norm(content_type),
+        _norm(policy_source),
+        priority,
+    )
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block until it finishes and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per in-flight key. Returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            coalesced_requests.inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        leader_requests.inc()
+        inflight_keys.inc()
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            inflight_keys.dec()
+            call.done.set()
+
+        return call.result, call.waiters > 0
@@ -0,0 +1,68 @@
+import os
+from typing import List
+
+import numpy as np
+
+# "none" keeps score order; "mmr" caps chunks per section and reorders the top-k by MMR (opt-in)
+RETRIEVAL_DIVERSITY = os.getenv("RETRIEVAL_DIVERSITY", "none").lower()
+# Weight of relevance against similarity to chunks already selected (1.0 is plain score order)
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+# Candidates at least this similar to a selected chunk are dropped as near-duplicates
+MMR_DUPLICATE_SIMILARITY = float(os.getenv("MMR_DUPLICATE_SIMILARITY", "0.95"))
+# Split paragraphs of one section (same policy_path) kept per query; 0 disables the cap
+MAX_CHUNKS_PER_SECTION = int(os.getenv("MAX_CHUNKS_PER_SECTION", "2"))
+
+
+def cap_per_section(sections: List[str], max_per_section: int = MAX_CHUNKS_PER_SECTION) -> List[int]:
+    """Indexes of the first max_per_section entries of each section; empty sections are not grouped."""
+    if max_per_section <= 0:
+        return list(range(len(sections)))
+
+    seen = {}
+    keep = []
+    for i, section in enumerate(sections):
+        if section:
+            seen[section] = seen.get(section, 0) + 1
+            if seen[section] > max_per_section:
+                continue
+        keep.append(i)
+    return keep
+
+
+def mmr_order(
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    lambda_: float = MMR_LAMBDA,
+    duplicate_similarity: float = MMR_DUPLICATE_SIMILARITY
+) -> List[int]:
+    """Greedy maximal-marginal-relevance ordering of candidates.
+
+    Each step picks the candidate maximizing
+    lambda * relevance - (1 - lambda) * max cosine similarity to those already
+    picked. The pairwise similarities are one matrix product up front, and
+    each step updates the running maximum with one row, so ordering all
+    candidates costs O(n^2) vectorized work. Candidates whose similarity to a
+    picked one reaches duplicate_similarity are dropped. A zero vector (no
+    embedding available) is treated as similar to nothing.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    if len(relevance) == 0:
+        return []
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    similarity = unit @ unit.T
+
+    order = []
+    remaining = np.ones(len(relevance), dtype=bool)
+    max_similarity = np.zeros(len(relevance), dtype=np.float32)
+    while remaining.any():
+        marginal = lambda_ * relevance - (1 - lambda_) * max_similarity
+        marginal[~remaining] = -np.inf
+        best = int(np.argmax(marginal))
+        order.append(best)
+        remaining[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+        remaining &= max_similarity < duplicate_similarity
+    return order
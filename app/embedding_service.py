@@ -0,0 +1,222 @@
+"""
+Query embedding with dynamic micro-batching, in-process or as a local socket service.
+
+    # Shared by all API workers on the host (set EMBEDDING_SERVICE_SOCKET for them)
+    python -m app.embedding_service --socket /tmp/policy-rag-embed.sock
+"""
+
+import os
+import sys
+import queue
+import socket
+import struct
+import time
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.metrics import Counter, Histogram
+
+# Batch concurrent query encodes in HybridRetriever
+EMBED_MICROBATCH = os.getenv("EMBED_MICROBATCH", "true").lower() == "true"
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+# How long a batch waits for more queries once others are queued; a lone query never waits
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "2"))
+# Unix socket of a shared embedding service; unset encodes in-process
+EMBEDDING_SERVICE_SOCKET = os.getenv("EMBEDDING_SERVICE_SOCKET")
+
+embed_batch_size = Histogram(
+    "policy_rag_embed_batch_size",
+    "Queries encoded per model.encode call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+embed_batches = Counter(
+    "policy_rag_embed_batches_total",
+    "model.encode calls made by the embedding micro-batcher"
+)
+
+# Requests: uint32 length + UTF-8 text. Responses: uint32 dimension + float32 vector
+_LENGTH = struct.Struct("<I")
+
+
+class MicroBatcher:
+    """Collect concurrent encode() calls and run them as one batch.
+
+    A background thread takes the first waiting text and adds whatever else is
+    queued. A text that arrives alone is encoded straight away; only when others
+    are already queued does it wait up to max_wait_ms for more while the batch is
+    below max_batch_size. It then encodes the batch in one call and hands each
+    caller its row. Under load, texts arriving while a batch is being encoded
+    form the next batch, so batches grow with concurrency without extra waiting.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = EMBED_BATCH_MAX_SIZE,
+        max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS
+    ):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Started on first use, so a parent that preloads and then forks never owns the thread
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        futures = [self.submit(text) for text in texts]
+        return np.stack([future.result() for future in futures])
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Nothing else queued means low concurrency, where waiting only adds latency
+        if len(batch) == 1:
+            return batch
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the deadline, still take whatever is already queued
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.encode_batch(texts)
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            embed_batch_size.observe(len(batch))
+            embed_batches.inc()
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+def model_batch_encoder(model, max_batch_size: int = EMBED_BATCH_MAX_SIZE) -> Callable[[List[str]], np.ndarray]:
+    """One forward pass per micro-batch (queries are short, so no length bucketing)."""
+    return lambda texts: model.encode(texts, batch_size=max_batch_size, convert_to_numpy=True)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Embedding service closed the connection")
+        data += chunk
+    return bytes(data)
+
+
+class SocketEncoder:
+    """Client for the socket service; one connection per calling thread.
+
+    Each text is sent as its own request, so the service can batch texts
+    from every thread of every API worker together.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+            self._local.sock = sock
+        return sock
+
+    def encode(self, text: str) -> np.ndarray:
+        payload = text.encode("utf-8")
+        sock = self._connection()
+        try:
+            sock.sendall(_LENGTH.pack(len(payload)) + payload)
+            (dimension,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+            vector = np.frombuffer(_recv_exact(sock, dimension * 4), dtype=np.float32)
+        except OSError:
+            # Reconnect on the next call, e.g. after the service restarted
+            sock.close()
+            self._local.sock = None
+            raise
+        return vector
+
+
+class _EmbeddingHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        batcher: MicroBatcher = self.server.batcher
+        while True:
+            try:
+                (length,) = _LENGTH.unpack(_recv_exact(self.request, _LENGTH.size))
+                text = _recv_exact(self.request, length).decode("utf-8")
+            except ConnectionError:
+                return
+            vector = np.asarray(batcher.encode(text), dtype=np.float32)
+            self.request.sendall(_LENGTH.pack(len(vector)) + vector.tobytes())
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, batcher: MicroBatcher):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _EmbeddingHandler)
+        self.batcher = batcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=EMBEDDING_SERVICE_SOCKET or "/tmp/policy-rag-embed.sock")
+    parser.add_argument("--max-batch-size", type=int, default=EMBED_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=EMBED_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    from app.retrieval import EMBEDDING_MODEL
+
+    print(f"Loading {EMBEDDING_MODEL}...")
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    batcher = MicroBatcher(model_batch_encoder(model, args.max_batch_size), args.max_batch_size, args.max_wait_ms)
+
+    with EmbeddingServer(args.socket, batcher) as server:
+        print(f"Embedding service on {args.socket} (batch <= {args.max_batch_size}, wait <= {args.max_wait_ms} ms)")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
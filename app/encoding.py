@@ -0,0 +1,59 @@
+import os
+from typing import List
+
+import numpy as np
+
+# Sort texts by token count before batching so each batch pads to a similar length
+ENCODE_LENGTH_BUCKETING = os.getenv("ENCODE_LENGTH_BUCKETING", "true").lower() == "true"
+
+
+def token_lengths(model, texts: List[str]) -> np.ndarray:
+    """Token count of each text as the model will see it, i.e. after truncation."""
+    max_length = model.get_max_seq_length()
+    encoded = model.tokenizer(
+        texts,
+        add_special_tokens=True,
+        truncation=max_length is not None,
+        max_length=max_length
+    )
+    return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(texts))
+
+
+def length_buckets(lengths: np.ndarray, batch_size: int) -> List[np.ndarray]:
+    """Indices grouped into batches of similar length, shortest first."""
+    order = np.argsort(lengths, kind="stable")
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def padding_fraction(lengths: np.ndarray, batches: List[np.ndarray]) -> float:
+    """Share of token positions in the given batches that are padding."""
+    padded = sum(int(lengths[batch].max()) * len(batch) for batch in batches if len(batch))
+    return 1 - int(lengths.sum()) / padded if padded else 0.0
+
+
+def encode_length_bucketed(model, texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """model.encode over length-sorted batches, returned in the original order.
+
+    SentenceTransformer.encode already sorts by character count within a call;
+    token counts track padding more closely, and encoding each bucket on its
+    own keeps that order intact.
+    """
+    dimension = model.get_sentence_embedding_dimension()
+    if not texts:
+        return np.zeros((0, dimension), dtype=np.float32)
+
+    embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+    for bucket in length_buckets(token_lengths(model, texts), batch_size):
+        embeddings[bucket] = model.encode(
+            [texts[i] for i in bucket],
+            batch_size=len(bucket),
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+    return embeddings
+
+
+def encode_texts(model, texts: List[str], batch_size: int = 32) -> np.ndarray:
+    if ENCODE_LENGTH_BUCKETING:
+        return encode_length_bucketed(model, texts, batch_size)
+    return model.encode(texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
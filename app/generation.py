@@ -1,26 +1,47 @@
 import os
 import sys
+import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+import requests
 
 sys.path.append(str(Path(__file__).parent.parent))
 
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from langchain_community.llms import Ollama
 
-from app.retrieval import retrieve_policy_chunks
-from app.schemas import PolicyResponse
-from app.citations import extract_citations, validate_citations, build_citations
+from app.retrieval import retrieve_policy_chunks, get_retriever
+from app.schemas import PolicyResponse, Citation
+from app.citations import extract_citations, validate_citations, build_citations, trim_partial_answer
+from app.coalescing import SingleFlight, normalize_query_key
+from app.admission import get_admission_controller
+from app.llm_pool import OllamaBackendPool, get_backend_pool, backend_failovers
+from app.answer_store import answer_store_available, lookup_precomputed_answer, PrecomputedAnswer
 
 MIN_CONFIDENCE_SCORE = 0.25
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen3:4b")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 
-POLICY_PROMPT = PromptTemplate(
-    input_variables=["question", "sources"],
-    template="""You are a policy compliance assistant for Google Ads.
+# Generation controls
+MAX_NEW_TOKENS = int(os.getenv("OLLAMA_NUM_PREDICT", "512"))
+GENERATION_DEADLINE_S = float(os.getenv("GENERATION_DEADLINE_S", "30"))
+STOP_SEQUENCES = ["\nQuestion:", "\nSources:", "\nSOURCE "]
+REFUSE_TOKEN = "REFUSE"
+
+# Keep the model resident between requests and prefill the static prompt
+# prefix while retrieval is still running
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_PREFIX_WARMUP = os.getenv("OLLAMA_PREFIX_WARMUP", "true").lower() == "true"
+WARMUP_INTERVAL_S = float(os.getenv("OLLAMA_WARMUP_INTERVAL_S", "60"))
+
+_inflight_responses = SingleFlight()
+
+POLICY_INSTRUCTIONS = """You are a policy compliance assistant for Google Ads.
 
 Answer using ONLY the sources below. Every factual claim MUST include a citation.
 
@@ -29,7 +50,11 @@ Rules:
 2. Cite sources using this exact format: [SOURCE:<chunk_id>]
 3. If sources lack sufficient information, respond with exactly: REFUSE
 
-Question: {question}
+"""
+
+POLICY_PROMPT = PromptTemplate(
+    input_variables=["question", "sources"],
+    template=POLICY_INSTRUCTIONS + """Question: {question}
 
 Sources:
 {sources}
@@ -37,6 +62,31 @@ Sources:
 Answer:"""
 )
 
+# Static instructions, then sources in chunk_id order, then the question, so
+# requests sharing a source set share a long prompt prefix in Ollama's KV cache
+PREFIX_CACHE_PROMPT = PromptTemplate(
+    input_variables=["question", "sources"],
+    template=POLICY_INSTRUCTIONS + """Sources:
+{sources}
+
+Question: {question}
+
+Answer:"""
+)
+
+PROMPT_LAYOUTS = {
+    "question_first": POLICY_PROMPT,
+    "prefix_cache": PREFIX_CACHE_PROMPT,
+}
+PROMPT_LAYOUT = os.getenv("PROMPT_LAYOUT", "question_first")
+
+# Everything before the request-specific part is identical across requests
+PROMPT_PREFIX = POLICY_INSTRUCTIONS
+
+_warmup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ollama-warmup")
+_warmup_lock = threading.Lock()
+_last_warmup: Dict[str, float] = {}
+
 
 def should_refuse(results: List[Dict], min_score: float = MIN_CONFIDENCE_SCORE) -> tuple[bool, Optional[str]]:
     if not results:
@@ -59,31 +109,304 @@ def format_sources(results: List[Dict]) -> str:
     return "\n".join(formatted)
 
 
-def get_llm(model_name: Optional[str] = None) -> Ollama:
+def build_prompt(query: str, results: List[Dict], layout: Optional[str] = None) -> str:
+    layout = layout or PROMPT_LAYOUT
+    if layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Unknown prompt layout: {layout}")
+    
+    if layout == "prefix_cache":
+        results = sorted(results, key=lambda r: r["chunk_id"])
+    
+    return PROMPT_LAYOUTS[layout].format(question=query, sources=format_sources(results))
+
+
+def get_llm(model_name: Optional[str] = None, base_url: Optional[str] = None) -> Ollama:
     return Ollama(
         model=model_name or OLLAMA_MODEL,
-        base_url=OLLAMA_HOST,
+        base_url=base_url or OLLAMA_HOST,
         temperature=0.05,
+        stop=STOP_SEQUENCES,
+        timeout=int(GENERATION_DEADLINE_S),
+    )
+
+
+@dataclass
+class GenerationResult:
+    text: str
+    finish_reason: str
+    num_tokens: int = 0
+    prompt_eval_count: Optional[int] = None
+    prompt_eval_ms: Optional[float] = None
+
+
+def is_refusal_prefix(text: str) -> Optional[bool]:
+    """Decide from the leading output whether the model is refusing.
+
+    Returns True/False once the prefix is conclusive, None while undecided.
+    """
+    stripped = text.lstrip()
+    if len(stripped) >= len(REFUSE_TOKEN):
+        return stripped.startswith(REFUSE_TOKEN)
+    if REFUSE_TOKEN.startswith(stripped):
+        return None
+    return False
+
+
+def stream_generate(
+    llm: Ollama,
+    prompt: str,
+    max_tokens: Optional[int] = None,
+    stop: Optional[List[str]] = None,
+    deadline_s: Optional[float] = None,
+) -> GenerationResult:
+    """Stream a completion from Ollama, stopping early on REFUSE, token cap or deadline.
+
+    Closing the streamed response tells Ollama to abort the generation, so an
+    early stop frees the model instead of letting it finish in the background.
+    """
+    max_tokens = max_tokens or MAX_NEW_TOKENS
+    stop = stop if stop is not None else (llm.stop or STOP_SEQUENCES)
+    deadline_s = deadline_s or GENERATION_DEADLINE_S
+    deadline = time.monotonic() + deadline_s
+
+    payload = {
+        "model": llm.model,
+        "prompt": prompt,
+        "stream": True,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {
+            "temperature": llm.temperature,
+            "num_predict": max_tokens,
+            "stop": stop,
+        },
+    }
+
+    text = ""
+    num_tokens = 0
+    prompt_stats = {}
+    finish_reason = "deadline"
+    refusal_decided = False
+
+    with requests.post(
+        f"{llm.base_url}/api/generate",
+        json=payload,
+        stream=True,
+        timeout=(5, deadline_s),
+    ) as response:
+        response.raise_for_status()
+        response.encoding = "utf-8"
+
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+
+            data = json.loads(line)
+            if data.get("error"):
+                raise RuntimeError(data["error"])
+
+            text += data.get("response", "")
+            num_tokens += 1
+
+            if not refusal_decided:
+                refusing = is_refusal_prefix(text)
+                if refusing:
+                    finish_reason = "refuse"
+                    break
+                refusal_decided = refusing is False
+
+            if data.get("done"):
+                done_reason = data.get("done_reason", "stop")
+                finish_reason = "max_tokens" if done_reason == "length" else "stop"
+                num_tokens = data.get("eval_count", num_tokens)
+                if "prompt_eval_count" in data:
+                    prompt_stats["prompt_eval_count"] = data["prompt_eval_count"]
+                if "prompt_eval_duration" in data:
+                    prompt_stats["prompt_eval_ms"] = data["prompt_eval_duration"] / 1e6
+                break
+
+            if num_tokens >= max_tokens:
+                finish_reason = "max_tokens"
+                break
+
+            if time.monotonic() >= deadline:
+                finish_reason = "deadline"
+                break
+
+    return GenerationResult(
+        text=text,
+        finish_reason=finish_reason,
+        num_tokens=num_tokens,
+        **prompt_stats
     )
 
 
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return False
+
+
+def generate_with_failover(
+    prompt: str,
+    max_tokens: Optional[int] = None,
+    deadline_s: Optional[float] = None,
+    pool: Optional[OllamaBackendPool] = None
+) -> GenerationResult:
+    """Run stream_generate on the least-loaded backend, retrying others on failure.
+    
+    All attempts share one deadline: a retry gets only the time the failed
+    attempts left, and no retry is made once it has passed.
+    """
+    pool = pool or get_backend_pool()
+    deadline = time.monotonic() + (deadline_s or GENERATION_DEADLINE_S)
+    tried = set()
+    last_error: Optional[Exception] = None
+    
+    for attempt in range(len(pool.backends)):
+        remaining_s = deadline - time.monotonic()
+        if remaining_s <= 0:
+            break
+        with pool.lease(exclude=tried) as backend:
+            tried.add(backend.url)
+            if attempt > 0:
+                backend_failovers.inc()
+            
+            try:
+                result = stream_generate(
+                    get_llm(base_url=backend.url),
+                    prompt,
+                    max_tokens=max_tokens,
+                    deadline_s=remaining_s
+                )
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                pool.mark_failure(backend)
+                last_error = e
+                continue
+            
+            pool.mark_success(backend)
+            return result
+    
+    raise last_error
+
+
+def _warm_backend(base_url: str):
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": PROMPT_PREFIX,
+        "stream": False,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {"temperature": 0.05, "num_predict": 1},
+    }
+    try:
+        with requests.post(f"{base_url}/api/generate", json=payload, timeout=(2, 60)):
+            pass
+    except requests.RequestException:
+        pass
+
+
+def warm_prompt_prefix(pool: Optional[OllamaBackendPool] = None) -> int:
+    """Load the model and prefill PROMPT_PREFIX on idle backends, in the background.
+
+    Busy backends already have the prefix cached from their current request,
+    and each backend is warmed at most once per WARMUP_INTERVAL_S.
+    Returns the number of warmups issued.
+    """
+    pool = pool or get_backend_pool()
+    now = time.monotonic()
+    issued = 0
+    
+    with _warmup_lock:
+        for backend in pool.backends:
+            if backend.outstanding or not backend.healthy:
+                continue
+            if now - _last_warmup.get(backend.url, float("-inf")) < WARMUP_INTERVAL_S:
+                continue
+            _last_warmup[backend.url] = now
+            _warmup_executor.submit(_warm_backend, backend.url)
+            issued += 1
+    
+    return issued
+
+
+def fit_precomputed_answer(
+    entry: PrecomputedAnswer,
+    limit: int,
+    max_tokens: Optional[int] = None
+) -> Optional[Tuple[str, List[Dict], str]]:
+    """(answer, citations, finish_reason) of a stored answer held to the request's limits.
+    
+    A generated answer is cut at max_tokens and can only cite the `limit`
+    chunks retrieved for it. None when the stored answer cites more chunks
+    than that, or nothing cited is left after cutting it; the request is
+    then generated instead.
+    """
+    answer, finish_reason = entry.answer, "precomputed"
+    words = answer.split()
+    if max_tokens and len(words) > max_tokens:
+        answer, finish_reason = trim_partial_answer(" ".join(words[:max_tokens])), "max_tokens"
+    
+    cited_ids = extract_citations(answer)
+    citations = [c for c in entry.citations if c["chunk_id"] in cited_ids]
+    if not citations or len(citations) > limit:
+        return None
+    return answer, citations, finish_reason
+
+
 def generate_policy_response(
     query: str,
     llm: Optional[Ollama] = None,
     limit: int = 5,
     region: Optional[str] = None,
     content_type: Optional[str] = None,
-    policy_source: Optional[str] = None
+    policy_source: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    deadline_s: Optional[float] = None,
+    priority: str = "interactive",
+    prompt_layout: Optional[str] = None,
+    use_precomputed: bool = True
 ) -> PolicyResponse:
     start_time = time.time()
+    timings: Dict[str, float] = {}
+    
+    # Precomputed answers are generated without filters, so only unfiltered queries can use them
+    has_filters = bool(region or content_type or policy_source)
+    query_vector = None
+    if use_precomputed and not has_filters and answer_store_available():
+        stage_start = time.time()
+        # Reused by retrieval on a miss, so the query is encoded once either way
+        query_vector = get_retriever().encode_query(query)
+        match = lookup_precomputed_answer(query_vector)
+        timings["precomputed_lookup"] = (time.time() - stage_start) * 1000
+        fitted = fit_precomputed_answer(match[0], limit, max_tokens) if match is not None else None
+        if fitted is not None:
+            answer, citations, finish_reason = fitted
+            return PolicyResponse(
+                answer=answer,
+                refused=False,
+                citations=[Citation(**c) for c in citations],
+                latency_ms=(time.time() - start_time) * 1000,
+                num_tokens_generated=len(answer.split()),
+                finish_reason=finish_reason,
+                stage_timings_ms=timings
+            )
+    
+    if llm is None and OLLAMA_PREFIX_WARMUP:
+        warm_prompt_prefix()
     
+    stage_start = time.time()
     results = retrieve_policy_chunks(
         query=query,
         limit=limit,
         region=region,
         content_type=content_type,
-        policy_source=policy_source
+        policy_source=policy_source,
+        query_vector=query_vector
     )
+    timings["retrieval"] = (time.time() - stage_start) * 1000
     
     refuse, reason = should_refuse(results)
     if refuse:
@@ -92,38 +415,75 @@ def generate_policy_response(
             answer="",
             refused=True,
             refusal_reason=reason,
-            latency_ms=latency_ms
+            latency_ms=latency_ms,
+            stage_timings_ms=timings
         )
     
-    sources_text = format_sources(results)
+    prompt = build_prompt(query, results, layout=prompt_layout)
     
-    if llm is None:
-        llm = get_llm()
+    # Raises AdmissionRejected when the LLM stage is saturated; callers map it to 429/503
+    stage_start = time.time()
+    with get_admission_controller().slot(priority):
+        timings["llm_queue"] = (time.time() - stage_start) * 1000
+        stage_start = time.time()
+        # The deadline covers the whole request, so retrieval and queue time are deducted
+        deadline_s = deadline_s or GENERATION_DEADLINE_S
+        remaining_s = deadline_s - (time.time() - start_time)
+        if remaining_s <= 0:
+            timings["generation"] = 0.0
+            latency_ms = (time.time() - start_time) * 1000
+            return PolicyResponse(
+                answer="",
+                refused=True,
+                refusal_reason="Request deadline exceeded before generation started.",
+                latency_ms=latency_ms,
+                finish_reason="deadline",
+                stage_timings_ms=timings
+            )
+        
+        try:
+            if llm is None:
+                generation = generate_with_failover(
+                    prompt,
+                    max_tokens=max_tokens,
+                    deadline_s=remaining_s
+                )
+            else:
+                generation = stream_generate(
+                    llm,
+                    prompt,
+                    max_tokens=max_tokens,
+                    deadline_s=remaining_s
+                )
+        except Exception as e:
+            timings["generation"] = (time.time() - stage_start) * 1000
+            latency_ms = (time.time() - start_time) * 1000
+            return PolicyResponse(
+                answer="",
+                refused=True,
+                refusal_reason=f"LLM generation failed: {str(e)}",
+                latency_ms=latency_ms,
+                stage_timings_ms=timings
+            )
     
-    chain = LLMChain(llm=llm, prompt=POLICY_PROMPT)
+    timings["generation"] = (time.time() - stage_start) * 1000
+    answer = generation.text
     
-    try:
-        generation_start = time.time()
-        answer = chain.run(question=query, sources=sources_text)
-        generation_time = (time.time() - generation_start) * 1000
-    except Exception as e:
-        latency_ms = (time.time() - start_time) * 1000
-        return PolicyResponse(
-            answer="",
-            refused=True,
-            refusal_reason=f"LLM generation failed: {str(e)}",
-            latency_ms=latency_ms
-        )
-    
-    if answer.strip() == "REFUSE":
+    if generation.finish_reason == "refuse" or answer.strip() == REFUSE_TOKEN:
         latency_ms = (time.time() - start_time) * 1000
         return PolicyResponse(
             answer="",
             refused=True,
             refusal_reason="LLM determined sources insufficient to answer query.",
-            latency_ms=latency_ms
+            latency_ms=latency_ms,
+            finish_reason="refuse",
+            stage_timings_ms=timings
         )
     
+    # Truncated output may end inside a citation; drop the dangling tail
+    if generation.finish_reason in ("max_tokens", "deadline"):
+        answer = trim_partial_answer(answer)
+    
     cited_ids = extract_citations(answer)
     retrieved_ids = {r["chunk_id"] for r in results}
     
@@ -133,7 +493,9 @@ def generate_policy_response(
             answer="",
             refused=True,
             refusal_reason="Generated response failed citation validation.",
-            latency_ms=latency_ms
+            latency_ms=latency_ms,
+            finish_reason=generation.finish_reason,
+            stage_timings_ms=timings
         )
     
     citations = build_citations(cited_ids, results)
@@ -146,7 +508,44 @@ def generate_policy_response(
         refused=False,
         citations=citations,
         latency_ms=latency_ms,
-        num_tokens_generated=num_tokens
+        num_tokens_generated=num_tokens,
+        finish_reason=generation.finish_reason,
+        stage_timings_ms=timings
+    )
+
+
+def coalesced_policy_response(
+    query: str,
+    limit: int = 5,
+    region: Optional[str] = None,
+    content_type: Optional[str] = None,
+    policy_source: Optional[str] = None,
+    priority: str = "interactive"
+) -> PolicyResponse:
+    """generate_policy_response with single-flight deduplication.
+
+    Concurrent requests with the same normalized query, filters and priority
+    share one retrieval + generation instead of each calling Ollama.
+    """
+    key = normalize_query_key(query, limit, region, content_type, policy_source, priority)
+    
+    response, _ = _inflight_responses.do(
+        key,
+        lambda: generate_policy_response(
+            query=query,
+            limit=limit,
+            region=region,
+            content_type=content_type,
+            policy_source=policy_source,
+            priority=priority
+        )
+    )
+    
+    # Each caller gets its own copy so nothing downstream mutates a shared object
+    return replace(
+        response,
+        citations=list(response.citations),
+        stage_timings_ms=dict(response.stage_timings_ms)
     )
 
 
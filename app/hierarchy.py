@@ -0,0 +1,88 @@
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.models import PolicyChunk
+from db.corpus import get_corpus_version
+
+# "hierarchical" matches chunks, then returns a whole parent section when several of its chunks match
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "flat").lower()
+RETRIEVAL_MODES = ("flat", "hierarchical")
+# Matched chunks of one parent needed before the parent replaces them
+HIERARCHY_EXPAND_MIN_CHILDREN = int(os.getenv("HIERARCHY_EXPAND_MIN_CHILDREN", "2"))
+# Parents longer than this (all children, in characters) are never expanded
+HIERARCHY_MAX_PARENT_CHARS = int(os.getenv("HIERARCHY_MAX_PARENT_CHARS", "4000"))
+
+_LOAD_BATCH = 5000
+
+
+def parent_key(doc_id: str, policy_path: str) -> str:
+    """The H2 section a chunk belongs to: H2 intro, its H3 subsections and their split paragraphs."""
+    return f"{doc_id}::{policy_path.split(' > ')[0]}"
+
+
+class SectionHierarchy:
+    """Precomputed parent -> children map over the H2/H3 structure from extract_sections.
+
+    Children are the stored chunks, in chunk_index order; a parent is the H2
+    section they fall under (see parent_key). Only ids, paths and text
+    lengths are held, so deciding whether to expand a parent needs no text.
+    Like ChunkCatalog it is tied to a corpus version and replaced, never mutated.
+    """
+
+    def __init__(self, version: str, rows: Iterable):
+        self.version = version
+        self.parent_of: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.titles: Dict[str, str] = {}
+        self.sizes: Dict[str, int] = {}
+
+        ordered: Dict[str, List] = {}
+        for row in rows:
+            chunk_id = str(row.chunk_id)
+            parent = parent_key(row.doc_id, row.policy_path)
+            self.parent_of[chunk_id] = parent
+            ordered.setdefault(parent, []).append((row.chunk_index, chunk_id))
+            self.titles.setdefault(parent, row.policy_path.split(" > ")[0])
+            self.sizes[parent] = self.sizes.get(parent, 0) + row.text_length
+
+        for parent, entries in ordered.items():
+            self.children[parent] = [chunk_id for _, chunk_id in sorted(entries)]
+
+    def __len__(self) -> int:
+        return len(self.parent_of)
+
+    @classmethod
+    def load(cls, db: Session) -> "SectionHierarchy":
+        version = get_corpus_version(db)
+        rows = db.query(
+            PolicyChunk.chunk_id,
+            PolicyChunk.doc_id,
+            PolicyChunk.chunk_index,
+            PolicyChunk.policy_path,
+            func.length(PolicyChunk.chunk_text).label("text_length")
+        ).yield_per(_LOAD_BATCH)
+        return cls(version, rows)
+
+    def parent(self, chunk_id: str) -> Optional[str]:
+        return self.parent_of.get(chunk_id)
+
+    def expandable(
+        self,
+        parent: str,
+        matched_children: int,
+        min_children: int = HIERARCHY_EXPAND_MIN_CHILDREN,
+        max_chars: int = HIERARCHY_MAX_PARENT_CHARS
+    ) -> bool:
+        """Whether enough of the parent matched, and it is small enough, to send the whole section."""
+        return (
+            len(self.children.get(parent, [])) > 1
+            and matched_children >= min_children
+            and self.sizes.get(parent, 0) <= max_chars
+        )
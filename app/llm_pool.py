@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Set
+
+import requests
+
+from app.metrics import Counter, Gauge
+
+OLLAMA_HOSTS = [
+    host.strip().rstrip("/")
+    for host in os.getenv("OLLAMA_HOSTS", os.getenv("OLLAMA_HOST", "http://localhost:11434")).split(",")
+    if host.strip()
+]
+EJECT_AFTER_FAILURES = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "2"))
+EJECTION_COOLDOWN_S = float(os.getenv("OLLAMA_EJECTION_COOLDOWN_S", "30"))
+HEALTH_CHECK_INTERVAL_S = float(os.getenv("OLLAMA_HEALTH_CHECK_INTERVAL_S", "10"))
+
+backend_outstanding = Gauge(
+    "policy_rag_llm_backend_outstanding",
+    "Generations in flight per Ollama backend"
+)
+backend_ejections = Counter(
+    "policy_rag_llm_backend_ejections_total",
+    "Times an Ollama backend was ejected from the pool"
+)
+backend_failovers = Counter(
+    "policy_rag_llm_backend_failovers_total",
+    "Generations retried on another Ollama backend"
+)
+
+
+class NoBackendAvailable(Exception):
+    """Raised when every backend has already been tried for a request."""
+
+
+class OllamaBackend:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def __repr__(self):
+        return f"<OllamaBackend(url={self.url}, outstanding={self.outstanding}, healthy={self.healthy})>"
+
+
+class OllamaBackendPool:
+    """Least-outstanding-requests balancing across Ollama endpoints.
+
+    Backends that fail EJECT_AFTER_FAILURES times in a row are ejected for a
+    cooldown period; a background health check re-admits them early once
+    /api/tags answers again.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        eject_after_failures: int = EJECT_AFTER_FAILURES,
+        ejection_cooldown_s: float = EJECTION_COOLDOWN_S
+    ):
+        if not urls:
+            raise ValueError("OllamaBackendPool needs at least one backend URL")
+
+        self.backends = [OllamaBackend(url) for url in urls]
+        self.eject_after_failures = eject_after_failures
+        self.ejection_cooldown_s = ejection_cooldown_s
+        self._lock = threading.Lock()
+        self._next = 0
+        self._health_thread: Optional[threading.Thread] = None
+
+    def _pick(self, exclude: Set[str]) -> OllamaBackend:
+        candidates = [b for b in self.backends if b.url not in exclude]
+        if not candidates:
+            raise NoBackendAvailable("All Ollama backends have been tried")
+
+        # Fall back to ejected backends rather than failing outright
+        healthy = [b for b in candidates if b.healthy] or candidates
+
+        # Rotate the starting point so ties don't always land on the first backend
+        start = self._next % len(healthy)
+        self._next += 1
+        rotated = healthy[start:] + healthy[:start]
+        return min(rotated, key=lambda b: b.outstanding)
+
+    @contextmanager
+    def lease(self, exclude: Optional[Set[str]] = None) -> Iterator[OllamaBackend]:
+        """Reserve the least-loaded backend for the duration of one generation."""
+        with self._lock:
+            backend = self._pick(exclude or set())
+            backend.outstanding += 1
+        backend_outstanding.inc(backend=backend.url)
+        try:
+            yield backend
+        finally:
+            with self._lock:
+                backend.outstanding -= 1
+            backend_outstanding.dec(backend=backend.url)
+
+    def mark_success(self, backend: OllamaBackend):
+        with self._lock:
+            backend.consecutive_failures = 0
+            backend.ejected_until = 0.0
+
+    def mark_failure(self, backend: OllamaBackend):
+        with self._lock:
+            backend.consecutive_failures += 1
+            if backend.consecutive_failures >= self.eject_after_failures and backend.healthy:
+                backend.ejected_until = time.monotonic() + self.ejection_cooldown_s
+                backend_ejections.inc(backend=backend.url)
+
+    def health_check(self, timeout: float = 2.0) -> int:
+        """Ping every backend once. Returns the number of healthy backends."""
+        for backend in self.backends:
+            try:
+                response = requests.get(f"{backend.url}/api/tags", timeout=timeout)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+
+            if ok:
+                self.mark_success(backend)
+            else:
+                self.mark_failure(backend)
+
+        return sum(1 for b in self.backends if b.healthy)
+
+    def start_health_checks(self, interval_s: float = HEALTH_CHECK_INTERVAL_S):
+        if self._health_thread is not None:
+            return
+
+        def _loop():
+            while True:
+                time.sleep(interval_s)
+                self.health_check()
+
+        self._health_thread = threading.Thread(target=_loop, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+
+_pool_instance = None
+
+
+def get_backend_pool() -> OllamaBackendPool:
+    global _pool_instance
+    if _pool_instance is None:
+        _pool_instance = OllamaBackendPool(OLLAMA_HOSTS)
+        if len(_pool_instance.backends) > 1:
+            _pool_instance.start_health_checks()
+    return _pool_instance
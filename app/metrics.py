@@ -0,0 +1,115 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_registry: List["_Metric"] = []
+_registry_lock = threading.Lock()
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: Optional[Dict[str, str]] = None) -> str:
+    items = list(key) + sorted((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in items) + "}"
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0) + value
+
+    def count(self, **labels: str) -> int:
+        counts = self._counts.get(_label_key(labels))
+        return counts[-1] if counts else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, counts in self._counts.items():
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': str(bound)})} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {counts[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {self._sums[key]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+
+def render_prometheus() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry)
+
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,40 @@
+import gc
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.session import engine
+from app.retrieval import get_retriever
+from app.answer_store import answer_store_available, preload_answer_store
+from app.admission import configure_worker_share
+
+
+def preload_shared_state():
+    """Load everything read-only into the parent process before workers fork.
+
+    The embedding model, the chunk catalog (or mmapped corpus snapshot), the
+    active index pointer and the answer store are then inherited by every
+    worker as copy-on-write pages instead of being loaded N times.
+
+    The model is deliberately not run here: encoding would start torch's
+    intra-op thread pool, which does not survive fork.
+    """
+    retriever = get_retriever()
+    retriever.index_class()
+    if answer_store_available():
+        preload_answer_store()
+
+    # Keep the cyclic GC from writing to (and so un-sharing) every preloaded object's header
+    gc.freeze()
+
+
+def reinit_after_fork(torch_threads: int, workers: int = 1):
+    """Per-worker setup in a process forked from preload_shared_state()."""
+    import torch
+
+    # Pooled Postgres connections belong to the parent; drop them without closing its sockets
+    engine.dispose(close=False)
+    get_retriever().reset_after_fork()
+    torch.set_num_threads(torch_threads)
+    configure_worker_share(workers)
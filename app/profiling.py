@@ -0,0 +1,131 @@
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import uuid
+import random
+import threading
+from collections import Counter as StackCounter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(Path(__file__).parent.parent / "logs" / "profiles")))
+# Fraction of /query requests profiled without being asked; 0 disables sampling
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_S = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "200"))
+# Let clients ask for a profile (?profile=1 / X-Profile) and read /debug/profiles;
+# both also need the shared PROFILE_TOKEN in X-Profile-Token
+PROFILE_ON_REQUEST = os.getenv("PROFILE_ON_REQUEST", "false").lower() == "true"
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
+PROFILE_ID_PATTERN = re.compile(r"^[a-f0-9]{32}$")
+
+
+_prune_lock = threading.Lock()
+
+
+def profile_access_allowed(token: Optional[str]) -> bool:
+    """Whether a client may trigger profiles and read them: enabled server-side and the token matches."""
+    if not PROFILE_ON_REQUEST or not PROFILE_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def should_profile(requested: bool) -> bool:
+    """Cheap check done on every request; the sampler only exists when this is True."""
+    if requested:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class StackSampler:
+    """py-spy style wall-clock sampler for a single thread.
+
+    A daemon thread snapshots the target thread's Python stack every
+    interval_s and counts identical stacks. Time spent blocked on I/O (Weaviate,
+    Postgres, Ollama) shows up too, which a CPU-only profiler would miss.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float = PROFILE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: StackCounter = StackCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Folded stacks, one "frame;frame;frame count" per line (flamegraph.pl / speedscope)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _prune(directory: Path, keep: int):
+    # Serialized so concurrent requests don't stat files another one is deleting
+    with _prune_lock:
+        profiles = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for meta_path in profiles[:max(len(profiles) - keep, 0)]:
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix(".collapsed").unlink(missing_ok=True)
+
+
+def run_profiled(label: str, fn: Callable, *args, **kwargs) -> Tuple[Any, str]:
+    """Call fn under the stack sampler and store the profile. Returns (result, profile_id)."""
+    sampler = StackSampler(threading.get_ident())
+    start = time.time()
+    sampler.start()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        sampler.stop()
+        duration_ms = (time.time() - start) * 1000
+
+    profile_id = uuid.uuid4().hex
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    (PROFILE_DIR / f"{profile_id}.collapsed").write_text(sampler.collapsed(), encoding="utf-8")
+    (PROFILE_DIR / f"{profile_id}.json").write_text(json.dumps({
+        "profile_id": profile_id,
+        "label": label,
+        "started_at": start,
+        "duration_ms": duration_ms,
+        "interval_ms": sampler.interval_s * 1000,
+        "samples": sum(sampler.stacks.values()),
+    }), encoding="utf-8")
+    _prune(PROFILE_DIR, PROFILE_MAX_STORED)
+
+    return result, profile_id
+
+
+def list_profiles() -> List[Dict]:
+    if not PROFILE_DIR.exists():
+        return []
+    profiles = [json.loads(p.read_text(encoding="utf-8")) for p in PROFILE_DIR.glob("*.json")]
+    return sorted(profiles, key=lambda p: p["started_at"], reverse=True)
+
+
+def read_profile(profile_id: str) -> Optional[str]:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}.collapsed"
+    if not path.exists():
+        return None
+    return path.read_text(encoding="utf-8")
@@ -0,0 +1,134 @@
+import os
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.metrics import Counter
+from app.schemas import PolicyResponse
+
+# Unset disables query logging entirely
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH")
+QUERY_LOG_BATCH_SIZE = int(os.getenv("QUERY_LOG_BATCH_SIZE", "100"))
+QUERY_LOG_FLUSH_S = float(os.getenv("QUERY_LOG_FLUSH_S", "1.0"))
+QUERY_LOG_MAX_QUEUE = int(os.getenv("QUERY_LOG_MAX_QUEUE", "10000"))
+
+dropped_records = Counter(
+    "policy_rag_query_log_dropped_total",
+    "Query log records dropped because the write queue was full"
+)
+
+
+class QueryLogWriter:
+    """Append query records to a JSONL file from a background thread.
+
+    log() only enqueues, so the request path never waits on disk I/O. Records
+    are written in batches of up to batch_size or every flush_interval_s.
+    When the queue is full, records are dropped and counted rather than
+    blocking requests.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = QUERY_LOG_BATCH_SIZE,
+        flush_interval_s: float = QUERY_LOG_FLUSH_S,
+        max_queue: int = QUERY_LOG_MAX_QUEUE
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+        self._thread.start()
+
+    def log(self, record: Dict):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.inc()
+
+    def close(self, timeout: float = 5.0):
+        """Flush pending records and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _write(self, batch: List[Dict]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch))
+
+    def _run(self):
+        batch: List[Dict] = []
+        last_flush = time.monotonic()
+
+        while True:
+            timeout = max(last_flush + self.flush_interval_s - time.monotonic(), 0)
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                if record is None:
+                    if batch:
+                        self._write(batch)
+                    return
+
+                batch.append(record)
+                if len(batch) < self.batch_size and time.monotonic() < last_flush + self.flush_interval_s:
+                    continue
+
+            if batch:
+                self._write(batch)
+                batch = []
+            last_flush = time.monotonic()
+
+
+def build_query_record(
+    query: str,
+    limit: int,
+    region: Optional[str],
+    content_type: Optional[str],
+    policy_source: Optional[str],
+    priority: str,
+    status_code: int,
+    response: Optional[PolicyResponse] = None,
+    error: Optional[str] = None
+) -> Dict:
+    record = {
+        "ts": time.time(),
+        "query": query,
+        "limit": limit,
+        "region": region,
+        "content_type": content_type,
+        "policy_source": policy_source,
+        "priority": priority,
+        "status_code": status_code,
+    }
+
+    if response is not None:
+        record.update({
+            "refused": response.refused,
+            "refusal_reason": response.refusal_reason,
+            "finish_reason": response.finish_reason,
+            "latency_ms": response.latency_ms,
+            "stage_timings_ms": response.stage_timings_ms,
+            "cited_chunk_ids": [c.chunk_id for c in response.citations],
+        })
+
+    if error:
+        record["error"] = error
+
+    return record
+
+
+_writer_instance = None
+
+
+def get_query_logger() -> Optional[QueryLogWriter]:
+    global _writer_instance
+    if _writer_instance is None and QUERY_LOG_PATH:
+        _writer_instance = QueryLogWriter(Path(QUERY_LOG_PATH))
+    return _writer_instance
@@ -1,19 +1,83 @@
 import weaviate
+import numpy as np
 from sentence_transformers import SentenceTransformer
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from sqlalchemy import any_, bindparam, event, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Session, Query
+from typing import List, Dict, Optional, Set, Tuple
+from collections import Counter
+from dataclasses import dataclass, replace
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
+import time
+import threading
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from db.session import SessionLocal
+from db.session import SessionLocal, engine
 from db.models import PolicyChunk, PolicySource, Region, ContentType
+from db.index_versions import current_class_name, filter_stats_for
+from db.pgvector import (
+    configure_search_session,
+    embedding_table,
+    RETRIEVAL_BACKEND,
+    RETRIEVAL_BACKENDS
+)
+from app.encoding import encode_texts
+from app.chunk_catalog import ChunkCatalog, CHUNK_CATALOG, CHUNK_CATALOG_REFRESH_S
+from app.snapshot import CorpusSnapshot, open_snapshot
+from app.diversity import (
+    cap_per_section,
+    mmr_order,
+    RETRIEVAL_DIVERSITY,
+    MAX_CHUNKS_PER_SECTION
+)
+from app.hierarchy import SectionHierarchy, RETRIEVAL_MODE, RETRIEVAL_MODES
+from app.selectivity import (
+    FilterSelectivity,
+    overfetch_limit,
+    ADAPTIVE_OVERFETCH,
+    DEFAULT_OVERFETCH_FACTOR,
+    OVERFETCH_GROWTH,
+    OVERFETCH_MAX_CANDIDATES
+)
+from app.embedding_service import (
+    MicroBatcher,
+    SocketEncoder,
+    model_batch_encoder,
+    EMBED_MICROBATCH,
+    EMBEDDING_SERVICE_SOCKET
+)
+from db.corpus import get_corpus_version
 
 WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://localhost:8080")
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# How often the active (blue/green) Weaviate class is re-read from Postgres
+ACTIVE_INDEX_REFRESH_S = float(os.getenv("ACTIVE_INDEX_REFRESH_S", "5"))
+# Fetch only ids and distances from Weaviate; load text and metadata for the final top-k
+RETRIEVAL_TWO_PHASE = os.getenv("RETRIEVAL_TWO_PHASE", "true").lower() == "true"
+
+VECTOR_SEARCH_FIELDS = [
+    "chunk_id",
+    "chunk_text",
+    "policy_section",
+    "policy_path",
+    "policy_section_level",
+    "doc_id",
+    "doc_url",
+    "policy_source",
+    "region",
+    "content_type",
+    "_additional { distance }"
+]
+# policy_section_level is needed to rerank every candidate before the cut to top-k
+CANDIDATE_FIELDS = ["chunk_id", "policy_section_level", "_additional { distance }"]
+
+def chunk_id_any(chunk_ids: List[str]):
+    """chunk_id = ANY(:chunk_ids::UUID[]): one bound array, so the SQL text is the same for any number of ids."""
+    return PolicyChunk.chunk_id == any_(bindparam("chunk_ids", list(chunk_ids), type_=ARRAY(UUID(as_uuid=False))))
 
 _retriever_instance = None
 
@@ -53,49 +117,332 @@ class RetrievalResult:
         }
 
 class HybridRetriever:
-    def __init__(self, model_name: str = EMBEDDING_MODEL):
+    def __init__(self, model_name: str = EMBEDDING_MODEL, backend: str = RETRIEVAL_BACKEND):
+        if backend not in RETRIEVAL_BACKENDS:
+            raise ValueError(f"Unknown retrieval backend: {backend}")
+        if backend == "pgvector" and not event.contains(engine, "connect", configure_search_session):
+            event.listen(engine, "connect", configure_search_session)
+            # Connections pooled before the listener existed would keep the server defaults
+            engine.dispose()
         self.model = SentenceTransformer(model_name)
-        self.weaviate_client = weaviate.Client(url=WEAVIATE_URL)
+        self.backend = backend
+        self.weaviate_client = self._make_weaviate_client()
+        self.two_phase = RETRIEVAL_TWO_PHASE
+        self.diversity = RETRIEVAL_DIVERSITY
+        self.mode = RETRIEVAL_MODE
+        self.adaptive_overfetch = ADAPTIVE_OVERFETCH
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+        self._query_encoder = self._make_query_encoder()
+        self._index_class = None
+        self._index_checked_at = float("-inf")
+        self._index_refresh = None
+        self._index_lock = threading.Lock()
+        self._filter_stats = None
+        self._filter_stats_class = None
+        self._catalog = None
+        self._catalog_checked_at = float("-inf")
+        self._catalog_refresh = None
+        self._catalog_lock = threading.Lock()
+        self._hierarchy = None
+        self._hierarchy_checked_at = float("-inf")
+        self._hierarchy_refresh = None
+        self._hierarchy_lock = threading.Lock()
+        if CHUNK_CATALOG:
+            self._catalog_checked_at = time.monotonic()
+            self._refresh_catalog()
+        if self.mode == "hierarchical":
+            self._hierarchy_checked_at = time.monotonic()
+            self._refresh_hierarchy()
+    
+    def _make_weaviate_client(self) -> Optional[weaviate.Client]:
+        # The pgvector backend never talks to Weaviate
+        return weaviate.Client(url=WEAVIATE_URL) if self.backend == "weaviate" else None
+    
+    def _make_query_encoder(self):
+        if EMBEDDING_SERVICE_SOCKET:
+            return SocketEncoder(EMBEDDING_SERVICE_SOCKET).encode
+        if EMBED_MICROBATCH:
+            return MicroBatcher(model_batch_encoder(self.model)).encode
+        return self.model.encode
+    
+    def reset_after_fork(self):
+        """Fresh connections, threads and locks for a worker forked from a preloading parent.
+        
+        The model weights and the catalog stay as inherited (shared copy-on-write
+        pages); sockets, thread pools and lock state cannot be shared across processes.
+        """
+        self.weaviate_client = self._make_weaviate_client()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+        self._query_encoder = self._make_query_encoder()
+        self._index_refresh = None
+        self._index_lock = threading.Lock()
+        self._catalog_refresh = None
+        self._catalog_lock = threading.Lock()
+        self._hierarchy_refresh = None
+        self._hierarchy_lock = threading.Lock()
+    
+    def _refresh_catalog(self):
+        db = SessionLocal()
+        try:
+            version = get_corpus_version(db)
+            if self._catalog is None or version != self._catalog.version:
+                # The mmapped snapshot for this version if ingestion wrote one, else a copy from Postgres
+                self._catalog = open_snapshot(version) or ChunkCatalog.load(db)
+        finally:
+            db.close()
+    
+    def catalog(self):
+        """ChunkCatalog or CorpusSnapshot, None when disabled; replaced in the background when the corpus version changes."""
+        if self._catalog is None:
+            return None
+        
+        if time.monotonic() - self._catalog_checked_at > CHUNK_CATALOG_REFRESH_S:
+            with self._catalog_lock:
+                if self._catalog_refresh is None or self._catalog_refresh.done():
+                    self._catalog_checked_at = time.monotonic()
+                    self._catalog_refresh = self._executor.submit(self._refresh_catalog)
+        
+        return self._catalog
+    
+    def _refresh_hierarchy(self):
+        db = SessionLocal()
+        try:
+            version = get_corpus_version(db)
+            if self._hierarchy is None or version != self._hierarchy.version:
+                self._hierarchy = SectionHierarchy.load(db)
+        finally:
+            db.close()
+    
+    def hierarchy(self) -> SectionHierarchy:
+        """Parent -> children map, loaded on first use and replaced in the background when the corpus version changes."""
+        if self._hierarchy is None:
+            with self._hierarchy_lock:
+                if self._hierarchy is None:
+                    self._hierarchy_checked_at = time.monotonic()
+                    self._refresh_hierarchy()
+            return self._hierarchy
+        
+        if time.monotonic() - self._hierarchy_checked_at > CHUNK_CATALOG_REFRESH_S:
+            with self._hierarchy_lock:
+                if self._hierarchy_refresh is None or self._hierarchy_refresh.done():
+                    self._hierarchy_checked_at = time.monotonic()
+                    self._hierarchy_refresh = self._executor.submit(self._refresh_hierarchy)
+        
+        return self._hierarchy
+    
+    def _load_index_class(self) -> Optional[str]:
+        self._index_class = current_class_name(self.backend)
+        return self._index_class
+    
+    def index_class(self) -> Optional[str]:
+        """Active Weaviate class (or pgvector table) of this backend; re-read in the background so an index swap never blocks a query."""
+        if self._index_class is None:
+            self._index_checked_at = time.monotonic()
+            return self._load_index_class()
+        
+        if time.monotonic() - self._index_checked_at > ACTIVE_INDEX_REFRESH_S:
+            with self._index_lock:
+                if self._index_refresh is None or self._index_refresh.done():
+                    self._index_checked_at = time.monotonic()
+                    self._index_refresh = self._executor.submit(self._load_index_class)
+        
+        return self._index_class
+    
+    def filter_selectivity(self) -> Optional[FilterSelectivity]:
+        """Filter statistics recorded for the active index; re-read only after an index swap."""
+        class_name = self.index_class()
+        if class_name != self._filter_stats_class:
+            counts = filter_stats_for(class_name)
+            self._filter_stats = FilterSelectivity(counts) if counts else None
+            self._filter_stats_class = class_name
+        return self._filter_stats
+    
+    def candidate_limit(
+        self,
+        limit: int,
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None
+    ) -> int:
+        """First-round overfetch: smaller without filters, larger the more selective the filters."""
+        if not self.adaptive_overfetch:
+            return limit * DEFAULT_OVERFETCH_FACTOR
+        
+        has_filters = bool(region or content_type or policy_source)
+        fraction = None
+        if has_filters:
+            selectivity = self.filter_selectivity()
+            if selectivity is not None:
+                fraction = selectivity.fraction(region, content_type, policy_source)
+        return overfetch_limit(limit, has_filters, fraction)
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """Encoded together with concurrent queries (micro-batching) or by the shared embedding service."""
+        return self._query_encoder(query)
+    
+    def encode_queries(self, queries: List[str], batch_size: int = 32) -> np.ndarray:
+        return encode_texts(self.model, queries, batch_size=batch_size)
     
     def vector_search(
         self,
         query: str,
-        limit: int = 10
+        limit: int = 10,
+        fields: Optional[List[str]] = None,
+        offset: int = 0,
+        query_vector: Optional[np.ndarray] = None
     ) -> List[Dict]:
-        query_vector = self.model.encode(query).tolist()
+        if query_vector is None:
+            query_vector = self.encode_query(query)
+        class_name = self.index_class()
         
         query_builder = self.weaviate_client.query.get(
-            "PolicyChunk",
-            [
-                "chunk_id",
-                "chunk_text",
-                "policy_section",
-                "policy_path",
-                "policy_section_level",
-                "doc_id",
-                "doc_url",
-                "policy_source",
-                "region",
-                "content_type",
-                "_additional { distance }"
-            ]
-        ).with_near_vector({"vector": query_vector}).with_limit(limit)
+            class_name,
+            fields or VECTOR_SEARCH_FIELDS
+        ).with_near_vector({"vector": query_vector.tolist()}).with_limit(limit)
+        if offset:
+            query_builder = query_builder.with_offset(offset)
         
         result = query_builder.do()
         
-        chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+        chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
         return chunks
     
-    def sql_filter(
+    def pgvector_search(
         self,
-        db: Session,
-        chunk_ids: List[str],
+        query: str,
+        limit: int = 10,
         region: Optional[str] = None,
         content_type: Optional[str] = None,
-        policy_source: Optional[str] = None
-    ) -> List[PolicyChunk]:
-        query = db.query(PolicyChunk).filter(PolicyChunk.chunk_id.in_(chunk_ids))
+        policy_source: Optional[str] = None,
+        query_vector: Optional[np.ndarray] = None
+    ) -> List[Dict]:
+        """Nearest chunks passing the filters, with text and metadata, from one Postgres statement.
+        
+        Rows are shaped like vector_search() results (the cosine distance under
+        "_additional"). Postgres picks the plan: the
+        HNSW/IVFFlat index scan with the filters applied as it goes, or for very
+        selective filters the filter index and an exact sort.
+        
+        Reads the embeddings table of the active index version, written by
+        `python -m ingestion.embed --backend pgvector`.
+        """
+        table_name = self.index_class()
+        if table_name is None:
+            raise RuntimeError("No pgvector index promoted yet; run python -m ingestion.embed --backend pgvector")
+        embeddings = embedding_table(table_name)
+        
+        if query_vector is None:
+            query_vector = self.encode_query(query)
+        distance = embeddings.c.embedding.cosine_distance(query_vector.tolist()).label("distance")
+        columns = [
+            PolicyChunk.chunk_id,
+            PolicyChunk.chunk_text,
+            PolicyChunk.policy_section,
+            PolicyChunk.policy_path,
+            PolicyChunk.policy_section_level,
+            PolicyChunk.doc_id,
+            PolicyChunk.doc_url,
+            PolicyChunk.policy_source,
+            PolicyChunk.region,
+            PolicyChunk.content_type,
+            distance
+        ]
+        
+        statement = select(*columns).select_from(
+            embeddings.join(PolicyChunk, PolicyChunk.chunk_id == embeddings.c.chunk_id)
+        )
+        statement = self._apply_filters(statement, region, content_type, policy_source)
+        statement = statement.order_by(distance).limit(limit)
+        
+        db = SessionLocal()
+        try:
+            rows = db.execute(statement).all()
+        finally:
+            db.close()
+        
+        return [
+            {
+                "chunk_id": str(row.chunk_id),
+                "chunk_text": row.chunk_text,
+                "policy_section": row.policy_section,
+                "policy_path": row.policy_path,
+                "policy_section_level": row.policy_section_level,
+                "doc_id": row.doc_id,
+                "doc_url": row.doc_url or "",
+                "policy_source": row.policy_source.value,
+                "region": row.region.value,
+                "content_type": row.content_type.value,
+                "_additional": {"distance": row.distance}
+            }
+            for row in rows
+        ]
+    
+    def _search_fields(self, catalog) -> List[str]:
+        fields = list(CANDIDATE_FIELDS if self.two_phase else VECTOR_SEARCH_FIELDS)
+        if self.diversity == "mmr" and "policy_path" not in fields:
+            # Sections for the per-section cap; vectors are loaded later for the top-k only
+            fields.insert(-1, "policy_path")
+        return fields
+    
+    def top_k_vectors(self, chunk_ids: List[str], catalog) -> Dict[str, np.ndarray]:
+        """Embeddings of the final top-k: from the mmapped snapshot, else one small query to the vector store."""
+        if isinstance(catalog, CorpusSnapshot):
+            return catalog.vectors_for(chunk_ids)
+        
+        if self.backend == "pgvector":
+            embeddings = embedding_table(self.index_class())
+            db = SessionLocal()
+            try:
+                rows = db.execute(
+                    select(embeddings.c.chunk_id, embeddings.c.embedding).where(
+                        embeddings.c.chunk_id == any_(bindparam("chunk_ids", chunk_ids, type_=ARRAY(UUID(as_uuid=False))))
+                    )
+                ).all()
+            finally:
+                db.close()
+            return {str(row.chunk_id): np.asarray(row.embedding, dtype=np.float32) for row in rows}
+        
+        class_name = self.index_class()
+        result = self.weaviate_client.query.get(class_name, ["chunk_id"]).with_additional(["vector"]).with_where({
+            "path": ["chunk_id"],
+            "operator": "ContainsAny",
+            "valueTextArray": chunk_ids
+        }).with_limit(len(chunk_ids)).do()
+        return {
+            chunk["chunk_id"]: np.asarray(chunk["_additional"]["vector"], dtype=np.float32)
+            for chunk in result.get("data", {}).get("Get", {}).get(class_name, [])
+            if chunk["_additional"].get("vector")
+        }
+    
+    def diversify(self, results: List[RetrievalResult], limit: int, catalog) -> List[RetrievalResult]:
+        """At most MAX_CHUNKS_PER_SECTION per policy_path, then MMR over the top `limit`.
         
+        Only the top-k vectors are loaded, so candidate searches stay id and
+        distance only. Near-duplicates MMR drops from the top-k make room for
+        the next candidates in score order.
+        """
+        results = [results[i] for i in cap_per_section([r.policy_path for r in results], MAX_CHUNKS_PER_SECTION)]
+        top = results[:limit]
+        if len(top) < 2:
+            return results
+        
+        vectors = self.top_k_vectors([r.chunk_id for r in top], catalog)
+        if not vectors:
+            return results
+        
+        dimension = len(next(iter(vectors.values())))
+        missing = np.zeros(dimension, dtype=np.float32)
+        matrix = np.stack([vectors.get(r.chunk_id, missing) for r in top])
+        order = mmr_order(np.array([r.score for r in top]), matrix)
+        return [top[i] for i in order] + results[limit:]
+    
+    def _apply_filters(
+        self,
+        query: Query,
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None
+    ) -> Query:
         if region:
             region_enum = Region(region.strip().lower())
             query = query.filter(PolicyChunk.region == region_enum)
@@ -108,9 +455,120 @@ class HybridRetriever:
             policy_source_enum = PolicySource(policy_source.strip().lower())
             query = query.filter(PolicyChunk.policy_source == policy_source_enum)
         
+        return query
+    
+    def sql_filter(
+        self,
+        db: Session,
+        chunk_ids: List[str],
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None
+    ) -> List:
+        query = db.query(PolicyChunk.chunk_id).filter(chunk_id_any(chunk_ids))
+        query = self._apply_filters(query, region, content_type, policy_source)
+        
         # Preserve vector ranking; SQL used only as a filter
         return query.all()
     
+    def hydrate(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        """Text and metadata for chunk_ids, keyed by chunk_id, from the catalog or one Postgres round trip."""
+        catalog = self.catalog()
+        if catalog is not None:
+            return catalog.hydrate(chunk_ids)
+        
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                PolicyChunk.chunk_id,
+                PolicyChunk.chunk_text,
+                PolicyChunk.policy_section,
+                PolicyChunk.policy_path,
+                PolicyChunk.policy_section_level,
+                PolicyChunk.doc_id,
+                PolicyChunk.doc_url,
+                PolicyChunk.policy_source,
+                PolicyChunk.region,
+                PolicyChunk.content_type
+            ).filter(chunk_id_any(chunk_ids)).all()
+        finally:
+            db.close()
+        
+        return {
+            str(row.chunk_id): {
+                "chunk_text": row.chunk_text,
+                "policy_section": row.policy_section,
+                "policy_path": row.policy_path,
+                "policy_section_level": row.policy_section_level,
+                "doc_id": row.doc_id,
+                "doc_url": row.doc_url or "",
+                "policy_source": row.policy_source.value,
+                "region": row.region.value,
+                "content_type": row.content_type.value
+            }
+            for row in rows
+        }
+    
+    def _hydrate_top(self, ranked: List[RetrievalResult], limit: int) -> List[RetrievalResult]:
+        """Fill in the best `limit` candidates; one that has left Postgres is replaced by the next."""
+        hydrated = []
+        next_index = 0
+        while len(hydrated) < limit and next_index < len(ranked):
+            batch = ranked[next_index:next_index + limit - len(hydrated)]
+            next_index += len(batch)
+            rows = self.hydrate([result.chunk_id for result in batch])
+            hydrated.extend(replace(result, **rows[result.chunk_id]) for result in batch if result.chunk_id in rows)
+        return hydrated
+    
+    def expand_to_parents(self, ranked: List[RetrievalResult], limit: int) -> List[RetrievalResult]:
+        """Group ranked chunks by parent section; a parent replaces its chunks when expandable.
+        
+        Walking the ranked chunks, a chunk whose parent has at least
+        HIERARCHY_EXPAND_MIN_CHILDREN matches among the candidates (and fits
+        HIERARCHY_MAX_PARENT_CHARS) is replaced by the whole parent: all of its
+        children's text in document order, under the best chunk's id and score so
+        citations still resolve. Other chunks are returned as they are. Text for
+        everything returned is hydrated in one lookup.
+        """
+        hierarchy = self.hierarchy()
+        matched = Counter(hierarchy.parent(result.chunk_id) for result in ranked)
+        
+        selected = []
+        expanded = set()
+        for result in ranked:
+            if len(selected) >= limit:
+                break
+            parent = hierarchy.parent(result.chunk_id)
+            if parent in expanded:
+                continue
+            if parent is not None and hierarchy.expandable(parent, matched[parent]):
+                expanded.add(parent)
+                selected.append((result, parent))
+            else:
+                selected.append((result, None))
+        
+        chunk_ids = []
+        for result, parent in selected:
+            chunk_ids.extend(hierarchy.children[parent] if parent else [result.chunk_id])
+        rows = self.hydrate(chunk_ids)
+        
+        results = []
+        for result, parent in selected:
+            if result.chunk_id not in rows:
+                continue
+            result = replace(result, **rows[result.chunk_id])
+            if parent is not None:
+                title = hierarchy.titles[parent]
+                result = replace(
+                    result,
+                    chunk_text="\n\n".join(rows[c]["chunk_text"] for c in hierarchy.children[parent] if c in rows),
+                    policy_section=title,
+                    policy_path=title,
+                    policy_section_level="H2"
+                )
+            results.append(result)
+        return results
+    
     def retrieve(
         self,
         query: str,
@@ -118,23 +576,166 @@ class HybridRetriever:
         region: Optional[str] = None,
         content_type: Optional[str] = None,
         policy_source: Optional[str] = None,
-        prefer_specific: bool = True
+        prefer_specific: bool = True,
+        mode: Optional[str] = None,
+        query_vector: Optional[np.ndarray] = None
     ) -> List[RetrievalResult]:
+        """Top `limit` chunks for `query`; pass `query_vector` when the caller has already encoded it."""
+        mode = mode or self.mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        
         if limit <= 0:
             return []
         
-        overfetch_limit = limit * 3
+        if self.backend == "pgvector":
+            # Similarity, filters and text in one statement: every row already passes
+            # the filters, so the pool is sized as for an unfiltered query
+            catalog = None
+            vector_results = self.pgvector_search(
+                query,
+                self.candidate_limit(limit),
+                region,
+                content_type,
+                policy_source,
+                query_vector=query_vector
+            )
+            allowed_ids = None
+        else:
+            catalog = self.catalog()
+            vector_results, allowed_ids = self._weaviate_candidates(
+                query,
+                limit,
+                catalog,
+                region,
+                content_type,
+                policy_source,
+                query_vector
+            )
+        
+        if not vector_results:
+            return []
         
+        results = []
+        for chunk in vector_results:
+            chunk_id = chunk["chunk_id"]
+            if allowed_ids is not None and chunk_id not in allowed_ids:
+                continue
+            
+            distance = chunk["_additional"]["distance"]
+            score = 1 / (1 + distance)
+            
+            result = RetrievalResult(
+                chunk_id=chunk_id,
+                chunk_text=chunk.get("chunk_text", ""),
+                policy_section=chunk.get("policy_section", ""),
+                policy_path=chunk.get("policy_path", ""),
+                policy_section_level=chunk["policy_section_level"],
+                doc_id=chunk.get("doc_id", ""),
+                doc_url=chunk.get("doc_url", ""),
+                policy_source=chunk.get("policy_source", ""),
+                region=chunk.get("region", ""),
+                content_type=chunk.get("content_type", ""),
+                score=score
+            )
+            results.append(result)
+        
+        results = self.rerank_by_hierarchy(results, prefer_specific=prefer_specific)
+        
+        # Grouping by parent already collapses split paragraphs of a section
+        if mode == "hierarchical":
+            return self.expand_to_parents(results, limit)
+        
+        # Fewer near-duplicate paragraphs of one section reach the prompt
+        if self.diversity == "mmr":
+            results = self.diversify(results, limit, catalog)
+        
+        if self.two_phase and self.backend == "weaviate":
+            return self._hydrate_top(results, limit)
+        
+        return results[:limit]
+    
+    def _weaviate_candidates(
+        self,
+        query: str,
+        limit: int,
+        catalog,
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None,
+        query_vector: Optional[np.ndarray] = None
+    ) -> Tuple[List[Dict], Optional[Set[str]]]:
+        """Weaviate hits and the ids among them passing the filters (None when nothing needs checking)."""
+        has_filters = bool(region or content_type or policy_source)
+        fetch_limit = self.candidate_limit(limit, region, content_type, policy_source)
+        # Encoded once for the first page and any widening pages
+        if query_vector is None:
+            query_vector = self.encode_query(query)
+        
+        fields = self._search_fields(catalog)
         vector_results = self.vector_search(
             query=query,
-            limit=overfetch_limit
+            limit=fetch_limit,
+            fields=fields,
+            query_vector=query_vector
         )
         
         if not vector_results:
-            return []
+            return [], None
         
-        chunk_ids = [chunk["chunk_id"] for chunk in vector_results]
+        # Only the candidates are checked, so the filter query's cost follows
+        # fetch_limit rather than the corpus size
+        allowed_ids = self._allowed_among(vector_results, catalog, region, content_type, policy_source)
+        
+        # Filters more selective than estimated: widen with the next page of hits until
+        # `limit` candidates pass, the index is exhausted or the candidate cap is reached
+        while (
+            has_filters
+            and self.adaptive_overfetch
+            and len(vector_results) == fetch_limit
+            and fetch_limit < OVERFETCH_MAX_CANDIDATES
+            and sum(chunk["chunk_id"] in allowed_ids for chunk in vector_results) < limit
+        ):
+            next_limit = min(int(fetch_limit * OVERFETCH_GROWTH), OVERFETCH_MAX_CANDIDATES)
+            more = self.vector_search(
+                query=query,
+                limit=next_limit - fetch_limit,
+                fields=fields,
+                offset=fetch_limit,
+                query_vector=query_vector
+            )
+            if not more:
+                break
+            allowed_ids |= self._allowed_among(more, catalog, region, content_type, policy_source)
+            vector_results = vector_results + more
+            fetch_limit = next_limit
         
+        return vector_results, allowed_ids
+    
+    def _allowed_among(
+        self,
+        vector_results: List[Dict],
+        catalog,
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None
+    ) -> Optional[Set[str]]:
+        """Candidate ids passing the filters (and still in Postgres); None when nothing needs checking."""
+        chunk_ids = [chunk["chunk_id"] for chunk in vector_results]
+        if catalog is not None:
+            return catalog.filter(chunk_ids, region, content_type, policy_source)
+        if region or content_type or policy_source or not self.two_phase:
+            return self._filter_candidates(chunk_ids, region, content_type, policy_source)
+        # Unfiltered two-phase: hydration itself confirms the chunks exist
+        return None
+    
+    def _filter_candidates(
+        self,
+        chunk_ids: List[str],
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None
+    ) -> Set[str]:
         db = SessionLocal()
         try:
             sql_results = self.sql_filter(
@@ -144,36 +745,7 @@ class HybridRetriever:
                 content_type=content_type,
                 policy_source=policy_source
             )
-            
-            sql_chunk_map = {str(chunk.chunk_id): chunk for chunk in sql_results}
-            
-            results = []
-            for chunk in vector_results:
-                chunk_id = chunk["chunk_id"]
-                if chunk_id not in sql_chunk_map:
-                    continue
-                
-                distance = chunk["_additional"]["distance"]
-                score = 1 / (1 + distance)
-                
-                result = RetrievalResult(
-                    chunk_id=chunk_id,
-                    chunk_text=chunk["chunk_text"],
-                    policy_section=chunk["policy_section"],
-                    policy_path=chunk["policy_path"],
-                    policy_section_level=chunk["policy_section_level"],
-                    doc_id=chunk["doc_id"],
-                    doc_url=chunk.get("doc_url", ""),
-                    policy_source=chunk["policy_source"],
-                    region=chunk["region"],
-                    content_type=chunk["content_type"],
-                    score=score
-                )
-                results.append(result)
-            
-            results = self.rerank_by_hierarchy(results, prefer_specific=prefer_specific)
-            
-            return results[:limit]
+            return {str(chunk.chunk_id) for chunk in sql_results}
         finally:
             db.close()
     
@@ -198,7 +770,9 @@ def retrieve_policy_chunks(
     region: Optional[str] = None,
     content_type: Optional[str] = None,
     policy_source: Optional[str] = None,
-    prefer_specific: bool = True
+    prefer_specific: bool = True,
+    mode: Optional[str] = None,
+    query_vector: Optional[np.ndarray] = None
 ) -> List[Dict]:
     retriever = get_retriever()
     
@@ -208,7 +782,9 @@ def retrieve_policy_chunks(
         region=region,
         content_type=content_type,
         policy_source=policy_source,
-        prefer_specific=prefer_specific
+        prefer_specific=prefer_specific,
+        mode=mode,
+        query_vector=query_vector
     )
     
     return [result.to_dict() for result in results]
@@ -26,6 +26,8 @@ class PolicyResponse:
     refusal_reason: Optional[str] = None
     latency_ms: Optional[float] = None
     num_tokens_generated: Optional[int] = None
+    finish_reason: Optional[str] = None
+    stage_timings_ms: Dict[str, float] = field(default_factory=dict)
     
     def to_dict(self) -> Dict:
         response = {
@@ -43,4 +45,7 @@ class PolicyResponse:
         if self.num_tokens_generated is not None:
             response["num_tokens_generated"] = self.num_tokens_generated
         
+        if self.finish_reason:
+            response["finish_reason"] = self.finish_reason
+        
         return response
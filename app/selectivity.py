@@ -0,0 +1,61 @@
+import os
+import math
+from typing import Dict, Optional
+
+# Size the Weaviate overfetch from filter selectivity instead of a fixed limit * 3
+ADAPTIVE_OVERFETCH = os.getenv("ADAPTIVE_OVERFETCH", "true").lower() == "true"
+# Candidates per result without filters: enough for reranking, diversification and backfill
+OVERFETCH_UNFILTERED_FACTOR = float(os.getenv("OVERFETCH_UNFILTERED_FACTOR", "2"))
+# Margin over the expected number of candidates needed to find `limit` that pass the filters
+OVERFETCH_SAFETY = float(os.getenv("OVERFETCH_SAFETY", "1.5"))
+# Upper bound on candidates fetched per query, across all widening rounds
+OVERFETCH_MAX_CANDIDATES = int(os.getenv("OVERFETCH_MAX_CANDIDATES", "500"))
+# Each widening round multiplies the candidates fetched so far by this
+OVERFETCH_GROWTH = float(os.getenv("OVERFETCH_GROWTH", "4"))
+# Used when the active index has no recorded statistics
+DEFAULT_OVERFETCH_FACTOR = 3
+
+
+class FilterSelectivity:
+    """Share of the indexed chunks matching each filter value, recorded at index build time.
+
+    Filters on different columns are treated as independent, so the
+    selectivity of a combination is the product of the per-column shares.
+    Values missing from the statistics (no chunk had them at build time) get
+    one chunk's share rather than zero.
+    """
+
+    def __init__(self, counts: Dict[str, Dict[str, int]]):
+        self.counts = counts
+        self.total = max((sum(values.values()) for values in counts.values()), default=0)
+
+    def fraction(
+        self,
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None
+    ) -> float:
+        if self.total == 0:
+            return 1.0
+        fraction = 1.0
+        for column, value in (("region", region), ("content_type", content_type), ("policy_source", policy_source)):
+            if value:
+                count = self.counts.get(column, {}).get(value.strip().lower(), 0)
+                fraction *= max(count, 1) / self.total
+        return fraction
+
+
+def overfetch_limit(
+    limit: int,
+    has_filters: bool,
+    fraction: Optional[float] = None,
+    max_candidates: int = OVERFETCH_MAX_CANDIDATES
+) -> int:
+    """Candidates to request so that about `limit` survive filters with selectivity `fraction`."""
+    if not has_filters:
+        wanted = limit * OVERFETCH_UNFILTERED_FACTOR
+    elif fraction is None:
+        wanted = limit * DEFAULT_OVERFETCH_FACTOR
+    else:
+        wanted = limit * OVERFETCH_SAFETY / max(fraction, 1e-9)
+    return max(limit, min(math.ceil(wanted), max_candidates))
@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.models import PolicySource, Region, ContentType
+
+CORPUS_SNAPSHOT_DIR = Path(os.getenv(
+    "CORPUS_SNAPSHOT_DIR",
+    str(Path(__file__).parent.parent / "data" / "snapshots")
+))
+
+MAGIC = b"PRAGSNAP"
+FORMAT_VERSION = 1
+# Section alignment: every array starts on a cache line, and float32 rows stay aligned
+_ALIGN = 64
+
+_ENUMS = {"policy_source": PolicySource, "region": Region, "content_type": ContentType}
+# Low-cardinality strings, stored as uint32 codes into a per-file dictionary
+_DICTIONARY_COLUMNS = ("policy_section", "policy_path", "policy_section_level", "doc_id", "doc_url")
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def snapshot_path(corpus_version: str, directory: Path = CORPUS_SNAPSHOT_DIR) -> Path:
+    return directory / f"corpus_{corpus_version}.snap"
+
+
+class SnapshotWriter:
+    """Builds one snapshot file; chunks must be added in ascending chunk_id order.
+
+    Layout: MAGIC, a little-endian uint64 header length, a JSON header, then
+    64-byte aligned sections:
+
+        vectors        float32 (count, dimension)
+        chunk_ids      16-byte UUIDs, sorted: the chunk_id -> row index
+        text_offsets   uint64 (count + 1) into text_blob
+        text_blob      UTF-8 chunk texts, concatenated
+        <enum>         uint8 codes into header["enums"][<enum>]
+        <dictionary>   uint32 codes into header["dictionaries"][<dictionary>]
+    """
+
+    def __init__(self, corpus_version: str, count: int, dimension: int):
+        self.corpus_version = corpus_version
+        self.count = count
+        self.vectors = np.zeros((count, dimension), dtype=np.float32)
+        self.chunk_ids = np.zeros(count, dtype="S16")
+        self.text_offsets = np.zeros(count + 1, dtype=np.uint64)
+        self._texts = bytearray()
+        self._enums = {name: np.zeros(count, dtype=np.uint8) for name in _ENUMS}
+        self._codes = {name: np.zeros(count, dtype=np.uint32) for name in _DICTIONARY_COLUMNS}
+        self._dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in _DICTIONARY_COLUMNS}
+        self._added = 0
+        self._last_key = b""
+
+    def add(self, chunk_id: str, vector, metadata: Dict):
+        """metadata: chunk_text plus the enum and dictionary columns, as strings or enum members."""
+        row = self._added
+        if row >= self.count:
+            raise ValueError(f"Snapshot sized for {self.count} chunks")
+        key = uuid.UUID(str(chunk_id)).bytes
+        if key <= self._last_key:
+            raise ValueError(f"chunk_ids must be added in ascending order; {chunk_id} is out of order")
+
+        self._last_key = key
+        self.chunk_ids[row] = key
+        self.vectors[row] = vector
+        self._texts += metadata["chunk_text"].encode("utf-8")
+        self.text_offsets[row + 1] = len(self._texts)
+        for name, enum_cls in _ENUMS.items():
+            self._enums[name][row] = list(enum_cls).index(enum_cls(metadata[name]))
+        for name in _DICTIONARY_COLUMNS:
+            value = metadata[name] or ""
+            self._codes[name][row] = self._dictionaries[name].setdefault(value, len(self._dictionaries[name]))
+        self._added += 1
+
+    def write(self, path: Path) -> Path:
+        if self._added != self.count:
+            raise ValueError(f"Snapshot sized for {self.count} chunks, got {self._added}")
+
+        sections = [
+            ("vectors", self.vectors),
+            ("chunk_ids", self.chunk_ids),
+            ("text_offsets", self.text_offsets),
+            ("text_blob", np.frombuffer(bytes(self._texts), dtype=np.uint8)),
+        ]
+        sections += list(self._enums.items()) + list(self._codes.items())
+
+        layout, offset = {}, 0
+        for name, array in sections:
+            layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset = _aligned(offset + array.nbytes)
+
+        header = json.dumps({
+            "format": FORMAT_VERSION,
+            "corpus_version": self.corpus_version,
+            "count": self.count,
+            "dimension": self.vectors.shape[1],
+            "created_at": time.time(),
+            "sections": layout,
+            "enums": {name: [member.value for member in enum_cls] for name, enum_cls in _ENUMS.items()},
+            "dictionaries": {name: list(values) for name, values in self._dictionaries.items()},
+        }).encode("utf-8")
+        data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(header)).astype("<u8").tobytes())
+            f.write(header)
+            for name, array in sections:
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+        # Readers only ever see complete files; an existing snapshot is never modified
+        os.replace(tmp_path, path)
+        return path
+
+
+class CorpusSnapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Nothing is copied at open: every column is a view into one read-only
+    mmap, so workers on the same host share the page cache instead of each
+    holding the corpus. Exposes the same filter/hydrate interface as
+    ChunkCatalog, plus the vector matrix in chunk_id order.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a corpus snapshot")
+        header_length = int(self._buffer[len(MAGIC):len(MAGIC) + 8].view("<u8")[0])
+        header_start = len(MAGIC) + 8
+        self.header = json.loads(bytes(self._buffer[header_start:header_start + header_length]))
+        if self.header["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {self.header['format']} in {path}")
+
+        data_start = _aligned(header_start + header_length)
+        self._sections = {}
+        for name, section in self.header["sections"].items():
+            dtype = np.dtype(section["dtype"])
+            start = data_start + section["offset"]
+            nbytes = int(np.prod(section["shape"])) * dtype.itemsize
+            self._sections[name] = self._buffer[start:start + nbytes].view(dtype).reshape(section["shape"])
+
+        self.version = self.header["corpus_version"]
+        self.vectors = self._sections["vectors"]
+        self._chunk_ids = self._sections["chunk_ids"]
+        self._enum_values = self.header["enums"]
+        self._dictionaries = self.header["dictionaries"]
+
+    def __len__(self) -> int:
+        return self.header["count"]
+
+    def _rows(self, chunk_ids: List[str]) -> Tuple[List[str], np.ndarray]:
+        """(known chunk_ids, their rows), via binary search on the sorted id column."""
+        keys, valid = [], []
+        for chunk_id in chunk_ids:
+            try:
+                keys.append(uuid.UUID(chunk_id).bytes)
+                valid.append(chunk_id)
+            except ValueError:
+                continue
+        if not keys or len(self) == 0:
+            return [], np.zeros(0, dtype=np.int64)
+
+        keys = np.asarray(keys, dtype="S16")
+        rows = np.searchsorted(self._chunk_ids, keys)
+        rows = np.minimum(rows, len(self) - 1)
+        found = self._chunk_ids[rows] == keys
+        return [chunk_id for chunk_id, hit in zip(valid, found) if hit], rows[found]
+
+    def _enum_code(self, name: str, value: str) -> int:
+        member = _ENUMS[name](value.strip().lower())
+        values = self._enum_values[name]
+        # A member added after this snapshot was written matches nothing in it
+        return values.index(member.value) if member.value in values else -1
+
+    def filter(
+        self,
+        chunk_ids: List[str],
+        region: Optional[str] = None,
+        content_type: Optional[str] = None,
+        policy_source: Optional[str] = None
+    ) -> Set[str]:
+        known, rows = self._rows(chunk_ids)
+        mask = np.ones(len(rows), dtype=bool)
+        for name, value in (("region", region), ("content_type", content_type), ("policy_source", policy_source)):
+            if value:
+                mask &= self._sections[name][rows] == self._enum_code(name, value)
+        return {chunk_id for chunk_id, keep in zip(known, mask) if keep}
+
+    def vectors_for(self, chunk_ids: List[str]) -> Dict[str, np.ndarray]:
+        """Embedding rows (views, not copies) for the chunk_ids in the snapshot."""
+        known, rows = self._rows(chunk_ids)
+        return {chunk_id: self.vectors[row] for chunk_id, row in zip(known, rows)}
+
+    def text(self, row: int) -> str:
+        offsets = self._sections["text_offsets"]
+        return bytes(self._sections["text_blob"][int(offsets[row]):int(offsets[row + 1])]).decode("utf-8")
+
+    def hydrate(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        known, rows = self._rows(chunk_ids)
+        hydrated = {}
+        for chunk_id, row in zip(known, rows):
+            fields = {"chunk_text": self.text(row)}
+            for name in _DICTIONARY_COLUMNS:
+                fields[name] = self._dictionaries[name][self._sections[name][row]]
+            for name in _ENUMS:
+                fields[name] = self._enum_values[name][self._sections[name][row]]
+            hydrated[chunk_id] = fields
+        # Input order, like ChunkCatalog.hydrate
+        return {chunk_id: hydrated[chunk_id] for chunk_id in chunk_ids if chunk_id in hydrated}
+
+
+def open_snapshot(corpus_version: str, directory: Path = CORPUS_SNAPSHOT_DIR) -> Optional[CorpusSnapshot]:
+    path = snapshot_path(corpus_version, directory)
+    return CorpusSnapshot(path) if path.exists() else None
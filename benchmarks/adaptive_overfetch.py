@@ -0,0 +1,93 @@
+"""
+Fixed limit * 3 overfetch vs. selectivity-based overfetch with widening.
+
+For each filter combination every canonical question is retrieved with
+ADAPTIVE_OVERFETCH off (always limit * 3 candidates) and on (first round
+sized from the filter statistics recorded for the active index, then widened
+until `limit` candidates pass). Reported per combination and mode:
+
+    est        selectivity estimated from the recorded statistics
+    short      share of queries returning fewer than `limit` results
+    results    mean results returned
+    cands      mean Weaviate candidates fetched per query
+    rounds     mean Weaviate queries per query
+    p50/p95    retrieve() latency, ms
+
+    python -m benchmarks.adaptive_overfetch --limit 5 --repeats 3
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.retrieval import get_retriever
+from ingestion.precompute_answers import load_questions
+from benchmarks.replay_queries import percentile
+
+QUESTIONS_FILE = Path(__file__).parent.parent / "data" / "canonical_questions.txt"
+
+FILTERS = [
+    {},
+    {"region": "global"},
+    {"region": "uk"},
+    {"content_type": "video"},
+    {"region": "uk", "content_type": "video"},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=Path, default=QUESTIONS_FILE)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    retriever = get_retriever()
+    selectivity = retriever.filter_selectivity()
+    if selectivity is None:
+        print("No filter statistics recorded for the active index; adaptive mode falls back to limit * 3\n")
+
+    search = retriever.vector_search
+    calls = []
+
+    def _counting_search(*call_args, **kwargs):
+        hits = search(*call_args, **kwargs)
+        calls.append(len(hits))
+        return hits
+
+    retriever.vector_search = _counting_search
+
+    print(f"{len(questions)} questions x {args.repeats}, limit {args.limit}\n")
+    print(f"{'filters':<28} {'mode':<8} {'est':>6} {'short':>6} {'results':>7} {'cands':>7} {'rounds':>6} {'p50_ms':>8} {'p95_ms':>8}")
+    for filters in FILTERS:
+        label = ",".join(f"{k}={v}" for k, v in filters.items()) or "none"
+        estimate = selectivity.fraction(**filters) if selectivity else float("nan")
+        for adaptive in (False, True):
+            retriever.adaptive_overfetch = adaptive
+            counts, candidates, rounds, latencies = [], [], [], []
+            for _ in range(args.repeats):
+                for question in questions:
+                    calls.clear()
+                    start = time.perf_counter()
+                    results = retriever.retrieve(question, limit=args.limit, **filters)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    counts.append(len(results))
+                    candidates.append(sum(calls))
+                    rounds.append(len(calls))
+
+            latencies.sort()
+            short = sum(1 for count in counts if count < args.limit) / len(counts)
+            print(
+                f"{label:<28} {'adaptive' if adaptive else 'fixed':<8} {estimate:>6.3f} {short:>6.2f} "
+                f"{statistics.mean(counts):>7.2f} {statistics.mean(candidates):>7.1f} {statistics.mean(rounds):>6.2f} "
+                f"{percentile(latencies, 50):>8.2f} {percentile(latencies, 95):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
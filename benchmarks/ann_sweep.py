@@ -0,0 +1,234 @@
+"""
+Sweep HNSW parameters and report recall against exact search, query latency and memory.
+
+Every combination of --ef, --ef-construction and --max-connections becomes a
+VectorIndexConfig, is built on the chosen backend and queried with the same
+vectors as an exact NumPy search:
+
+    weaviate  a scratch class (AnnSweep) on WEAVIATE_URL, deleted afterwards;
+              memory is estimated from the HNSW layout Weaviate uses
+    local     in-process hnswlib (pip install hnswlib), the same algorithm with
+              the same parameters; memory is the serialized index size
+
+Vectors are the embedded chunk corpus (queries: data/canonical_questions.txt)
+or, with --synthetic N, N clustered random vectors, which is how to size a
+deployment far larger than the current corpus.
+
+    python -m benchmarks.ann_sweep --backend local --synthetic 200000 \\
+        --ef 32 64 128 --ef-construction 64 128 --max-connections 16 32 64
+
+    # Weaviate PQ compression (memory column counts PQ codes instead of floats)
+    python -m benchmarks.ann_sweep --backend weaviate --synthetic 200000 --pq-segments 0 96 48
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from ingestion.index_config import VectorIndexConfig
+from benchmarks.replay_queries import percentile
+
+DIMENSION = 384
+SWEEP_CLASS = "AnnSweep"
+QUESTIONS_FILE = Path(__file__).parent.parent / "data" / "canonical_questions.txt"
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic_vectors(n: int, n_queries: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Gaussian clusters on the unit sphere, roughly how topic-grouped chunk embeddings sit."""
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.standard_normal((max(n // 500, 8), DIMENSION)))
+
+    def _sample(count):
+        # Noise of norm ~1.5 around unit-norm centres: clusters overlap, as real topics do
+        noise = rng.standard_normal((count, DIMENSION)) * (1.5 / np.sqrt(DIMENSION))
+        points = centers[rng.integers(0, len(centers), count)] + noise
+        return normalize(points).astype(np.float32)
+
+    return _sample(n), _sample(n_queries)
+
+
+def corpus_vectors() -> Tuple[np.ndarray, np.ndarray]:
+    from sentence_transformers import SentenceTransformer
+    from ingestion.embed import EMBEDDING_MODEL, generate_embeddings
+    from ingestion.precompute_answers import load_questions
+    from benchmarks.embedding_throughput import load_chunk_texts
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    base = generate_embeddings(load_chunk_texts(), model)
+    queries = generate_embeddings(load_questions(QUESTIONS_FILE), model)
+    return normalize(base).astype(np.float32), normalize(queries).astype(np.float32)
+
+
+def exact_top_k(base: np.ndarray, queries: np.ndarray, k: int, distance: str) -> np.ndarray:
+    if distance == "l2-squared":
+        scores = -(
+            (queries ** 2).sum(axis=1, keepdims=True) - 2 * queries @ base.T + (base ** 2).sum(axis=1)
+        )
+    else:
+        scores = queries @ base.T
+        if distance == "cosine":
+            scores = scores / np.linalg.norm(base, axis=1)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return top
+
+
+def effective_ef(config: VectorIndexConfig, k: int) -> int:
+    """Weaviate's dynamic ef (ef=-1): limit * 8, clamped to [100, 500]."""
+    return config.ef if config.ef > 0 else min(max(k * 8, 100), 500)
+
+
+def estimated_hnsw_mb(n: int, config: VectorIndexConfig) -> float:
+    """Vectors (or PQ codes) plus layer-0 links, which dominate the graph; 8-byte ids as in Weaviate."""
+    vector_bytes = config.pq_segments if config.pq_enabled else DIMENSION * 4
+    link_bytes = 2 * config.max_connections * 8
+    return n * (vector_bytes + link_bytes) / (1024 * 1024)
+
+
+class LocalBackend:
+    SPACES = {"cosine": "cosine", "dot": "ip", "l2-squared": "l2"}
+
+    def __init__(self):
+        import hnswlib
+        self._hnswlib = hnswlib
+
+    def build(self, base: np.ndarray, config: VectorIndexConfig, k: int) -> float:
+        if config.pq_enabled:
+            raise ValueError("hnswlib has no PQ; use benchmarks.quantization for local compression")
+        self.index = self._hnswlib.Index(space=self.SPACES[config.distance], dim=base.shape[1])
+        self.index.init_index(
+            max_elements=len(base),
+            ef_construction=config.ef_construction,
+            M=config.max_connections
+        )
+        self.index.add_items(base, np.arange(len(base)))
+        self.index.set_ef(effective_ef(config, k))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.bin")
+            self.index.save_index(path)
+            return os.path.getsize(path) / (1024 * 1024)
+
+    def search(self, query: np.ndarray, k: int) -> List[int]:
+        labels, _ = self.index.knn_query(query, k=k)
+        return labels[0].tolist()
+
+    def close(self):
+        self.index = None
+
+
+class WeaviateBackend:
+    def __init__(self):
+        from ingestion.embed import get_weaviate_client
+        self.client = get_weaviate_client()
+
+    def build(self, base: np.ndarray, config: VectorIndexConfig, k: int) -> float:
+        from ingestion.embed import enable_pq
+
+        if self.client.schema.exists(SWEEP_CLASS):
+            self.client.schema.delete_class(SWEEP_CLASS)
+        schema = {"class": SWEEP_CLASS, "vectorizer": "none", "properties": [{"name": "row", "dataType": ["int"]}]}
+        schema.update(config.to_weaviate())
+        self.client.schema.create_class(schema)
+
+        with self.client.batch as batch:
+            batch.batch_size = 500
+            for row, vector in enumerate(base):
+                batch.add_data_object({"row": row}, SWEEP_CLASS, uuid=str(uuid.UUID(int=row)), vector=vector)
+
+        if config.pq_enabled:
+            enable_pq(self.client, SWEEP_CLASS, config)
+        return estimated_hnsw_mb(len(base), config)
+
+    def search(self, query: np.ndarray, k: int) -> List[int]:
+        result = self.client.query.get(SWEEP_CLASS, ["row"]).with_near_vector(
+            {"vector": query.tolist()}
+        ).with_limit(k).do()
+        return [obj["row"] for obj in result["data"]["Get"][SWEEP_CLASS]]
+
+    def close(self):
+        self.client.schema.delete_class(SWEEP_CLASS)
+
+
+def evaluate(backend, base: np.ndarray, queries: np.ndarray, config: VectorIndexConfig, k: int) -> Dict:
+    truth = exact_top_k(base, queries, k, config.distance)
+
+    start = time.perf_counter()
+    memory_mb = backend.build(base, config, k)
+    build_s = time.perf_counter() - start
+
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = backend.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found) & set(expected.tolist())) / k)
+    latencies.sort()
+
+    return {
+        "build_s": build_s,
+        "recall": float(np.mean(recalls)),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "memory_mb": memory_mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["local", "weaviate"], default="local")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the corpus")
+    parser.add_argument("--queries", type=int, default=200, help="Synthetic queries")
+    parser.add_argument("--k", type=int, default=15, help="Neighbours per query (retrieve() overfetches limit * 3)")
+    parser.add_argument("--distance", default="cosine")
+    parser.add_argument("--ef", type=int, nargs="+", default=[-1, 64, 128])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[128])
+    parser.add_argument("--max-connections", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--pq-segments", type=int, nargs="+", default=[0], help="0 disables PQ (weaviate backend only)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        base, queries = synthetic_vectors(args.synthetic, args.queries)
+    else:
+        base, queries = corpus_vectors()
+    print(f"{len(base)} vectors, {len(queries)} queries, k={args.k}, backend={args.backend}\n")
+
+    backend = LocalBackend() if args.backend == "local" else WeaviateBackend()
+    print(f"{'M':>4} {'efC':>5} {'ef':>5} {'pq':>4} {'build_s':>8} {'recall':>7} {'p50_ms':>7} {'p95_ms':>7} {'mem_mb':>8}")
+    try:
+        for max_connections, ef_construction, ef, pq_segments in itertools.product(
+            args.max_connections, args.ef_construction, args.ef, args.pq_segments
+        ):
+            config = VectorIndexConfig(
+                distance=args.distance,
+                ef=ef,
+                ef_construction=ef_construction,
+                max_connections=max_connections,
+                pq_enabled=pq_segments > 0,
+                pq_segments=pq_segments
+            )
+            row = evaluate(backend, base, queries, config, args.k)
+            print(
+                f"{max_connections:>4} {ef_construction:>5} {effective_ef(config, args.k):>5} {pq_segments:>4} "
+                f"{row['build_s']:>8.1f} {row['recall']:>7.3f} {row['p50_ms']:>7.2f} "
+                f"{row['p95_ms']:>7.2f} {row['memory_mb']:>8.1f}"
+            )
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
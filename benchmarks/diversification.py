@@ -0,0 +1,106 @@
+"""
+Prompt size and citation coverage with and without result diversification.
+
+Every canonical question is retrieved with RETRIEVAL_DIVERSITY=none (reranked
+score order) and with mmr (at most MAX_CHUNKS_PER_SECTION chunks per
+policy_path, MMR ordering, near-duplicates dropped), then answered by Ollama
+from the resulting prompt. Reported per mode, as means over questions:
+
+    sources     chunks in the prompt
+    sections    distinct policy_paths in the prompt
+    prompt_tok  Ollama prompt_eval_count (prefill tokens)
+    answered    share of answers that are not refused and pass citation validation
+    cited       distinct policy_paths cited by the answer
+    coverage    share of the sections cited by the `none` answer that this
+                mode's answer also cites (1.0 for `none` itself)
+    in_prompt   share of the sections in the `none` prompt still in this prompt
+
+--no-generate skips Ollama and reports prompt characters instead of tokens.
+
+    python -m benchmarks.diversification --limit 5 --max-tokens 256
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from typing import Dict, List, Set
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.retrieval import get_retriever, retrieve_policy_chunks
+from app.generation import build_prompt, get_llm, stream_generate, REFUSE_TOKEN
+from app.citations import extract_citations, validate_citations
+from ingestion.precompute_answers import load_questions
+
+QUESTIONS_FILE = Path(__file__).parent.parent / "data" / "canonical_questions.txt"
+MODES = ("none", "mmr")
+
+
+def _share(part: Set[str], whole: Set[str]) -> float:
+    return len(part & whole) / len(whole) if whole else 1.0
+
+
+def run_question(question: str, mode: str, args, llm) -> Dict:
+    get_retriever().diversity = mode
+    results = retrieve_policy_chunks(question, limit=args.limit)
+    prompt = build_prompt(question, results)
+    sections = {r["policy_path"] for r in results}
+    row = {"sources": len(results), "sections": sections, "prompt_chars": len(prompt), "cited": set()}
+    if llm is None or not results:
+        return row
+
+    generation = stream_generate(llm, prompt, max_tokens=args.max_tokens)
+    row["prompt_tok"] = generation.prompt_eval_count
+    cited_ids = extract_citations(generation.text)
+    answered = (
+        generation.finish_reason != "refuse"
+        and generation.text.strip() != REFUSE_TOKEN
+        and validate_citations(cited_ids, {r["chunk_id"] for r in results})
+    )
+    row["answered"] = answered
+    if answered:
+        path_by_id = {r["chunk_id"]: r["policy_path"] for r in results}
+        row["cited"] = {path_by_id[chunk_id] for chunk_id in cited_ids}
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=Path, default=QUESTIONS_FILE)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--no-generate", action="store_true")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    llm = None if args.no_generate else get_llm()
+    rows: Dict[str, List[Dict]] = {mode: [] for mode in MODES}
+    for question in questions:
+        for mode in MODES:
+            rows[mode].append(run_question(question, mode, args, llm))
+
+    size = "prompt_chars" if args.no_generate else "prompt_tok"
+    print(f"{len(questions)} questions, limit {args.limit}\n")
+    print(f"{'mode':<6} {'sources':>7} {'sections':>8} {size:>12} {'answered':>8} {'cited':>6} {'coverage':>8} {'in_prompt':>9}")
+    baseline = rows["none"]
+    for mode in MODES:
+        mode_rows = rows[mode]
+        sizes = [row[size] for row in mode_rows if row.get(size) is not None]
+        answered = [row["answered"] for row in mode_rows if "answered" in row]
+        coverage = [_share(row["cited"], base["cited"]) for row, base in zip(mode_rows, baseline) if base["cited"]]
+        in_prompt = [_share(row["sections"], base["sections"]) for row, base in zip(mode_rows, baseline)]
+
+        def _mean(values, fmt):
+            return format(statistics.mean(values), fmt) if values else "n/a"
+
+        print(
+            f"{mode:<6} {_mean([row['sources'] for row in mode_rows], '.2f'):>7} "
+            f"{_mean([len(row['sections']) for row in mode_rows], '.2f'):>8} {_mean(sizes, '.0f'):>12} "
+            f"{_mean(answered, '.2f'):>8} {_mean([len(row['cited']) for row in mode_rows], '.2f'):>6} "
+            f"{_mean(coverage, '.2f'):>8} {_mean(in_prompt, '.2f'):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
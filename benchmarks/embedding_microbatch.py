@@ -0,0 +1,155 @@
+"""
+Query encoding throughput with and without the embedding micro-batcher.
+
+At each --concurrency level that many threads encode canonical questions
+closed-loop for --duration seconds, as concurrent API requests would:
+
+    per-query    every thread calls model.encode(query) itself (the old path)
+    batch/W      one MicroBatcher shared by all threads, max wait W ms
+    socket/W     the same through app.embedding_service over a Unix socket
+                 (--socket), i.e. a separate process shared by API workers
+
+Reported: queries/s, gain over per-query at the same concurrency, latency
+p50/p95 and the mean number of queries per model.encode call.
+
+    python -m benchmarks.embedding_microbatch --concurrency 1 4 16 64 --max-wait-ms 0 2 5 --socket
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+import numpy as np
+
+from app.embedding_service import MicroBatcher, SocketEncoder, model_batch_encoder
+from benchmarks.replay_queries import percentile
+
+QUESTIONS_FILE = ROOT / "data" / "canonical_questions.txt"
+
+
+def drive(encode: Callable[[str], np.ndarray], questions: List[str], concurrency: int, duration_s: float) -> Dict:
+    deadline = time.monotonic() + duration_s
+    latencies = []
+    lock = threading.Lock()
+
+    def _client(offset: int):
+        i = offset
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            encode(questions[i % len(questions)])
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+            i += 1
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(_client, range(concurrency)))
+    elapsed = time.monotonic() - start
+
+    latencies.sort()
+    return {"qps": len(latencies) / elapsed, "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95)}
+
+
+def start_service(socket_path: str, max_batch_size: int, max_wait_ms: float) -> subprocess.Popen:
+    service = subprocess.Popen(
+        [
+            sys.executable, "-m", "app.embedding_service",
+            "--socket", socket_path,
+            "--max-batch-size", str(max_batch_size),
+            "--max-wait-ms", str(max_wait_ms),
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 300
+    while not os.path.exists(socket_path):
+        if service.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("Embedding service did not start")
+        time.sleep(0.5)
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[0, 2])
+    parser.add_argument("--socket", action="store_true", help="Also measure the socket service")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    from app.retrieval import EMBEDDING_MODEL
+    from ingestion.precompute_answers import load_questions
+
+    questions = load_questions(QUESTIONS_FILE)
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    model.encode(questions[:8])
+
+    batch_sizes: List[int] = []
+    encode_batch = model_batch_encoder(model, args.max_batch_size)
+
+    def _counted(texts):
+        batch_sizes.append(len(texts))
+        return encode_batch(texts)
+
+    modes = [("per-query", lambda: model.encode, None)]
+    for wait in args.max_wait_ms:
+        modes.append((
+            f"batch/{wait:g}",
+            lambda wait=wait: MicroBatcher(_counted, args.max_batch_size, wait).encode,
+            None
+        ))
+        if args.socket:
+            modes.append((f"socket/{wait:g}", None, wait))
+
+    print(f"{len(questions)} questions, {args.duration:.0f}s per run, max batch {args.max_batch_size}\n")
+    print(f"{'mode':<12} {'conc':>5} {'qps':>8} {'gain':>6} {'p50_ms':>8} {'p95_ms':>8} {'batch':>6}")
+
+    services = {}
+    try:
+        for concurrency in args.concurrency:
+            baseline = None
+            for name, make_encoder, socket_wait in modes:
+                if socket_wait is not None:
+                    if socket_wait not in services:
+                        path = os.path.join(tempfile.mkdtemp(), "embed.sock")
+                        services[socket_wait] = (start_service(path, args.max_batch_size, socket_wait), path)
+                    encode = SocketEncoder(services[socket_wait][1]).encode
+                else:
+                    encode = make_encoder()
+                batch_sizes.clear()
+
+                row = drive(encode, questions, concurrency, args.duration)
+
+                if name == "per-query":
+                    batch = 1.0
+                elif batch_sizes:
+                    batch = sum(batch_sizes) / len(batch_sizes)
+                else:
+                    # Batched inside the service process; see its policy_rag_embed_batch_size
+                    batch = float("nan")
+                baseline = baseline or row["qps"]
+                print(
+                    f"{name:<12} {concurrency:>5} {row['qps']:>8.1f} {row['qps'] / baseline:>5.2f}x "
+                    f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {batch:>6.1f}"
+                )
+            print()
+    finally:
+        for service, _ in services.values():
+            service.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Embedding throughput of ingestion/embed.py by number of encoder processes.
+
+Encodes the chunk texts in data/processed_chunks (falling back to PostgreSQL),
+repeated up to --num-texts, with 1 process and then with ParallelEncoder at
+each worker count. Model load and pool start-up are excluded; only encoding
+is timed, so the numbers are what a full rebuild sees once warmed up.
+
+    python -m benchmarks.embedding_throughput --workers 1 2 4 8 16 32
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sentence_transformers import SentenceTransformer
+
+from ingestion.embed import EMBEDDING_MODEL, ParallelEncoder, generate_embeddings
+
+CHUNKS_DIR = Path(__file__).parent.parent / "data" / "processed_chunks"
+
+
+def load_chunk_texts() -> List[str]:
+    texts = []
+    for chunk_file in sorted(CHUNKS_DIR.glob("*_chunks.json")):
+        with open(chunk_file, "r", encoding="utf-8") as f:
+            texts.extend(chunk["chunk_text"] for chunk in json.load(f))
+    if texts:
+        return texts
+
+    from db.session import SessionLocal
+    from db.models import PolicyChunk
+
+    db = SessionLocal()
+    try:
+        return [text for (text,) in db.query(PolicyChunk.chunk_text).all()]
+    finally:
+        db.close()
+
+
+def repeat_to(texts: List[str], n: int) -> List[str]:
+    return [texts[i % len(texts)] for i in range(n)]
+
+
+def time_encode(encode, texts: List[str]) -> float:
+    encode(texts[:64])
+    start = time.perf_counter()
+    encode(texts)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--num-texts", type=int, default=4000)
+    args = parser.parse_args()
+
+    corpus = load_chunk_texts()
+    if not corpus:
+        print("No chunks found. Run the chunking pipeline first.")
+        return
+    texts = repeat_to(corpus, args.num_texts)
+    print(f"Encoding {len(texts)} texts ({len(corpus)} distinct) on {os.cpu_count()} cores\n")
+
+    print(f"{'workers':>8} {'threads':>8} {'batch':>6} {'chunks/s':>10} {'speedup':>8}")
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    elapsed = time_encode(lambda t: generate_embeddings(t, model), texts)
+    baseline = len(texts) / elapsed
+    print(f"{1:>8} {'default':>8} {32:>6} {baseline:>10.1f} {1.0:>7.2f}x")
+    del model
+
+    for workers in args.workers:
+        with ParallelEncoder(workers) as encoder:
+            elapsed = time_encode(encoder.encode, texts)
+        rate = len(texts) / elapsed
+        print(
+            f"{workers:>8} {encoder.torch_threads:>8} {encoder.batch_size:>6} "
+            f"{rate:>10.1f} {rate / baseline:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Flat vs. hierarchical (parent-child) retrieval: prompt size, section coverage and latency.
+
+Every canonical question is retrieved in each mode:
+
+    flat          reranked chunks (with RETRIEVAL_DIVERSITY as configured)
+    hierarchical  the same candidates grouped by H2 parent; a parent with
+                  several matched chunks is returned whole (app/hierarchy.py)
+
+Reported per mode, as means over questions:
+
+    results      sources returned
+    expanded     sources that are whole parent sections
+    sections     distinct H2 sections covered
+    prompt       prompt characters (build_prompt), or Ollama prompt_eval_count with --generate
+    answered     share of answers not refused and passing citation validation (--generate)
+    p50/p95      retrieve() latency, ms
+
+The time and size of the parent -> children map load are printed first.
+
+    python -m benchmarks.hierarchical_retrieval --limit 5 --repeats 3
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.retrieval import get_retriever
+from app.hierarchy import SectionHierarchy, RETRIEVAL_MODES
+from app.generation import build_prompt, get_llm, stream_generate, REFUSE_TOKEN
+from app.citations import extract_citations, validate_citations
+from db.session import SessionLocal
+from ingestion.precompute_answers import load_questions
+from benchmarks.replay_queries import percentile
+
+QUESTIONS_FILE = Path(__file__).parent.parent / "data" / "canonical_questions.txt"
+
+
+def count_expanded(retriever, results) -> int:
+    """Sources whose text is longer than their own chunk's, i.e. a whole parent section."""
+    own = retriever.hydrate([result.chunk_id for result in results])
+    return sum(
+        1 for result in results
+        if result.chunk_id in own and len(result.chunk_text) > len(own[result.chunk_id]["chunk_text"])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=Path, default=QUESTIONS_FILE)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--generate", action="store_true", help="Answer with Ollama to report prefill tokens")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    retriever = get_retriever()
+    llm = get_llm() if args.generate else None
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        hierarchy = SectionHierarchy.load(db)
+        load_ms = (time.perf_counter() - start) * 1000
+    finally:
+        db.close()
+    print(f"hierarchy: {len(hierarchy)} chunks in {len(hierarchy.children)} parents, loaded in {load_ms:.0f} ms")
+    print(f"{len(questions)} questions x {args.repeats}, limit {args.limit}\n")
+
+    prompt_label = "prompt_tok" if args.generate else "prompt_chars"
+    print(f"{'mode':<13} {'results':>7} {'expanded':>8} {'sections':>8} {prompt_label:>12} {'answered':>8} {'p50_ms':>8} {'p95_ms':>8}")
+    for mode in RETRIEVAL_MODES:
+        rows: List[Dict] = []
+        latencies = []
+        for repeat in range(args.repeats):
+            for question in questions:
+                start = time.perf_counter()
+                results = retriever.retrieve(question, limit=args.limit, mode=mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if repeat:
+                    continue
+
+                sources = [result.to_dict() for result in results]
+                prompt = build_prompt(question, sources)
+                row = {
+                    "results": len(results),
+                    "expanded": count_expanded(retriever, results),
+                    "sections": len({hierarchy.parent(result.chunk_id) for result in results}),
+                    "prompt": len(prompt),
+                }
+                if llm is not None and sources:
+                    generation = stream_generate(llm, prompt, max_tokens=args.max_tokens)
+                    row["prompt"] = generation.prompt_eval_count
+                    cited_ids = extract_citations(generation.text)
+                    row["answered"] = (
+                        generation.finish_reason != "refuse"
+                        and generation.text.strip() != REFUSE_TOKEN
+                        and validate_citations(cited_ids, {source["chunk_id"] for source in sources})
+                    )
+                rows.append(row)
+
+        def _mean(key, fmt):
+            values = [row[key] for row in rows if row.get(key) is not None]
+            return format(statistics.mean(values), fmt) if values else "n/a"
+
+        latencies.sort()
+        print(
+            f"{mode:<13} {_mean('results', '.2f'):>7} {_mean('expanded', '.2f'):>8} {_mean('sections', '.2f'):>8} "
+            f"{_mean('prompt', '.0f'):>12} {_mean('answered', '.2f'):>8} "
+            f"{percentile(latencies, 50):>8.2f} {percentile(latencies, 95):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Embedding throughput with and without length-bucketed batching.
+
+Runs on the real corpus (data/processed_chunks, falling back to PostgreSQL)
+and on a synthetic skewed corpus: mostly short chunks with a tail of long
+ones, shuffled, which is the shape where database-order batches pad the most.
+
+Three ways of batching the same texts are compared:
+
+    db_order    each consecutive batch of --batch-size encoded on its own
+                (what a streaming pipeline sees without any sorting)
+    char_sort   one model.encode call, which sorts by character count
+    bucketed    app.encoding.encode_length_bucketed (token-count buckets)
+
+    python -m benchmarks.length_bucketing --repeats 3
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.encoding import encode_length_bucketed, length_buckets, padding_fraction, token_lengths
+from ingestion.embed import EMBEDDING_MODEL
+from benchmarks.embedding_throughput import load_chunk_texts
+
+WORDS = "advertisers must not promote alcohol gambling or healthcare products without certification".split()
+
+
+def skewed_corpus(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        words = rng.randint(400, 550) if rng.random() < 0.15 else rng.randint(15, 40)
+        texts.append(" ".join(rng.choice(WORDS) for _ in range(words)))
+    return texts
+
+
+def db_order(model, texts: List[str], batch_size: int) -> np.ndarray:
+    return np.concatenate([
+        model.encode(texts[start:start + batch_size], batch_size=batch_size, show_progress_bar=False)
+        for start in range(0, len(texts), batch_size)
+    ])
+
+
+def char_sort(model, texts: List[str], batch_size: int) -> np.ndarray:
+    return model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+def best_time(fn: Callable, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_corpus(name: str, model, texts: List[str], batch_size: int, repeats: int) -> Dict:
+    lengths = token_lengths(model, texts)
+    in_order = [np.arange(start, min(start + batch_size, len(texts))) for start in range(0, len(texts), batch_size)]
+    print(f"\n{name}: {len(texts)} texts, tokens p50={int(np.median(lengths))} max={int(lengths.max())}")
+    print(f"  padding  db_order={padding_fraction(lengths, in_order):.0%}  "
+          f"bucketed={padding_fraction(lengths, length_buckets(lengths, batch_size)):.0%}")
+
+    strategies = {
+        "db_order": lambda: db_order(model, texts, batch_size),
+        "char_sort": lambda: char_sort(model, texts, batch_size),
+        "bucketed": lambda: encode_length_bucketed(model, texts, batch_size),
+    }
+    strategies["db_order"]()
+    rates = {label: len(texts) / best_time(fn, repeats) for label, fn in strategies.items()}
+    for label, rate in rates.items():
+        print(f"  {label:<10} {rate:>8.1f} texts/s  {rate / rates['db_order']:>5.2f}x")
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--synthetic", type=int, default=2000, help="Texts in the synthetic skewed corpus")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+
+    corpus = load_chunk_texts()
+    if corpus:
+        run_corpus("data/ corpus", model, corpus, args.batch_size, args.repeats)
+    else:
+        print("No chunks found for the real corpus; run the chunking pipeline first.")
+
+    run_corpus("synthetic skewed corpus", model, skewed_corpus(args.synthetic), args.batch_size, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
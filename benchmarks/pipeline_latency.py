@@ -0,0 +1,82 @@
+"""
+End-to-end latency of generate_policy_response with and without prompt-prefix warmup.
+
+Compares the sequential pipeline against one where the Ollama prompt-prefix
+warmup overlaps retrieval. Before each "cold" query the model is unloaded
+(keep_alive=0) so the warmup has something to hide.
+
+Requires PostgreSQL, Weaviate and Ollama to be running.
+
+    python -m benchmarks.pipeline_latency --repeats 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import generation
+from app.llm_pool import get_backend_pool
+
+QUERIES = [
+    ("Can I advertise alcohol?", None),
+    ("What are the requirements for advertising healthcare products?", "global"),
+    ("Can I use trademarked terms in my ad copy?", None),
+    ("cryptocurrency ads rules", "global"),
+]
+
+
+def unload_model():
+    for backend in get_backend_pool().backends:
+        requests.post(
+            f"{backend.url}/api/generate",
+            json={"model": generation.OLLAMA_MODEL, "keep_alive": 0},
+            timeout=30
+        )
+    generation._last_warmup.clear()
+
+
+def run(label: str, overlap: bool, cold: bool, repeats: int) -> list:
+    generation.OLLAMA_PREFIX_WARMUP = overlap
+
+    latencies = []
+    for _ in range(repeats):
+        for query, region in QUERIES:
+            if cold:
+                unload_model()
+            start = time.perf_counter()
+            generation.generate_policy_response(query, limit=5, region=region)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<28} mean={statistics.mean(latencies):8.1f}ms  "
+          f"p50={statistics.median(latencies):8.1f}ms  p95={p95:8.1f}ms")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print("Warming retriever and model...")
+    generation.generate_policy_response(QUERIES[0][0], limit=5)
+    print()
+
+    for cold in (False, True):
+        print("Cold model (unloaded before each query)" if cold else "Warm model")
+        sequential = run("  sequential", overlap=False, cold=cold, repeats=args.repeats)
+        overlapped = run("  overlapped warmup", overlap=True, cold=cold, repeats=args.repeats)
+        reduction = statistics.mean(sequential) - statistics.mean(overlapped)
+        print(f"  mean reduction: {reduction:.1f}ms")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Prompt prefill (prompt_eval) cost for the question_first and prefix_cache layouts.
+
+Each group below is a set of paraphrases answered from the same sources, which is
+the case prefix_cache is built for: instructions and sources form a shared prefix
+that Ollama keeps in its KV cache, so only the question has to be prefilled again.
+
+Requires PostgreSQL, Weaviate and Ollama to be running.
+
+    python -m benchmarks.prompt_layout --max-tokens 16
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.retrieval import retrieve_policy_chunks
+from app.generation import build_prompt, get_llm, stream_generate, PROMPT_LAYOUTS
+
+QUESTION_GROUPS = [
+    [
+        "Can I advertise alcohol?",
+        "Are beer and wine ads allowed?",
+        "What are the rules for promoting alcoholic drinks?",
+    ],
+    [
+        "Can I use trademarked terms in my ad copy?",
+        "Is it allowed to mention another brand's trademark in ads?",
+        "What happens if my ad uses a trademark I don't own?",
+    ],
+    [
+        "What are the requirements for advertising healthcare products?",
+        "Can I promote prescription drugs?",
+        "Are online pharmacy ads permitted?",
+    ],
+]
+
+
+def run_layout(layout: str, groups, max_tokens: int):
+    llm = get_llm()
+    first, repeat = [], []
+    tokens_first, tokens_repeat = [], []
+
+    for questions, sources in groups:
+        for i, question in enumerate(questions):
+            prompt = build_prompt(question, sources, layout=layout)
+            result = stream_generate(llm, prompt, max_tokens=max_tokens)
+            if result.prompt_eval_ms is None:
+                continue
+            (first if i == 0 else repeat).append(result.prompt_eval_ms)
+            (tokens_first if i == 0 else tokens_repeat).append(result.prompt_eval_count or 0)
+
+    def _fmt(values):
+        return f"{statistics.mean(values):8.1f}" if values else "     n/a"
+
+    print(f"{layout:<16} first-in-group prompt_eval={_fmt(first)}ms ({_fmt(tokens_first)} tok)  "
+          f"repeat={_fmt(repeat)}ms ({_fmt(tokens_repeat)} tok)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-tokens", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    # Pin one source set per group so both layouts see identical sources
+    groups = [
+        (questions, retrieve_policy_chunks(questions[0], limit=args.limit))
+        for questions in QUESTION_GROUPS
+    ]
+
+    # Load the model once so neither layout pays for it
+    stream_generate(get_llm(), "Hello", max_tokens=1)
+
+    for layout in PROMPT_LAYOUTS:
+        run_layout(layout, groups, args.max_tokens)
+
+
+if __name__ == "__main__":
+    main()
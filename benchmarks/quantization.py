@@ -0,0 +1,82 @@
+"""
+Memory, recall@k and latency of benchmarks.quantized_index.QuantizedIndex per quantization.
+
+Each row builds the index over the same vectors and compares its top-k with
+an exact float32 search. rescore=1 ranks by the compressed codes alone;
+larger factors rescore that many candidates per result with the float
+vectors, which are memory-mapped from disk and not counted as resident.
+
+Vectors are the embedded chunk corpus or, with --synthetic N, clustered
+random vectors (see benchmarks/ann_sweep.py). For Weaviate's own PQ, run
+the sweep with --pq-segments against a Weaviate backend.
+
+    python -m benchmarks.quantization --synthetic 200000 --rescore 1 4 8
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from benchmarks.quantized_index import QuantizedIndex, PQ_SEGMENTS
+from benchmarks.ann_sweep import corpus_vectors, exact_top_k, synthetic_vectors
+from benchmarks.replay_queries import percentile
+
+
+def evaluate(index: QuantizedIndex, queries: np.ndarray, truth: np.ndarray, k: int):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found, _ = index.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found.tolist()) & set(expected.tolist())) / k)
+    latencies.sort()
+    return float(np.mean(recalls)), percentile(latencies, 50), percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the corpus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--pq-segments", type=int, nargs="+", default=[96, 48])
+    args = parser.parse_args()
+
+    if args.synthetic:
+        base, queries = synthetic_vectors(args.synthetic, args.queries)
+    else:
+        base, queries = corpus_vectors()
+    truth = exact_top_k(base, queries, args.k, "cosine")
+    print(f"{len(base)} vectors, {len(queries)} queries, k={args.k}")
+    print(f"float32 matrix: {base.nbytes / 2 ** 20:.1f} MB\n")
+
+    variants = [("none", 0)] + [("int8", 0)] + [("pq", m) for m in args.pq_segments]
+    print(f"{'method':<8} {'rescore':>7} {'build_s':>8} {'mem_mb':>7} {'recall':>7} {'p50_ms':>7} {'p95_ms':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for quantization, segments in variants:
+            start = time.perf_counter()
+            built = QuantizedIndex(base, quantization=quantization, pq_segments=segments or PQ_SEGMENTS)
+            build_s = time.perf_counter() - start
+            directory = Path(tmp) / f"{quantization}{segments}"
+            built.save(directory)
+
+            name = f"pq{segments}" if quantization == "pq" else quantization
+            for rescore in ([1] if quantization == "none" else args.rescore):
+                index = QuantizedIndex.load(directory)
+                index.rescore_factor = rescore
+                recall, p50, p95 = evaluate(index, queries, truth, args.k)
+                print(
+                    f"{name:<8} {rescore:>7} {build_s:>8.1f} {index.memory_bytes() / 2 ** 20:>7.1f} "
+                    f"{recall:>7.3f} {p50:>7.2f} {p95:>7.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
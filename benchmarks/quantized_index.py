@@ -0,0 +1,193 @@
+"""
+Compressed in-process vector index measured by benchmarks/quantization.py.
+
+Retrieval searches Weaviate or pgvector, so this lives with the benchmarks:
+it measures what int8 or PQ codes with float rescoring would save in memory,
+recall and latency.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+# none | int8 | pq
+DEFAULT_QUANTIZATION = "int8"
+# Candidates rescored with float vectors per requested result; 1 disables rescoring
+DEFAULT_RESCORE_FACTOR = 4
+PQ_SEGMENTS = 96
+PQ_CENTROIDS = 256
+# Vectors sampled to train each segment's codebook (~100 per centroid)
+PQ_TRAINING_LIMIT = 25000
+
+# Rows scored per step, so dequantization never materializes the whole matrix as float32
+_BLOCK_ROWS = 16384
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def _kmeans(points: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = points[rng.choice(len(points), size=k, replace=len(points) < k)].copy()
+    for _ in range(iterations):
+        distances = (
+            (points ** 2).sum(axis=1, keepdims=True)
+            - 2 * points @ centroids.T
+            + (centroids ** 2).sum(axis=1)
+        )
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        filled = counts > 0
+        for d in range(points.shape[1]):
+            sums = np.bincount(assignment, weights=points[:, d], minlength=k)
+            centroids[filled, d] = sums[filled] / counts[filled]
+    return centroids
+
+
+class QuantizedIndex:
+    """Exhaustive cosine search over compressed vectors, with exact rescoring.
+
+    int8 stores one byte per dimension (per-dimension symmetric scales), pq
+    stores one byte per segment of the vector (PQ_SEGMENTS codebooks of 256
+    centroids). Search scores every row on the compressed codes, keeps
+    k * rescore_factor candidates and reorders them by exact float32 cosine.
+    The float vectors are only read for those candidates, so they can stay on
+    disk in a memory-mapped .npy and out of resident memory.
+    """
+
+    def __init__(
+        self,
+        float_vectors: np.ndarray,
+        quantization: str = DEFAULT_QUANTIZATION,
+        rescore_factor: int = DEFAULT_RESCORE_FACTOR,
+        pq_segments: int = PQ_SEGMENTS,
+        seed: int = 0,
+        _codes: Optional[np.ndarray] = None,
+        _codebook: Optional[np.ndarray] = None
+    ):
+        if quantization not in ("none", "int8", "pq"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        self.float_vectors = float_vectors
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.pq_segments = pq_segments
+
+        if _codes is not None:
+            self.codes, self.codebook = _codes, _codebook
+        elif quantization == "int8":
+            self.codes, self.codebook = self._train_int8(_normalize(float_vectors))
+        elif quantization == "pq":
+            self.codes, self.codebook = self._train_pq(_normalize(float_vectors), seed)
+        else:
+            self.codes, self.codebook = _normalize(float_vectors), None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @staticmethod
+    def _train_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        scales = np.abs(vectors).max(axis=0) / 127
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _train_pq(self, vectors: np.ndarray, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+        dimension = vectors.shape[1]
+        if dimension % self.pq_segments:
+            raise ValueError(f"pq_segments must divide {dimension}, got {self.pq_segments}")
+        width = dimension // self.pq_segments
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), PQ_TRAINING_LIMIT), replace=False)]
+
+        codebook = np.empty((self.pq_segments, PQ_CENTROIDS, width), dtype=np.float32)
+        codes = np.empty((len(vectors), self.pq_segments), dtype=np.uint8)
+        for segment in range(self.pq_segments):
+            columns = slice(segment * width, (segment + 1) * width)
+            codebook[segment] = _kmeans(sample[:, columns], PQ_CENTROIDS, iterations=10, rng=rng)
+            for start in range(0, len(vectors), _BLOCK_ROWS):
+                block = vectors[start:start + _BLOCK_ROWS, columns]
+                distances = (block ** 2).sum(axis=1, keepdims=True) - 2 * block @ codebook[segment].T + (codebook[segment] ** 2).sum(axis=1)
+                codes[start:start + _BLOCK_ROWS, segment] = distances.argmin(axis=1)
+        return codes, codebook
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        query = _normalize(query)
+        if self.quantization == "none":
+            return self.codes @ query
+
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        if self.quantization == "int8":
+            scaled_query = query * self.codebook
+            for start in range(0, len(self.codes), _BLOCK_ROWS):
+                scores[start:start + _BLOCK_ROWS] = self.codes[start:start + _BLOCK_ROWS].astype(np.float32) @ scaled_query
+        else:
+            # Asymmetric distance: query segment . centroid for every centroid, then table lookups
+            width = self.codebook.shape[2]
+            table = np.einsum("scw,sw->sc", self.codebook, query.reshape(self.pq_segments, width))
+            segments = np.arange(self.pq_segments)
+            for start in range(0, len(self.codes), _BLOCK_ROWS):
+                scores[start:start + _BLOCK_ROWS] = table[segments, self.codes[start:start + _BLOCK_ROWS]].sum(axis=1)
+        return scores
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and cosine similarities of the k nearest vectors, best first."""
+        approximate = self.approximate_scores(query)
+        if self.quantization == "none":
+            top = _top_k(approximate, k)
+            return top, approximate[top]
+
+        candidates = _top_k(approximate, k * self.rescore_factor)
+        if self.rescore_factor == 1:
+            return candidates, approximate[candidates]
+
+        # Sorted row order keeps reads from a memory-mapped matrix sequential
+        candidates = np.sort(candidates)
+        exact = _normalize(self.float_vectors[candidates]) @ _normalize(query)
+        order = _top_k(exact, k)
+        return candidates[order], exact[order]
+
+    def memory_bytes(self) -> int:
+        """Resident size of what search scans: codes and codebook, not the rescoring vectors."""
+        size = self.codes.nbytes
+        if self.codebook is not None:
+            size += self.codebook.nbytes
+        return size
+
+    def save(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "vectors.npy", np.asarray(self.float_vectors, dtype=np.float32))
+        np.save(directory / "codes.npy", self.codes)
+        if self.codebook is not None:
+            np.save(directory / "codebook.npy", self.codebook)
+        with open(directory / "index.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "quantization": self.quantization,
+                "rescore_factor": self.rescore_factor,
+                "pq_segments": self.pq_segments,
+            }, f)
+
+    @classmethod
+    def load(cls, directory: Path, mmap_vectors: bool = True) -> "QuantizedIndex":
+        with open(directory / "index.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        codebook_path = directory / "codebook.npy"
+        return cls(
+            np.load(directory / "vectors.npy", mmap_mode="r" if mmap_vectors else None),
+            quantization=meta["quantization"],
+            rescore_factor=meta["rescore_factor"],
+            pq_segments=meta["pq_segments"],
+            _codes=np.load(directory / "codes.npy"),
+            _codebook=np.load(codebook_path) if codebook_path.exists() else None
+        )
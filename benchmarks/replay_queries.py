@@ -0,0 +1,168 @@
+"""
+Replay a captured query log against the API or the library at a fixed rate.
+
+Arrivals are open-loop: request start times follow a Poisson process at --qps
+and do not wait for earlier requests to finish, so a slow server builds up a
+backlog the way it would under real traffic. Latency is measured from each
+request's scheduled start, so time spent waiting for a free client thread
+counts too and the tail is not hidden (no coordinated omission).
+
+    # Against a running API
+    python -m benchmarks.replay_queries logs/query_log.jsonl --qps 2 --duration 60
+
+    # In-process, no HTTP
+    python -m benchmarks.replay_queries logs/query_log.jsonl --target library --qps 2
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+REQUEST_FIELDS = ("query", "limit", "region", "content_type", "policy_source", "priority")
+
+
+def load_log(path: Path) -> List[Dict]:
+    requests_to_replay = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            requests_to_replay.append({k: record[k] for k in REQUEST_FIELDS if record.get(k) is not None})
+    return requests_to_replay
+
+
+def http_target(base_url: str, timeout: float) -> Callable[[Dict], Tuple[int, bool]]:
+    import requests
+
+    session = requests.Session()
+
+    def _send(payload: Dict) -> Tuple[int, bool]:
+        response = session.post(f"{base_url}/query", json=payload, timeout=timeout)
+        refused = response.status_code == 200 and response.json().get("refused", False)
+        return response.status_code, refused
+
+    return _send
+
+
+def library_target() -> Callable[[Dict], Tuple[int, bool]]:
+    from app.admission import AdmissionRejected
+    from app.generation import coalesced_policy_response
+
+    def _send(payload: Dict) -> Tuple[int, bool]:
+        try:
+            response = coalesced_policy_response(**payload)
+        except AdmissionRejected as e:
+            return e.status_code, False
+        return 200, response.refused
+
+    return _send
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def replay(
+    payloads: List[Dict],
+    send: Callable[[Dict], Tuple[int, bool]],
+    qps: float,
+    duration_s: float,
+    max_inflight: int,
+    seed: int = 0
+) -> Dict:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    refusals = 0
+
+    def _run(payload: Dict, scheduled: float):
+        nonlocal refusals
+        try:
+            status, refused = send(payload)
+            key = str(status)
+        except Exception as e:
+            refused = False
+            key = type(e).__name__
+        latency_ms = (time.perf_counter() - scheduled) * 1000
+        with lock:
+            latencies.append(latency_ms)
+            statuses[key] = statuses.get(key, 0) + 1
+            refusals += int(refused)
+
+    start = time.perf_counter()
+    next_arrival = start
+    sent = 0
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        while next_arrival - start < duration_s:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_run, payloads[sent % len(payloads)], next_arrival)
+            sent += 1
+            next_arrival += rng.expovariate(qps)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status != "200")
+    return {
+        "sent": sent,
+        "achieved_qps": sent / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else float("nan"),
+        "error_rate": errors / max(sent, 1),
+        "refusal_rate": refusals / max(sent, 1),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", type=Path, help="JSONL query log written with QUERY_LOG_PATH")
+    parser.add_argument("--target", choices=["http", "library"], default="http")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--qps", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of arrivals to generate")
+    parser.add_argument("--max-inflight", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    payloads = load_log(args.log)
+    if not payloads:
+        print(f"No requests found in {args.log}")
+        return
+    print(f"Loaded {len(payloads)} requests from {args.log}")
+
+    send = http_target(args.url, args.timeout) if args.target == "http" else library_target()
+    print(f"Replaying at {args.qps} QPS for {args.duration:.0f}s against {args.target}...")
+
+    report = replay(payloads, send, args.qps, args.duration, args.max_inflight, seed=args.seed)
+
+    print()
+    print(f"Sent:          {report['sent']} ({report['achieved_qps']:.2f} QPS)")
+    print(f"Latency p50:   {report['p50_ms']:.1f}ms")
+    print(f"Latency p90:   {report['p90_ms']:.1f}ms")
+    print(f"Latency p99:   {report['p99_ms']:.1f}ms")
+    print(f"Latency max:   {report['max_ms']:.1f}ms")
+    print(f"Error rate:    {report['error_rate']:.1%}")
+    print(f"Refusal rate:  {report['refusal_rate']:.1%}")
+    print(f"Status codes:  {report['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
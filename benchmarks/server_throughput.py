@@ -0,0 +1,196 @@
+"""
+Throughput per core and memory per worker of the gunicorn server (api/gunicorn_conf.py).
+
+For each --workers value a server is started on --port and warmed up. It is
+then driven closed-loop by --concurrency client threads for --duration seconds,
+cycling through data/canonical_questions.txt. With a precomputed answer store
+those questions are answered without the LLM, so the run measures the API's own
+CPU work: query encoding, lookup and serialization. Without an answer store it
+measures the whole pipeline.
+
+Reported per run:
+
+    rps        successful requests per second
+    rps/core   rps divided by the cores in use (workers x TORCH_THREADS_PER_WORKER)
+    p50/p95    client-side latency, ms
+    rss        mean resident set per worker, MB
+    pss        mean proportional set per worker, MB: shared pages are divided
+               among the processes mapping them, so preloaded (copy-on-write)
+               model weights and mmapped snapshots count once per host, not per worker
+
+--compare-preload repeats every run with GUNICORN_PRELOAD=false, where each
+worker loads its own model on its first request.
+
+    python -m benchmarks.server_throughput --workers 1 2 4 8 --concurrency 32 --compare-preload
+"""
+
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+import requests
+
+from benchmarks.replay_queries import percentile
+
+QUESTIONS_FILE = ROOT / "data" / "canonical_questions.txt"
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # Field 4 is the parent pid; the command name (field 2) may contain spaces
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return children
+
+
+def rss_pss_mb(pid: int) -> Tuple[float, float]:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values["Rss"], values["Pss"]
+
+
+def start_server(workers: int, port: int, preload: bool, log_file) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_PRELOAD="true" if preload else "false",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "api/gunicorn_conf.py", "api.main:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_ready(server: subprocess.Popen, base_url: str, workers: int, timeout_s: float = 300):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if requests.get(f"{base_url}/health", timeout=5).ok and len(child_pids(server.pid)) >= workers:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"Server not ready after {timeout_s:.0f}s")
+
+
+def drive(base_url: str, questions: List[str], concurrency: int, duration_s: float) -> Dict:
+    deadline = time.monotonic() + duration_s
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    next_question = itertools.cycle(questions)
+
+    def _client():
+        nonlocal errors
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            with lock:
+                question = next(next_question)
+            start = time.perf_counter()
+            try:
+                ok = session.post(f"{base_url}/query", json={"query": question}, timeout=120).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(_client)
+    elapsed = time.monotonic() - start
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) if latencies else float("nan"),
+        "p95_ms": percentile(latencies, 95) if latencies else float("nan"),
+        "errors": errors,
+    }
+
+
+def run(workers: int, preload: bool, args, questions: List[str]) -> Dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    with tempfile.NamedTemporaryFile("w", prefix="server_throughput_", suffix=".log", delete=False) as log_file:
+        server = start_server(workers, args.port, preload, log_file)
+    try:
+        wait_ready(server, base_url, workers)
+        drive(base_url, questions, args.concurrency, args.warmup)
+        result = drive(base_url, questions, args.concurrency, args.duration)
+
+        memory = [rss_pss_mb(pid) for pid in child_pids(server.pid)]
+        result["rss_mb"] = sum(rss for rss, _ in memory) / len(memory)
+        result["pss_mb"] = sum(pss for _, pss in memory) / len(memory)
+        result["parent_pss_mb"] = rss_pss_mb(server.pid)[1]
+        return result
+    except Exception:
+        print(f"Server log: {log_file.name}")
+        raise
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=10, help="Unmeasured seconds per run")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--compare-preload", action="store_true")
+    args = parser.parse_args()
+
+    from ingestion.precompute_answers import load_questions
+    questions = load_questions(QUESTIONS_FILE)
+    cores = os.cpu_count()
+    print(f"{cores} cores, {len(questions)} questions, {args.concurrency} clients, {args.duration:.0f}s per run\n")
+    print(
+        f"{'workers':>7} {'preload':>7} {'rps':>8} {'rps/core':>8} {'p50_ms':>8} {'p95_ms':>8} "
+        f"{'errors':>6} {'rss_mb':>7} {'pss_mb':>7} {'total_pss':>9}"
+    )
+
+    for workers in args.workers:
+        threads = int(os.getenv("TORCH_THREADS_PER_WORKER", str(max(1, cores // workers))))
+        cores_used = min(workers * threads, cores)
+        for preload in ([True, False] if args.compare_preload else [True]):
+            row = run(workers, preload, args, questions)
+            total_pss = row["pss_mb"] * workers + row["parent_pss_mb"]
+            print(
+                f"{workers:>7} {str(preload).lower():>7} {row['rps']:>8.1f} {row['rps'] / cores_used:>8.1f} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['errors']:>6} "
+                f"{row['rss_mb']:>7.0f} {row['pss_mb']:>7.0f} {total_pss:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
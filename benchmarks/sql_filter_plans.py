@@ -0,0 +1,257 @@
+"""
+Postgres plans for the retrieval filter queries on a synthetic policy_chunks table.
+
+Creates --schema.policy_chunks with the model's columns and --rows synthetic
+chunks (skewed regions and content types, ~600-byte texts so heap visits cost
+what they do in production), then runs each statement with EXPLAIN (ANALYZE,
+BUFFERS) under two index layouts:
+
+    single     the previous single-column indexes on region, content_type, policy_source
+    composite  ix_chunk_id_filters (chunk_id INCLUDE filters) from db/models.py
+
+Statements, built with the same SQLAlchemy code retrieval uses:
+
+    candidates IN     chunk_id IN (<--ids bound params>) AND region = :region (the old sql_filter)
+    candidates ANY    chunk_id = ANY(:chunk_ids::UUID[]) AND region = :region (sql_filter)
+    candidates PREP   the ANY statement as a server-side PREPAREd statement
+
+Reported: top scan node, median planning and execution time, shared buffers
+(hit + read) and heap fetches per query, and the median client round trip.
+
+Requires a local Postgres (DATABASE_URL); 1M rows take about a minute to generate.
+
+    python -m benchmarks.sql_filter_plans --rows 1000000 --repeats 50
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import MetaData, create_engine, event, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from db.models import PolicyChunk, Region
+from db.session import DATABASE_URL
+from app.retrieval import HybridRetriever, chunk_id_any
+
+COMPOSITE_INDEXES = ("ix_chunk_id_filters",)
+SINGLE_COLUMNS = ("region", "content_type", "policy_source")
+
+
+def insert_synthetic_chunks(conn, table, rows: int):
+    """`rows` chunks with skewed regions (70% global .. 5% uk) and content types, ~600-byte texts."""
+    region_type = table.c.region.type.name
+    content_type_type = table.c.content_type.type.name
+    source_type = table.c.policy_source.type.name
+    conn.execute(text(f"""
+        INSERT INTO {table.fullname} (
+            chunk_id, doc_id, chunk_index, chunk_text, policy_source, policy_section,
+            policy_section_level, policy_path, region, content_type, doc_url, created_at
+        )
+        SELECT
+            gen_random_uuid(),
+            'doc_' || (i % 2000),
+            i,
+            repeat('policy text ', 50),
+            'GOOGLE'::{source_type},
+            'Section ' || (i % 300),
+            CASE WHEN i % 3 = 0 THEN 'H2' ELSE 'H3' END,
+            'Section ' || (i % 300) || ' > Part ' || (i % 7),
+            (CASE WHEN r1 < 0.70 THEN 'GLOBAL' WHEN r1 < 0.85 THEN 'US' WHEN r1 < 0.95 THEN 'EU' ELSE 'UK' END)::{region_type},
+            (CASE WHEN r2 < 0.60 THEN 'GENERAL' WHEN r2 < 0.75 THEN 'AD_TEXT' WHEN r2 < 0.85 THEN 'IMAGE'
+                  WHEN r2 < 0.95 THEN 'VIDEO' ELSE 'LANDING_PAGE' END)::{content_type_type},
+            'https://support.google.com/adspolicy/answer/' || (i % 2000),
+            now()
+        FROM (SELECT i, random() AS r1, random() AS r2 FROM generate_series(1, {rows}) AS i) AS g
+    """))
+
+
+def create_table(engine, schema: str, rows: int):
+    table = PolicyChunk.__table__.to_metadata(MetaData(), schema=schema)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+        table.create(conn)
+        # Only the table and its primary key; index layouts are applied per run
+        for index in table.indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {schema}.{index.name}"))
+        insert_synthetic_chunks(conn, table, rows)
+    return table
+
+
+def apply_layout(engine, table, schema: str, layout: str):
+    with engine.begin() as conn:
+        for name in COMPOSITE_INDEXES + tuple(f"ix_bench_{column}" for column in SINGLE_COLUMNS):
+            conn.execute(text(f"DROP INDEX IF EXISTS {schema}.{name}"))
+        if layout == "single":
+            for column in SINGLE_COLUMNS:
+                conn.execute(text(f"CREATE INDEX ix_bench_{column} ON {schema}.policy_chunks ({column})"))
+        else:
+            for index in table.indexes:
+                if index.name in COMPOSITE_INDEXES:
+                    conn.execute(CreateIndex(index))
+    # Index-only scans need an up-to-date visibility map
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM ANALYZE {schema}.policy_chunks"))
+
+
+def _walk(plan: Dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def summarize_plan(explain: List) -> Dict:
+    root = explain[0]
+    nodes = list(_walk(root["Plan"]))
+    scans = [node["Node Type"] for node in nodes if "Scan" in node["Node Type"]]
+    return {
+        "scan": scans[0] if scans else nodes[0]["Node Type"],
+        "plan_ms": root.get("Planning Time", 0.0),
+        "exec_ms": root["Execution Time"],
+        "buffers": root["Plan"].get("Shared Hit Blocks", 0) + root["Plan"].get("Shared Read Blocks", 0),
+        "heap_fetches": sum(node.get("Heap Fetches", 0) for node in nodes),
+    }
+
+
+class Explainer:
+    """Prefixes statements executed while `on` with EXPLAIN, so plans come from the real SQLAlchemy SQL."""
+
+    def __init__(self, engine):
+        self.on = False
+        event.listen(engine, "before_cursor_execute", self._before, retval=True)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if self.on:
+            statement = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement
+        return statement, parameters
+
+
+def run_statement(db: Session, explainer: Explainer, build, repeats: int, sample: List[str], id_count: int) -> Dict:
+    plans, round_trips = [], []
+    for _ in range(repeats):
+        statement = build(random.sample(sample, id_count))
+        explainer.on = True
+        try:
+            plans.append(summarize_plan(db.execute(statement).scalar()))
+        finally:
+            explainer.on = False
+        start = time.perf_counter()
+        db.execute(statement).all()
+        round_trips.append((time.perf_counter() - start) * 1000)
+    return _aggregate(plans, round_trips)
+
+
+def run_prepared(db: Session, statement_for, repeats: int, sample: List[str], id_count: int, schema: str) -> Dict:
+    compiled = statement_for(sample[:id_count]).compile(
+        dialect=postgresql.psycopg2.dialect(),
+        schema_translate_map={None: schema},
+        render_schema_translate=True,
+    )
+    names: List[str] = []
+
+    def _positional(match):
+        if match.group(1) not in names:
+            names.append(match.group(1))
+        return f"${names.index(match.group(1)) + 1}"
+
+    sql = re.sub(r"%\((\w+)\)s", _positional, str(compiled))
+    cursor = db.connection().connection.cursor()
+    cursor.execute("DEALLOCATE ALL")
+    cursor.execute(f"PREPARE chunk_filter AS {sql}")
+
+    plans, round_trips = [], []
+    placeholders = ", ".join(["%s"] * len(names))
+    for _ in range(repeats):
+        params = dict(compiled.params, chunk_ids=random.sample(sample, id_count))
+        values = [params[name].name if hasattr(params[name], "name") else params[name] for name in names]
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) EXECUTE chunk_filter({placeholders})", values)
+        explain = cursor.fetchone()[0]
+        plans.append(summarize_plan(explain if isinstance(explain, list) else json.loads(explain)))
+        start = time.perf_counter()
+        cursor.execute(f"EXECUTE chunk_filter({placeholders})", values)
+        cursor.fetchall()
+        round_trips.append((time.perf_counter() - start) * 1000)
+    cursor.execute("DEALLOCATE chunk_filter")
+    return _aggregate(plans, round_trips)
+
+
+def _aggregate(plans: List[Dict], round_trips: List[float]) -> Dict:
+    return {
+        "scan": statistics.mode(plan["scan"] for plan in plans),
+        "plan_ms": statistics.median(plan["plan_ms"] for plan in plans),
+        "exec_ms": statistics.median(plan["exec_ms"] for plan in plans),
+        "buffers": statistics.median(plan["buffers"] for plan in plans),
+        "heap_fetches": statistics.median(plan["heap_fetches"] for plan in plans),
+        "rtt_ms": statistics.median(round_trips),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--ids", type=int, default=60, help="Candidate ids per query (limit * overfetch)")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--schema", default="bench_sql_filter")
+    parser.add_argument("--reuse", action="store_true", help="Keep an existing synthetic table")
+    parser.add_argument("--keep", action="store_true", help="Leave the schema in place afterwards")
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL)
+    if args.reuse:
+        table = PolicyChunk.__table__.to_metadata(MetaData(), schema=args.schema)
+    else:
+        start = time.perf_counter()
+        table = create_table(engine, args.schema, args.rows)
+        print(f"Generated {args.rows} chunks in {time.perf_counter() - start:.0f}s")
+
+    retriever = object.__new__(HybridRetriever)
+    explainer = Explainer(engine)
+    region = Region.UK.value
+
+    def candidates_in(ids):
+        query = select(PolicyChunk.chunk_id).where(PolicyChunk.chunk_id.in_(ids))
+        return retriever._apply_filters(query, region=region)
+
+    def candidates_any(ids):
+        return retriever._apply_filters(select(PolicyChunk.chunk_id).where(chunk_id_any(ids)), region=region)
+
+    print(f"{args.ids} candidate ids per query, {args.repeats} runs each, filter region={region}\n")
+    print(f"{'layout':<10} {'statement':<15} {'scan':<18} {'plan_ms':>8} {'exec_ms':>8} {'buffers':>8} {'heap':>6} {'rtt_ms':>8}")
+    try:
+        for layout in ("single", "composite"):
+            apply_layout(engine, table, args.schema, layout)
+            connection = engine.connect().execution_options(schema_translate_map={None: args.schema})
+            with Session(bind=connection) as db:
+                sample = [str(chunk_id) for (chunk_id,) in db.execute(
+                    select(PolicyChunk.chunk_id).order_by(text("random()")).limit(20000)
+                )]
+                rows = [
+                    ("candidates IN", run_statement(db, explainer, candidates_in, args.repeats, sample, args.ids)),
+                    ("candidates ANY", run_statement(db, explainer, candidates_any, args.repeats, sample, args.ids)),
+                    ("candidates PREP", run_prepared(db, candidates_any, args.repeats, sample, args.ids, args.schema)),
+                ]
+            connection.close()
+            for name, row in rows:
+                print(
+                    f"{layout:<10} {name:<15} {row['scan']:<18} {row['plan_ms']:>8.3f} {row['exec_ms']:>8.3f} "
+                    f"{row['buffers']:>8.0f} {row['heap_fetches']:>6.0f} {row['rtt_ms']:>8.3f}"
+                )
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
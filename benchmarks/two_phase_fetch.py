@@ -0,0 +1,114 @@
+"""
+Weaviate response size and parse time for full-payload vs. two-phase retrieval.
+
+For every canonical question the same nearVector GraphQL query is sent with
+the full property list (VECTOR_SEARCH_FIELDS) and with the slim candidate
+list (CANDIDATE_FIELDS), over the same limit * 3 overfetch retrieve() uses.
+Reported per query:
+
+    bytes     response body size (decoded, before any HTTP compression)
+    parse_ms  json.loads of that body
+    fetch_ms  request round trip including Weaviate's serialization
+
+The two-phase row also times HybridRetriever.hydrate(), which loads text and
+metadata for the final top-k (from the in-memory chunk catalog, or from
+Postgres with CHUNK_CATALOG=false), and the last table compares end-to-end
+retrieve() latency with RETRIEVAL_TWO_PHASE on and off.
+
+    python -m benchmarks.two_phase_fetch --limit 5 --repeats 3
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import requests
+
+from app.retrieval import HybridRetriever, WEAVIATE_URL, VECTOR_SEARCH_FIELDS, CANDIDATE_FIELDS
+from ingestion.precompute_answers import load_questions
+from benchmarks.replay_queries import percentile
+
+QUESTIONS_FILE = Path(__file__).parent.parent / "data" / "canonical_questions.txt"
+
+
+def fetch(session: requests.Session, retriever: HybridRetriever, vector: List[float], fields: List[str], limit: int) -> Dict:
+    graphql = retriever.weaviate_client.query.get(
+        retriever.index_class(), fields
+    ).with_near_vector({"vector": vector}).with_limit(limit).build()
+
+    start = time.perf_counter()
+    response = session.post(f"{WEAVIATE_URL}/v1/graphql", json={"query": graphql})
+    response.raise_for_status()
+    fetch_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    body = json.loads(response.content)
+    parse_ms = (time.perf_counter() - start) * 1000
+
+    hits = body["data"]["Get"][retriever.index_class()]
+    return {"bytes": len(response.content), "parse_ms": parse_ms, "fetch_ms": fetch_ms, "hits": hits}
+
+
+def summarize(rows: List[Dict], key: str) -> str:
+    values = sorted(row[key] for row in rows)
+    mean = sum(values) / len(values)
+    return f"mean {mean:>9.2f}  p50 {percentile(values, 50):>9.2f}  p95 {percentile(values, 95):>9.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=5, help="Final results per query; Weaviate is asked for 3x")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    retriever = HybridRetriever()
+    questions = load_questions(QUESTIONS_FILE)
+    vectors = retriever.encode_queries(questions).tolist()
+    overfetch = args.limit * 3
+    session = requests.Session()
+
+    full, slim, hydrate = [], [], []
+    for _ in range(args.repeats):
+        for vector in vectors:
+            full.append(fetch(session, retriever, vector, VECTOR_SEARCH_FIELDS, overfetch))
+            candidates = fetch(session, retriever, vector, CANDIDATE_FIELDS, overfetch)
+            slim.append(candidates)
+
+            top_ids = [hit["chunk_id"] for hit in candidates["hits"][:args.limit]]
+            start = time.perf_counter()
+            retriever.hydrate(top_ids)
+            hydrate.append({"hydrate_ms": (time.perf_counter() - start) * 1000})
+
+    print(f"{len(questions)} questions x {args.repeats}, {overfetch} hits per Weaviate query\n")
+    for name, rows in (("full payload", full), ("two-phase", slim)):
+        print(name)
+        print(f"  bytes     {summarize(rows, 'bytes')}")
+        print(f"  parse_ms  {summarize(rows, 'parse_ms')}")
+        print(f"  fetch_ms  {summarize(rows, 'fetch_ms')}")
+    print(f"  hydrate_ms {summarize(hydrate, 'hydrate_ms')}")
+
+    full_bytes = sum(row["bytes"] for row in full)
+    slim_bytes = sum(row["bytes"] for row in slim)
+    print(f"\nWeaviate bytes per query reduced {full_bytes / max(slim_bytes, 1):.1f}x\n")
+
+    print("end-to-end retrieve()")
+    for two_phase in (False, True):
+        retriever.two_phase = two_phase
+        latencies = []
+        for _ in range(args.repeats):
+            for question in questions:
+                start = time.perf_counter()
+                retriever.retrieve(question, limit=args.limit)
+                latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        label = "two-phase" if two_phase else "full payload"
+        print(f"  {label:<13} p50 {percentile(latencies, 50):>8.2f} ms  p95 {percentile(latencies, 95):>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
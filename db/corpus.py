@@ -0,0 +1,24 @@
+import hashlib
+from typing import Dict, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from db.models import PolicyChunk
+
+
+def get_doc_chunk_counts(db: Session) -> Dict[str, int]:
+    """Chunk count per versioned doc_id (e.g. google_ads_alcohol_2025-12-24)."""
+    rows = db.query(PolicyChunk.doc_id, func.count(PolicyChunk.chunk_id)).group_by(PolicyChunk.doc_id).all()
+    return {doc_id: count for doc_id, count in rows}
+
+
+def get_current_doc_ids(db: Session) -> Set[str]:
+    return set(get_doc_chunk_counts(db))
+
+
+def get_corpus_version(db: Session) -> str:
+    """Short fingerprint of the corpus that changes whenever a document is re-versioned."""
+    counts = get_doc_chunk_counts(db)
+    fingerprint = "\n".join(f"{doc_id}:{counts[doc_id]}" for doc_id in sorted(counts))
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
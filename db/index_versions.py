@@ -0,0 +1,191 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, inspect, text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.orm import Session
+
+from db.models import VectorIndexVersion, IndexStatus, IndexFilterStats, PolicyChunk
+from db.pgvector import embedding_table_for
+
+# Weaviate class used before versioned indexes existed
+LEGACY_CLASS_NAME = "PolicyChunk"
+
+
+def class_name_for(version: int) -> str:
+    return f"PolicyChunk_v{version}"
+
+
+def index_name_for(backend: str, version: int) -> str:
+    """The Weaviate class, or for pgvector the embeddings table, a version is built into."""
+    return embedding_table_for(version) if backend == "pgvector" else class_name_for(version)
+
+
+def create_index_tables(bind):
+    """Create the index bookkeeping tables missing from a database set up before them.
+
+    A vector_index_versions table from before per-backend pointers gets its
+    backend column (existing rows are Weaviate builds) and the per-backend
+    active index.
+    """
+    VectorIndexVersion.__table__.create(bind=bind, checkfirst=True)
+    IndexFilterStats.__table__.create(bind=bind, checkfirst=True)
+    
+    columns = {column["name"] for column in inspect(bind).get_columns(VectorIndexVersion.__tablename__)}
+    if "backend" not in columns:
+        with bind.begin() as conn:
+            conn.execute(text(
+                "ALTER TABLE vector_index_versions ADD COLUMN backend VARCHAR(16) NOT NULL DEFAULT 'weaviate'"
+            ))
+            conn.execute(text("DROP INDEX IF EXISTS uq_single_active_index"))
+            for index in VectorIndexVersion.__table__.indexes:
+                index.create(bind=conn)
+
+
+def get_active_index(db: Session, backend: str = "weaviate") -> Optional[VectorIndexVersion]:
+    return db.query(VectorIndexVersion).filter(
+        VectorIndexVersion.backend == backend,
+        VectorIndexVersion.status == IndexStatus.ACTIVE
+    ).one_or_none()
+
+
+def get_active_class_name(db: Session, backend: str = "weaviate") -> Optional[str]:
+    """Weaviate class (or pgvector table) `backend` queries should read.
+
+    Weaviate falls back to the unversioned class until its first promotion;
+    pgvector has nothing to read (None) until a pgvector build is promoted.
+    """
+    fallback = LEGACY_CLASS_NAME if backend == "weaviate" else None
+    try:
+        active = get_active_index(db, backend)
+    except ProgrammingError:
+        # vector_index_versions not created yet: a deployment from before versioned indexes
+        db.rollback()
+        return fallback
+    return active.class_name if active else fallback
+
+
+def create_index_version(
+    db: Session,
+    corpus_version: Optional[str] = None,
+    backend: str = "weaviate"
+) -> VectorIndexVersion:
+    index = VectorIndexVersion(class_name="", backend=backend, corpus_version=corpus_version)
+    db.add(index)
+    db.flush()
+    index.class_name = index_name_for(backend, index.version)
+    db.commit()
+    return index
+
+
+def promote_index_version(db: Session, version: int, chunk_count: Optional[int] = None) -> VectorIndexVersion:
+    """Make `version` the active index of its backend in one transaction.
+
+    Readers see either the old or the new pointer, never neither. The previous
+    active index of the same backend is retired, not deleted, so it can be
+    promoted back; the other backend's pointer is left alone.
+    """
+    index = db.query(VectorIndexVersion).filter(
+        VectorIndexVersion.version == version
+    ).with_for_update().one()
+    
+    db.query(VectorIndexVersion).filter(
+        VectorIndexVersion.backend == index.backend,
+        VectorIndexVersion.status == IndexStatus.ACTIVE,
+        VectorIndexVersion.version != version
+    ).update({VectorIndexVersion.status: IndexStatus.RETIRED}, synchronize_session=False)
+    
+    index.status = IndexStatus.ACTIVE
+    index.promoted_at = datetime.utcnow()
+    if chunk_count is not None:
+        index.chunk_count = chunk_count
+    db.commit()
+    return index
+
+
+def mark_index_failed(db: Session, version: int):
+    db.query(VectorIndexVersion).filter(
+        VectorIndexVersion.version == version
+    ).update({VectorIndexVersion.status: IndexStatus.FAILED}, synchronize_session=False)
+    db.commit()
+
+
+def collectable_index_versions(
+    db: Session,
+    keep_retired: int,
+    backend: str = "weaviate"
+) -> List[VectorIndexVersion]:
+    """Failed builds, plus retired indexes beyond the newest `keep_retired`, of one backend."""
+    query = db.query(VectorIndexVersion).filter(VectorIndexVersion.backend == backend)
+    retired = query.filter(
+        VectorIndexVersion.status == IndexStatus.RETIRED
+    ).order_by(VectorIndexVersion.version.desc()).all()
+    failed = query.filter(
+        VectorIndexVersion.status == IndexStatus.FAILED
+    ).all()
+    return retired[keep_retired:] + failed
+
+
+FILTER_COLUMNS = {
+    "region": PolicyChunk.region,
+    "content_type": PolicyChunk.content_type,
+    "policy_source": PolicyChunk.policy_source,
+}
+
+
+def record_filter_stats(db: Session, version: int) -> Dict[str, Dict[str, int]]:
+    """Store chunk counts per filter value for the index being built from the current policy_chunks."""
+    db.query(IndexFilterStats).filter(IndexFilterStats.index_version == version).delete(synchronize_session=False)
+    
+    stats = {}
+    for column_name, column in FILTER_COLUMNS.items():
+        rows = db.query(column, func.count(PolicyChunk.chunk_id)).group_by(column).all()
+        stats[column_name] = {value.value: count for value, count in rows}
+        db.add_all(
+            IndexFilterStats(index_version=version, column_name=column_name, value=value, chunk_count=count)
+            for value, count in stats[column_name].items()
+        )
+    db.commit()
+    return stats
+
+
+def get_filter_stats(db: Session, class_name: str) -> Optional[Dict[str, Dict[str, int]]]:
+    """{column: {value: chunk count}} recorded for the index in `class_name`; None if it has none."""
+    try:
+        rows = db.query(IndexFilterStats).join(
+            VectorIndexVersion,
+            VectorIndexVersion.version == IndexFilterStats.index_version
+        ).filter(VectorIndexVersion.class_name == class_name).all()
+    except ProgrammingError:
+        # index_filter_stats not created yet
+        db.rollback()
+        return None
+    
+    if not rows:
+        return None
+    stats: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        stats.setdefault(row.column_name, {})[row.value] = row.chunk_count
+    return stats
+
+
+def current_class_name(backend: str = "weaviate") -> Optional[str]:
+    """get_active_class_name with its own session, for callers without one."""
+    from db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return get_active_class_name(db, backend)
+    finally:
+        db.close()
+
+
+def filter_stats_for(class_name: str) -> Optional[Dict[str, Dict[str, int]]]:
+    """get_filter_stats with its own session."""
+    from db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return get_filter_stats(db, class_name)
+    finally:
+        db.close()
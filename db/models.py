@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, Enum, UniqueConstraint, Index
+from sqlalchemy import Column, String, Integer, Text, DateTime, Enum, Float, UniqueConstraint, Index, ForeignKey, cast, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.types import UserDefinedType
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -7,6 +8,45 @@ import enum
 
 Base = declarative_base()
 
+EMBEDDING_DIMENSIONS = 384
+
+def vector_literal(values) -> str:
+    """pgvector's text form; 9 significant digits round-trip float32 exactly."""
+    return "[" + ",".join(format(float(x), ".9g") for x in values) + "]"
+
+class Vector(UserDefinedType):
+    """pgvector `vector(n)` column: values bind as '[x,y,...]' text cast to the type and load as lists of floats.
+
+    Used by the per-build embeddings tables in db/pgvector.py, which live outside Base.
+    """
+    cache_ok = True
+    
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+    
+    def get_col_spec(self, **kw):
+        return f"VECTOR({self.dimensions})"
+    
+    def bind_expression(self, bindvalue):
+        return cast(bindvalue, self)
+    
+    def bind_processor(self, dialect):
+        def process(value):
+            return None if value is None else vector_literal(value)
+        return process
+    
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None:
+                return None
+            return [float(x) for x in value[1:-1].split(",")]
+        return process
+    
+    class comparator_factory(UserDefinedType.Comparator):
+        def cosine_distance(self, other):
+            """`<=>`: 1 - cosine similarity, the same distance Weaviate reports for cosine classes."""
+            return self.op("<=>", return_type=Float)(other)
+
 class PolicySource(str, enum.Enum):
     GOOGLE = "google"
 
@@ -23,11 +63,19 @@ class ContentType(str, enum.Enum):
     LANDING_PAGE = "landing_page"
     GENERAL = "general"
 
+class IndexStatus(str, enum.Enum):
+    BUILDING = "building"
+    ACTIVE = "active"
+    RETIRED = "retired"
+    FAILED = "failed"
+
 class PolicyChunk(Base):
     __tablename__ = "policy_chunks"
     __table_args__ = (
         UniqueConstraint("doc_id", "chunk_index", name="uq_doc_chunkindex"),
         Index("ix_doc_section", "doc_id", "policy_section"),
+        # Candidate check (chunk_id = ANY(:ids) plus filters) as an index-only scan, no heap visits
+        Index("ix_chunk_id_filters", "chunk_id", postgresql_include=["region", "content_type", "policy_source"]),
     )
     
     chunk_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -36,13 +84,13 @@ class PolicyChunk(Base):
     
     chunk_text = Column(Text, nullable=False)
     
-    policy_source = Column(Enum(PolicySource), nullable=False, index=True)
+    policy_source = Column(Enum(PolicySource), nullable=False)
     policy_section = Column(String(255), nullable=False, index=True)
     policy_section_level = Column(String(10), nullable=False)
     policy_path = Column(String(512), nullable=False, index=True)
     
-    region = Column(Enum(Region), nullable=False, default=Region.GLOBAL, index=True)
-    content_type = Column(Enum(ContentType), nullable=False, default=ContentType.GENERAL, index=True)
+    region = Column(Enum(Region), nullable=False, default=Region.GLOBAL)
+    content_type = Column(Enum(ContentType), nullable=False, default=ContentType.GENERAL)
     
     effective_date = Column(DateTime, nullable=True)
     doc_url = Column(String(512), nullable=False)
@@ -51,3 +99,43 @@ class PolicyChunk(Base):
     
     def __repr__(self):
         return f"<PolicyChunk(doc_id={self.doc_id}, section={self.policy_section}, level={self.policy_section_level})>"
+
+class VectorIndexVersion(Base):
+    __tablename__ = "vector_index_versions"
+    __table_args__ = (
+        # At most one active index per backend; a concurrent second promotion fails instead of racing
+        Index(
+            "uq_single_active_index",
+            "backend",
+            unique=True,
+            postgresql_where=text("status = 'ACTIVE'")
+        ),
+    )
+    
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    # weaviate | pgvector: the backend this version was built for; each has its own active pointer
+    backend = Column(String(16), nullable=False, default="weaviate", server_default="weaviate")
+    # Weaviate class, or for pgvector the embeddings table
+    class_name = Column(String(64), nullable=False, unique=True)
+    status = Column(Enum(IndexStatus), nullable=False, default=IndexStatus.BUILDING)
+    
+    corpus_version = Column(String(12), nullable=True)
+    chunk_count = Column(Integer, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    promoted_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<VectorIndexVersion(class_name={self.class_name}, status={self.status})>"
+
+class IndexFilterStats(Base):
+    """Chunk count per filter value in one index version, for estimating filter selectivity."""
+    __tablename__ = "index_filter_stats"
+    
+    index_version = Column(Integer, ForeignKey("vector_index_versions.version", ondelete="CASCADE"), primary_key=True)
+    column_name = Column(String(32), primary_key=True)
+    value = Column(String(32), primary_key=True)
+    chunk_count = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<IndexFilterStats(index_version={self.index_version}, {self.column_name}={self.value}, count={self.chunk_count})>"
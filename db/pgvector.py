@@ -0,0 +1,160 @@
+import math
+import os
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import Column, MetaData, Table, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from db.models import PolicyChunk, Vector, EMBEDDING_DIMENSIONS, vector_literal
+
+# weaviate | pgvector: where retrieval runs the similarity search
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "weaviate")
+RETRIEVAL_BACKENDS = ("weaviate", "pgvector")
+# hnsw | ivfflat
+PGVECTOR_INDEX = os.getenv("PGVECTOR_INDEX", "hnsw")
+PGVECTOR_HNSW_M = int(os.getenv("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", "64"))
+# 0 sizes the lists from the row count (rows / 1000, sqrt(rows) past 1M rows)
+PGVECTOR_IVFFLAT_LISTS = int(os.getenv("PGVECTOR_IVFFLAT_LISTS", "0"))
+# Query-time search breadth, set once per connection
+PGVECTOR_EF_SEARCH = int(os.getenv("PGVECTOR_EF_SEARCH", "100"))
+PGVECTOR_IVFFLAT_PROBES = int(os.getenv("PGVECTOR_IVFFLAT_PROBES", "10"))
+# relaxed_order | strict_order | off. With filters, keep scanning the index until
+# enough rows pass instead of filtering one ef_search-sized batch (pgvector >= 0.8)
+PGVECTOR_ITERATIVE_SCAN = os.getenv("PGVECTOR_ITERATIVE_SCAN", "relaxed_order")
+
+# Each pgvector build writes its own table, e.g. policy_chunk_embeddings_v7; the
+# active one is the pgvector pointer in vector_index_versions
+EMBEDDING_TABLE_PREFIX = "policy_chunk_embeddings_v"
+
+_metadata = MetaData()
+_tables: Dict[str, Table] = {}
+_tables_lock = threading.Lock()
+
+
+def embedding_table_for(version: int) -> str:
+    return f"{EMBEDDING_TABLE_PREFIX}{version}"
+
+
+def embedding_table(name: str) -> Table:
+    """Table object for one build's embeddings.
+
+    Kept out of Base.metadata so init_db never creates it, or needs the
+    vector extension, on deployments that serve from Weaviate.
+    """
+    with _tables_lock:
+        if name not in _tables:
+            _tables[name] = Table(
+                name,
+                _metadata,
+                Column("chunk_id", UUID(as_uuid=True), primary_key=True),
+                Column("embedding", Vector(EMBEDDING_DIMENSIONS), nullable=False),
+            )
+        return _tables[name]
+
+
+def embedding_index_name(table_name: str) -> str:
+    return f"ix_{table_name}_embedding"
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector's guidance: rows / 1000 lists up to 1M rows, sqrt(rows) beyond."""
+    if rows > 1_000_000:
+        return int(math.sqrt(rows))
+    return max(1, rows // 1000)
+
+
+def embedding_index_ddl(table_name: str, method: str = PGVECTOR_INDEX, rows: int = 0) -> str:
+    if method == "hnsw":
+        options = f"m = {PGVECTOR_HNSW_M}, ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION}"
+    elif method == "ivfflat":
+        options = f"lists = {PGVECTOR_IVFFLAT_LISTS or ivfflat_lists(rows)}"
+    else:
+        raise ValueError(f"Unsupported pgvector index: {method}")
+    return (
+        f"CREATE INDEX {embedding_index_name(table_name)} ON {table_name} "
+        f"USING {method} (embedding vector_cosine_ops) WITH ({options})"
+    )
+
+
+def create_embedding_table(db: Session, name: str) -> Table:
+    """Create an empty embeddings table for a new build; the only place the vector extension is required."""
+    db.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    table = embedding_table(name)
+    table.create(bind=db.connection())
+    db.commit()
+    return table
+
+
+def drop_embedding_table(db: Session, name: str):
+    embedding_table(name).drop(bind=db.connection(), checkfirst=True)
+    db.commit()
+    with _tables_lock:
+        table = _tables.pop(name, None)
+        if table is not None:
+            _metadata.remove(table)
+
+
+def build_embedding_index(db: Session, name: str, method: str = PGVECTOR_INDEX) -> float:
+    """Build the ANN index over a filled embeddings table; returns its size in MB.
+
+    Built after the embeddings are written: HNSW builds faster in one pass than
+    through row-by-row inserts, and IVFFlat trains its lists on the data present.
+    """
+    rows = db.query(func.count()).select_from(embedding_table(name)).scalar()
+    db.execute(text(embedding_index_ddl(name, method, rows)))
+    db.execute(text(f"ANALYZE {name}"))
+    db.commit()
+    return db.execute(text(f"SELECT pg_relation_size('{embedding_index_name(name)}')")).scalar() / (1024 * 1024)
+
+
+def write_embeddings(db: Session, name: str, chunk_ids: List[str], embeddings: np.ndarray):
+    """Insert one batch of embeddings in a single statement, ids and vectors bound as two arrays."""
+    vectors = [vector_literal(row) for row in embeddings]
+    db.execute(
+        text(
+            f"INSERT INTO {name} (chunk_id, embedding) "
+            "SELECT batch.chunk_id, batch.embedding::vector "
+            "FROM unnest(CAST(:chunk_ids AS UUID[]), CAST(:vectors AS TEXT[])) AS batch(chunk_id, embedding)"
+        ),
+        {"chunk_ids": [str(chunk_id) for chunk_id in chunk_ids], "vectors": vectors}
+    )
+
+
+def embedding_coverage(db: Session, name: str) -> Tuple[int, int]:
+    """(chunks without an embedding, embeddings without a chunk) in table `name`."""
+    table = embedding_table(name)
+    missing = db.query(func.count(PolicyChunk.chunk_id)).outerjoin(
+        table, table.c.chunk_id == PolicyChunk.chunk_id
+    ).filter(table.c.chunk_id.is_(None)).scalar()
+    extra = db.query(func.count(table.c.chunk_id)).select_from(table).outerjoin(
+        PolicyChunk, PolicyChunk.chunk_id == table.c.chunk_id
+    ).filter(PolicyChunk.chunk_id.is_(None)).scalar()
+    return missing, extra
+
+
+def search_settings() -> Dict[str, str]:
+    settings = {
+        "hnsw.ef_search": str(PGVECTOR_EF_SEARCH),
+        "ivfflat.probes": str(PGVECTOR_IVFFLAT_PROBES),
+    }
+    if PGVECTOR_ITERATIVE_SCAN != "off":
+        settings["hnsw.iterative_scan"] = PGVECTOR_ITERATIVE_SCAN
+        # IVFFlat only supports the relaxed order
+        settings["ivfflat.iterative_scan"] = "relaxed_order"
+    return settings
+
+
+def configure_search_session(dbapi_connection, connection_record=None):
+    """Engine "connect" listener: apply search_settings() once per connection, not per query."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in search_settings().items():
+            cursor.execute(f"SET {name} = %s", (value,))
+    finally:
+        cursor.close()
+    # A plain SET inside the implicit transaction would be undone by the pool's reset-on-return
+    dbapi_connection.commit()
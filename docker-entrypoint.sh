@@ -70,7 +70,12 @@ else
   echo "Embeddings already indexed ($CHUNK_COUNT chunks)"
 fi
 
-echo "Starting FastAPI server..."
-
 # Start the FastAPI application
-exec uvicorn api.main:app --host 0.0.0.0 --port 8000
+if [ "${SERVER_MODE:-single}" = "gunicorn" ]; then
+  # N workers forked after the embedding model and indexes are loaded (api/gunicorn_conf.py)
+  echo "Starting FastAPI server with ${WEB_CONCURRENCY:-$(nproc)} gunicorn workers..."
+  exec gunicorn -c api/gunicorn_conf.py api.main:app
+else
+  echo "Starting FastAPI server..."
+  exec uvicorn api.main:app --host 0.0.0.0 --port 8000
+fi
@@ -1,26 +1,77 @@
 import weaviate
+import numpy as np
 from sentence_transformers import SentenceTransformer
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import sys
 import os
+import time
+import queue
+import argparse
+import resource
+import threading
+import multiprocessing
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
 from db.session import SessionLocal
 from db.models import PolicyChunk
+from db.corpus import get_corpus_version
+from db.index_versions import (
+    LEGACY_CLASS_NAME,
+    create_index_tables,
+    create_index_version,
+    promote_index_version,
+    mark_index_failed,
+    record_filter_stats,
+    collectable_index_versions
+)
+from db.models import VectorIndexVersion, IndexStatus
+from db.pgvector import (
+    build_embedding_index,
+    create_embedding_table,
+    drop_embedding_table,
+    embedding_coverage,
+    embedding_index_name,
+    write_embeddings,
+    PGVECTOR_INDEX,
+    RETRIEVAL_BACKEND,
+    RETRIEVAL_BACKENDS
+)
+from ingestion.index_config import VectorIndexConfig, load_index_config, INDEX_PROFILES
+from ingestion.snapshot import build_snapshot, prune_snapshots
+from app.encoding import encode_texts
 
 WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://localhost:8080")
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Chunks read, encoded and queued for upload per step
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "32"))
+WEAVIATE_BATCH_SIZE = 100
+# Encoded batches allowed to wait for upload before encoding blocks
+UPLOAD_QUEUE_DEPTH = int(os.getenv("EMBED_QUEUE_DEPTH", "2"))
+# Encoder processes for full rebuilds; 1 encodes in this process
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+# Retired index versions kept for rollback (and for workers still on the old pointer)
+INDEX_VERSIONS_KEEP = max(1, int(os.getenv("INDEX_VERSIONS_KEEP", "1")))
+
+_DONE = object()
+_worker_model = None
 
 def get_weaviate_client() -> weaviate.Client:
     client = weaviate.Client(url=WEAVIATE_URL)
     return client
 
-def create_schema(client: weaviate.Client):
+def create_schema(
+    client: weaviate.Client,
+    class_name: str = LEGACY_CLASS_NAME,
+    index_config: Optional[VectorIndexConfig] = None
+):
+    index_config = index_config or load_index_config()
     schema = {
-        "class": "PolicyChunk",
+        "class": class_name,
         "description": "Policy document chunks with embeddings",
         "vectorizer": "none",
         "properties": [
@@ -77,99 +128,477 @@ def create_schema(client: weaviate.Client):
         ]
     }
     
-    if client.schema.exists("PolicyChunk"):
+    # Only ever called for a class that is not serving: a fresh version, or a
+    # leftover from an interrupted build of the same version
+    if client.schema.exists(class_name):
         print("Schema already exists, deleting...")
-        client.schema.delete_class("PolicyChunk")
+        client.schema.delete_class(class_name)
     
+    schema.update(index_config.to_weaviate())
     client.schema.create_class(schema)
-    print("Schema created successfully")
-
-def load_chunks_from_db(db: Session) -> List[PolicyChunk]:
-    chunks = db.query(PolicyChunk).order_by(
-        PolicyChunk.doc_id, 
-        PolicyChunk.chunk_index
-    ).all()
-    return chunks
-
-def generate_embeddings(texts: List[str], model) -> List[List[float]]:
-    embeddings = model.encode(texts, show_progress_bar=True, batch_size=32)
-    embeddings_list = embeddings.tolist()
-    
-    if len(embeddings_list) > 0:
-        assert len(embeddings_list[0]) == 384, (
-            f"Expected 384-dimensional embeddings, got {len(embeddings_list[0])}"
+    print(f"Schema created successfully ({index_config.to_weaviate()['vectorIndexConfig']})")
+
+def enable_pq(client: weaviate.Client, class_name: str, index_config: VectorIndexConfig):
+    """Compress an imported class with product quantization; Weaviate trains the codebook on its vectors."""
+    client.schema.update_config(class_name, {"vectorIndexConfig": {"pq": index_config.pq_config()}})
+
+def chunk_properties(chunk: PolicyChunk) -> Dict:
+    return {
+        "chunk_id": str(chunk.chunk_id),
+        "chunk_text": chunk.chunk_text,
+        "doc_id": chunk.doc_id,
+        "doc_url": chunk.doc_url if chunk.doc_url else "",
+        "policy_section": chunk.policy_section,
+        "policy_path": chunk.policy_path,
+        "policy_section_level": chunk.policy_section_level,
+        "policy_source": chunk.policy_source.value,
+        "region": chunk.region.value,
+        "content_type": chunk.content_type.value
+    }
+
+def iter_chunk_batches(db: Session, batch_size: int = EMBED_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Stream chunks as Weaviate property dicts, batch_size rows at a time.
+
+    yield_per uses a server-side cursor on Postgres, so only one batch of ORM
+    objects is alive at once instead of the whole table.
+    """
+    stmt = (
+        select(PolicyChunk)
+        .order_by(PolicyChunk.doc_id, PolicyChunk.chunk_index)
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in db.execute(stmt).scalars().partitions():
+        yield [chunk_properties(chunk) for chunk in partition]
+
+def generate_embeddings(texts: List[str], model, batch_size: int = ENCODE_BATCH_SIZE) -> np.ndarray:
+    embeddings = encode_texts(model, texts, batch_size=batch_size)
+    
+    if len(embeddings) > 0:
+        assert embeddings.shape[1] == 384, (
+            f"Expected 384-dimensional embeddings, got {embeddings.shape[1]}"
         )
     
-    return embeddings_list
+    return embeddings
+
+def worker_settings(workers: int, cpu_count: int) -> Tuple[int, int]:
+    """Torch threads and encode batch size for each of `workers` processes.
 
-def ingest_chunks(client: weaviate.Client, chunks: List[PolicyChunk], embeddings: List[List[float]]):
-    print(f"Ingesting {len(chunks)} chunks into Weaviate...")
+    Cores are split evenly so workers don't oversubscribe the machine; batches
+    shrink with the thread count since a single-threaded worker gains nothing
+    from large batches and only pays more padding.
+    """
+    torch_threads = max(1, cpu_count // workers)
+    batch_size = min(128, max(16, 8 * torch_threads))
+    return torch_threads, batch_size
+
+def _init_worker(model_name: str, torch_threads: int):
+    global _worker_model
+    import torch
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name)
+
+def _encode_shard(shard: Tuple[List[str], int]) -> np.ndarray:
+    texts, batch_size = shard
+    return generate_embeddings(texts, _worker_model, batch_size=batch_size)
+
+class ParallelEncoder:
+    """Shards encoding across a pool of processes, each with its own model copy.
+
+    Texts are sorted by character count before sharding so each shard holds
+    similar lengths (workers then bucket by token count within their shard),
+    and results are put back in input order.
+    """
     
-    with client.batch as batch:
-        batch.batch_size = 100
+    def __init__(self, workers: int, model_name: str = EMBEDDING_MODEL, cpu_count: Optional[int] = None):
+        self.workers = workers
+        self.torch_threads, self.batch_size = worker_settings(workers, cpu_count or os.cpu_count() or 1)
+        # spawn, not fork: forking after torch has started its thread pools can deadlock
+        context = multiprocessing.get_context("spawn")
+        self._pool = context.Pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(model_name, self.torch_threads)
+        )
+    
+    @property
+    def step_size(self) -> int:
+        """Chunks per pipeline step: enough for two shards per worker."""
+        return self.workers * self.batch_size * 2
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 384), dtype=np.float32)
         
-        for chunk, embedding in zip(chunks, embeddings):
-            properties = {
-                "chunk_id": str(chunk.chunk_id),
-                "chunk_text": chunk.chunk_text,
-                "doc_id": chunk.doc_id,
-                "doc_url": chunk.doc_url if chunk.doc_url else "",
-                "policy_section": chunk.policy_section,
-                "policy_path": chunk.policy_path,
-                "policy_section_level": chunk.policy_section_level,
-                "policy_source": chunk.policy_source.value,
-                "region": chunk.region.value,
-                "content_type": chunk.content_type.value
-            }
-            
-            batch.add_data_object(
-                data_object=properties,
-                class_name="PolicyChunk",
-                uuid=str(chunk.chunk_id),
-                vector=embedding
-            )
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        shards = [
+            ([texts[i] for i in order[start:start + self.batch_size]], self.batch_size)
+            for start in range(0, len(order), self.batch_size)
+        ]
+        encoded = np.concatenate(self._pool.map(_encode_shard, shards))
+        
+        embeddings = np.empty_like(encoded)
+        embeddings[order] = encoded
+        return embeddings
+    
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def embed_and_upload(
+    client: weaviate.Client,
+    batches: Iterable[List[Dict]],
+    encode: Callable[[List[str]], np.ndarray],
+    queue_depth: int = UPLOAD_QUEUE_DEPTH,
+    class_name: str = LEGACY_CLASS_NAME
+) -> int:
+    """Encode batches on this thread while a consumer thread uploads earlier ones.
+
+    The bounded queue caps memory at queue_depth encoded batches and applies
+    back-pressure to encoding when Weaviate is the slower side. Embedding rows
+    are handed to the Weaviate batch as NumPy arrays; no corpus-wide list of
+    vectors is ever built. Returns the number of chunks uploaded.
+    """
+    uploads = queue.Queue(maxsize=queue_depth)
+    errors = []
+    
+    def _consume():
+        done = False
+        try:
+            with client.batch as batch:
+                batch.batch_size = WEAVIATE_BATCH_SIZE
+                while not done:
+                    item = uploads.get()
+                    if item is _DONE:
+                        done = True
+                        continue
+                    records, embeddings = item
+                    for record, embedding in zip(records, embeddings):
+                        batch.add_data_object(
+                            data_object=record,
+                            class_name=class_name,
+                            uuid=record["chunk_id"],
+                            vector=embedding
+                        )
+        except BaseException as e:
+            errors.append(e)
+            # Keep draining so the producer never blocks on a full queue
+            while not done:
+                done = uploads.get() is _DONE
+    
+    consumer = threading.Thread(target=_consume, name="weaviate-upload", daemon=True)
+    consumer.start()
     
-    print("Ingestion complete")
+    total = 0
+    try:
+        for records in batches:
+            if errors:
+                break
+            embeddings = encode([record["chunk_text"] for record in records])
+            uploads.put((records, embeddings))
+            total += len(records)
+    finally:
+        uploads.put(_DONE)
+        consumer.join()
+    
+    if errors:
+        raise errors[0]
+    
+    return total
+
+def index_count(client: weaviate.Client, class_name: str) -> int:
+    result = client.query.aggregate(class_name).with_meta_count().do()
+    return result['data']['Aggregate'][class_name][0]['meta']['count']
+
+def iter_index_ids(client: weaviate.Client, class_name: str, page_size: int = 1000) -> Iterator[str]:
+    """All object ids in a class via cursor paging, which isn't capped by QUERY_MAXIMUM_RESULTS."""
+    after = None
+    while True:
+        query = client.query.get(class_name, ["chunk_id"]).with_additional(["id"]).with_limit(page_size)
+        if after is not None:
+            query = query.with_after(after)
+        objects = query.do().get("data", {}).get("Get", {}).get(class_name, [])
+        if not objects:
+            return
+        for obj in objects:
+            yield obj["chunk_id"]
+        after = objects[-1]["_additional"]["id"]
+
+def validate_coverage(client: weaviate.Client, db: Session, class_name: str) -> List[str]:
+    """Same checks as tests/test_embedding_coverage.py; returns problems, empty if none."""
+    pg_chunk_ids = set(str(chunk_id) for (chunk_id,) in db.query(PolicyChunk.chunk_id).all())
+    wv_chunk_ids = list(iter_index_ids(client, class_name))
+    unique_wv_ids = set(wv_chunk_ids)
+    
+    wv_count = index_count(client, class_name)
+    
+    problems = []
+    if len(pg_chunk_ids) == 0:
+        problems.append("PostgreSQL has no chunks")
+    if wv_count != len(pg_chunk_ids):
+        problems.append(
+            f"count mismatch: PostgreSQL has {len(pg_chunk_ids)} chunks, "
+            f"{class_name} has {wv_count} vectors"
+        )
+    missing = pg_chunk_ids - unique_wv_ids
+    if missing:
+        problems.append(f"{len(missing)} chunks missing embeddings: {sorted(missing)[:10]}")
+    extra = unique_wv_ids - pg_chunk_ids
+    if extra:
+        problems.append(f"{len(extra)} vectors without a chunk: {sorted(extra)[:10]}")
+    if len(unique_wv_ids) != len(wv_chunk_ids):
+        problems.append(f"{len(wv_chunk_ids) - len(unique_wv_ids)} duplicate vectors")
+    return problems
+
+def garbage_collect_indexes(client: weaviate.Client, db: Session, keep: int = INDEX_VERSIONS_KEEP) -> List[str]:
+    """Drop failed builds and retired versions older than the newest `keep`."""
+    collectable = collectable_index_versions(db, keep_retired=keep, backend="weaviate")
+    deleted = []
+    for index in collectable:
+        if client.schema.exists(index.class_name):
+            client.schema.delete_class(index.class_name)
+        deleted.append(index.class_name)
+        db.delete(index)
+    
+    db.flush()
+    
+    # The pre-versioning class is older than any tracked version, so it goes
+    # once `keep` versioned indexes are retired
+    retired = db.query(VectorIndexVersion).filter(
+        VectorIndexVersion.backend == "weaviate",
+        VectorIndexVersion.status == IndexStatus.RETIRED
+    ).count()
+    if retired >= keep and client.schema.exists(LEGACY_CLASS_NAME):
+        client.schema.delete_class(LEGACY_CLASS_NAME)
+        deleted.append(LEGACY_CLASS_NAME)
+    
+    db.commit()
+    return deleted
+
+def build_index_version(
+    client: weaviate.Client,
+    db: Session,
+    encode: Callable[[List[str]], np.ndarray],
+    step_size: int = EMBED_BATCH_SIZE,
+    index_config: Optional[VectorIndexConfig] = None
+) -> VectorIndexVersion:
+    """Build PolicyChunk_v<n> next to the serving index and promote it if it covers the corpus.
+
+    Queries keep reading the active class throughout; the swap is a single
+    pointer update in Postgres. A build that fails validation is marked failed
+    and never served.
+    """
+    index_config = index_config or load_index_config()
+    index = create_index_version(db, corpus_version=get_corpus_version(db))
+    print(f"Building {index.class_name}...")
+    
+    try:
+        create_schema(client, index.class_name, index_config)
+        total = embed_and_upload(client, iter_chunk_batches(db, step_size), encode, class_name=index.class_name)
+        if index_config.pq_enabled:
+            enable_pq(client, index.class_name, index_config)
+        problems = validate_coverage(client, db, index.class_name)
+    except Exception:
+        db.rollback()
+        mark_index_failed(db, index.version)
+        raise
+    
+    if problems:
+        mark_index_failed(db, index.version)
+        raise RuntimeError(f"{index.class_name} failed validation: " + "; ".join(problems))
+    
+    # Recorded before the swap, so retrievers find them as soon as they see the new class
+    record_filter_stats(db, index.version)
+    return promote_index_version(db, index.version, chunk_count=total)
+
+def embed_to_pgvector(
+    db: Session,
+    table_name: str,
+    batches: Iterable[List[Dict]],
+    encode: Callable[[List[str]], np.ndarray]
+) -> int:
+    """Encode batches into an embeddings table, one INSERT and commit per batch; returns the chunk count."""
+    total = 0
+    for records in batches:
+        embeddings = encode([record["chunk_text"] for record in records])
+        write_embeddings(db, table_name, [record["chunk_id"] for record in records], embeddings)
+        db.commit()
+        total += len(records)
+    return total
+
+def validate_embedding_table(db: Session, table_name: str) -> List[str]:
+    """validate_coverage for a pgvector build; returns problems, empty if none."""
+    problems = []
+    if db.query(func.count(PolicyChunk.chunk_id)).scalar() == 0:
+        problems.append("PostgreSQL has no chunks")
+    missing, extra = embedding_coverage(db, table_name)
+    if missing:
+        problems.append(f"{missing} chunks missing embeddings")
+    if extra:
+        problems.append(f"{extra} embeddings without a chunk")
+    return problems
+
+def build_pgvector_version(
+    db: Session,
+    encode: Callable[[List[str]], np.ndarray],
+    step_size: int = EMBED_BATCH_SIZE,
+    method: str = PGVECTOR_INDEX
+) -> Tuple[VectorIndexVersion, float]:
+    """Build policy_chunk_embeddings_v<n> and its ANN index, and promote it if it covers the corpus.
+
+    The pgvector counterpart of build_index_version: queries keep reading the
+    active table and its index until the pointer swap. Returns the promoted
+    version and the index size in MB. Writes go through a second session,
+    since committing `db` would close the streaming cursor.
+    """
+    index = create_index_version(db, corpus_version=get_corpus_version(db), backend="pgvector")
+    print(f"Building {index.class_name}...")
+    
+    writer = SessionLocal()
+    try:
+        create_embedding_table(writer, index.class_name)
+        total = embed_to_pgvector(writer, index.class_name, iter_chunk_batches(db, step_size), encode)
+        index_mb = build_embedding_index(writer, index.class_name, method)
+        problems = validate_embedding_table(db, index.class_name)
+    except Exception:
+        writer.rollback()
+        db.rollback()
+        mark_index_failed(db, index.version)
+        raise
+    finally:
+        writer.close()
+    
+    if problems:
+        mark_index_failed(db, index.version)
+        raise RuntimeError(f"{index.class_name} failed validation: " + "; ".join(problems))
+    
+    record_filter_stats(db, index.version)
+    return promote_index_version(db, index.version, chunk_count=total), index_mb
+
+def garbage_collect_embedding_tables(db: Session, keep: int = INDEX_VERSIONS_KEEP) -> List[str]:
+    """garbage_collect_indexes for pgvector builds: drop their tables and version rows."""
+    deleted = []
+    for index in collectable_index_versions(db, keep_retired=keep, backend="pgvector"):
+        drop_embedding_table(db, index.class_name)
+        deleted.append(index.class_name)
+        db.delete(index)
+    db.commit()
+    return deleted
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
 
 def main():
+    parser = argparse.ArgumentParser(description="Embed PolicyChunks from PostgreSQL into a new index version")
+    parser.add_argument(
+        "--backend",
+        choices=RETRIEVAL_BACKENDS,
+        default=RETRIEVAL_BACKEND,
+        help="weaviate builds a new Weaviate class; pgvector a new Postgres embeddings table (default: RETRIEVAL_BACKEND)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=EMBED_WORKERS,
+        help="Encoder processes; use more than 1 for full rebuilds on multi-core machines"
+    )
+    parser.add_argument(
+        "--index-profile",
+        choices=sorted(INDEX_PROFILES),
+        help="HNSW settings profile (default: VECTOR_INDEX_PROFILE); VECTOR_INDEX_CONFIG overrides fields"
+    )
+    parser.add_argument(
+        "--promote",
+        type=int,
+        metavar="VERSION",
+        help="Don't build; make an existing (e.g. retired) index version active again"
+    )
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    create_index_tables(db.get_bind())
+    
+    if args.promote is not None:
+        try:
+            index = promote_index_version(db, args.promote)
+            print(f"Promoted {index.class_name}")
+        finally:
+            db.close()
+        return
+    
     print("Starting embedding and ingestion process...")
     print(f"Embedding model: {EMBEDDING_MODEL}")
     
-    print("\nLoading embedding model...")
-    model = SentenceTransformer(EMBEDDING_MODEL)
-    
-    print("Connecting to Weaviate...")
-    client = get_weaviate_client()
+    if db.query(func.count(PolicyChunk.chunk_id)).scalar() == 0:
+        print("No chunks found in database. Run ingestion pipeline first.")
+        db.close()
+        return
     
-    print("Creating schema...")
-    create_schema(client)
+    if args.workers > 1:
+        encoder = ParallelEncoder(args.workers)
+        encode = encoder.encode
+        step_size = encoder.step_size
+        print(
+            f"\nStarted {args.workers} encoder processes "
+            f"({encoder.torch_threads} torch threads, batch size {encoder.batch_size} each)"
+        )
+    else:
+        print("\nLoading embedding model...")
+        model = SentenceTransformer(EMBEDDING_MODEL)
+        encoder = None
+        encode = lambda texts: generate_embeddings(texts, model)
+        step_size = EMBED_BATCH_SIZE
     
-    print("\nLoading chunks from PostgreSQL...")
-    db = SessionLocal()
+    print(f"\nStreaming chunks from PostgreSQL in batches of {step_size}...")
     try:
-        chunks = load_chunks_from_db(db)
-        print(f"Loaded {len(chunks)} chunks")
-        
-        if len(chunks) == 0:
-            print("No chunks found in database. Run ingestion pipeline first.")
+        if args.backend == "pgvector":
+            start = time.perf_counter()
+            index, index_mb = build_pgvector_version(db, encode, step_size)
+            elapsed = time.perf_counter() - start
+            
+            print(f"Embedded {index.chunk_count} chunks into {index.class_name} in {elapsed:.1f}s")
+            print(f"Throughput: {index.chunk_count / elapsed:.1f} chunks/sec")
+            print(f"Built {PGVECTOR_INDEX} index {embedding_index_name(index.class_name)} ({index_mb:.1f} MB)")
+            print(f"\nPromoted {index.class_name}")
+            
+            deleted = garbage_collect_embedding_tables(db)
+            if deleted:
+                print(f"Removed old index versions: {', '.join(deleted)}")
             return
         
-        print("\nGenerating embeddings...")
-        texts = [chunk.chunk_text for chunk in chunks]
-        embeddings = generate_embeddings(texts, model)
+        print("Connecting to Weaviate...")
+        client = get_weaviate_client()
+        
+        start = time.perf_counter()
+        index_config = load_index_config(args.index_profile)
+        index = build_index_version(client, db, encode, step_size, index_config)
+        elapsed = time.perf_counter() - start
         
-        print(f"Generated {len(embeddings)} embeddings")
-        print(f"Embedding dimension: {len(embeddings[0])}")
+        print(f"Embedded and uploaded {index.chunk_count} chunks in {elapsed:.1f}s")
+        print(f"Throughput: {index.chunk_count / elapsed:.1f} chunks/sec")
+        print(f"Peak RSS: {peak_rss_mb():.0f} MB")
+        print(f"\nPromoted {index.class_name} ({index_count(client, index.class_name)} vectors)")
         
-        print("\nIngesting into Weaviate...")
-        ingest_chunks(client, chunks, embeddings)
+        deleted = garbage_collect_indexes(client, db)
+        if deleted:
+            print(f"Removed old index versions: {', '.join(deleted)}")
         
-        count = client.query.aggregate("PolicyChunk").with_meta_count().do()
-        total = count['data']['Aggregate']['PolicyChunk'][0]['meta']['count']
-        print(f"\nTotal chunks in Weaviate: {total}")
+        snapshot = build_snapshot(client, db, index.class_name, force=True)
+        prune_snapshots(current=snapshot)
+        print(f"Wrote corpus snapshot {snapshot}")
         
     finally:
         db.close()
+        if encoder is not None:
+            encoder.close()
 
 if __name__ == "__main__":
     main()
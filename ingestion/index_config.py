@@ -0,0 +1,86 @@
+import os
+import json
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from typing import Dict, Optional
+
+# Named starting points by corpus size; pick with VECTOR_INDEX_PROFILE and
+# confirm with benchmarks/ann_sweep.py on the real deployment
+INDEX_PROFILES = {
+    # Weaviate defaults
+    "default": {},
+    # Up to ~100k chunks: memory is cheap, favour recall
+    "small": {"ef": 128, "ef_construction": 256, "max_connections": 32},
+    # Millions of chunks: bounded query time, compressed vectors
+    "large": {"ef": 96, "ef_construction": 128, "max_connections": 32, "pq_enabled": True, "pq_segments": 96},
+}
+
+VECTOR_INDEX_PROFILE = os.getenv("VECTOR_INDEX_PROFILE", "default")
+# Optional JSON file of VectorIndexConfig fields applied on top of the profile
+VECTOR_INDEX_CONFIG = os.getenv("VECTOR_INDEX_CONFIG")
+
+
+@dataclass(frozen=True)
+class VectorIndexConfig:
+    """HNSW parameters for the PolicyChunk classes, in Weaviate's terms.
+
+    ef is the query-time candidate list (-1 lets Weaviate pick it per query
+    from the limit), ef_construction and max_connections shape the graph at
+    build time. PQ compresses each vector to pq_segments one-byte codes.
+    """
+    distance: str = "cosine"
+    ef: int = -1
+    ef_construction: int = 128
+    max_connections: int = 64
+    pq_enabled: bool = False
+    pq_segments: int = 0
+    pq_centroids: int = 256
+    pq_training_limit: int = 100000
+
+    def __post_init__(self):
+        if self.distance not in ("cosine", "dot", "l2-squared"):
+            raise ValueError(f"Unsupported distance: {self.distance}")
+        if self.pq_segments and 384 % self.pq_segments:
+            raise ValueError(f"pq_segments must divide the embedding dimension (384), got {self.pq_segments}")
+
+    def pq_config(self) -> Dict:
+        return {
+            "enabled": self.pq_enabled,
+            "segments": self.pq_segments,
+            "centroids": self.pq_centroids,
+            "trainingLimit": self.pq_training_limit,
+        }
+
+    def to_weaviate(self) -> Dict:
+        """vectorIndexType/vectorIndexConfig entries for a class definition.
+
+        PQ is left out: Weaviate trains the codebook on existing vectors, so it
+        is switched on with pq_config() after the upload.
+        """
+        return {
+            "vectorIndexType": "hnsw",
+            "vectorIndexConfig": {
+                "distance": self.distance,
+                "ef": self.ef,
+                "efConstruction": self.ef_construction,
+                "maxConnections": self.max_connections,
+            },
+        }
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def load_index_config(profile: Optional[str] = None, path: Optional[str] = None) -> VectorIndexConfig:
+    profile = profile or VECTOR_INDEX_PROFILE
+    if profile not in INDEX_PROFILES:
+        raise ValueError(f"Unknown vector index profile {profile!r}; expected one of {sorted(INDEX_PROFILES)}")
+
+    config = VectorIndexConfig(**INDEX_PROFILES[profile])
+
+    path = path or VECTOR_INDEX_CONFIG
+    if path:
+        with open(Path(path), "r", encoding="utf-8") as f:
+            config = replace(config, **json.load(f))
+
+    return config
@@ -0,0 +1,77 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.session import SessionLocal
+from db.corpus import get_corpus_version
+from app.retrieval import get_retriever
+from app.generation import generate_policy_response
+from app.answer_store import AnswerStore, PrecomputedAnswer, ANSWER_STORE_PATH
+
+QUESTIONS_FILE = Path(__file__).parent.parent / "data" / "canonical_questions.txt"
+
+
+def load_questions(path: Path) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def precompute_answers(questions: List[str], corpus_version: str, limit: int = 5) -> AnswerStore:
+    retriever = get_retriever()
+    embeddings = retriever.encode_queries(questions)
+
+    entries = []
+    for question, embedding in zip(questions, embeddings):
+        # Offline work: the batch lane yields LLM slots to interactive queries
+        response = generate_policy_response(question, limit=limit, priority="batch", use_precomputed=False)
+
+        # Only answers that passed citation validation are worth serving
+        if response.refused:
+            print(f"  skipped (refused: {response.refusal_reason}): {question}")
+            continue
+
+        entries.append(PrecomputedAnswer(
+            question=question,
+            answer=response.answer,
+            citations=[c.to_dict() for c in response.citations],
+            doc_ids=sorted({c.doc_id for c in response.citations}),
+            corpus_version=corpus_version,
+            created_at=time.time(),
+            embedding=embedding.tolist()
+        ))
+        print(f"  stored ({len(response.citations)} citations): {question}")
+
+    return AnswerStore(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute answers for canonical questions")
+    parser.add_argument("--questions", type=Path, default=QUESTIONS_FILE)
+    parser.add_argument("--output", type=Path, default=ANSWER_STORE_PATH)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    print(f"Loaded {len(questions)} questions from {args.questions}")
+
+    db = SessionLocal()
+    try:
+        corpus_version = get_corpus_version(db)
+    finally:
+        db.close()
+    print(f"Corpus version: {corpus_version}")
+
+    print("\nGenerating answers...")
+    store = precompute_answers(questions, corpus_version, limit=args.limit)
+
+    store.save(args.output)
+    print(f"\nSaved {len(store)} precomputed answers to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
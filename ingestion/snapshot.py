@@ -0,0 +1,129 @@
+import weaviate
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional, Tuple
+import sys
+import os
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from db.session import SessionLocal
+from db.models import PolicyChunk
+from db.corpus import get_corpus_version
+from db.index_versions import get_active_class_name
+from app.snapshot import SnapshotWriter, CorpusSnapshot, snapshot_path, CORPUS_SNAPSHOT_DIR
+
+EMBEDDING_DIMENSION = 384
+# Snapshots of older corpus versions kept next to the current one
+SNAPSHOTS_KEEP = max(1, int(os.getenv("SNAPSHOTS_KEEP", "2")))
+
+def iter_index_vectors(client: weaviate.Client, class_name: str, page_size: int = 500) -> Iterator[Tuple[str, List[float]]]:
+    """(chunk_id, vector) for every object, in UUID order (the cursor's order, and chunk_id == UUID)."""
+    after = None
+    while True:
+        query = client.query.get(class_name, ["chunk_id"]).with_additional(["id", "vector"]).with_limit(page_size)
+        if after is not None:
+            query = query.with_after(after)
+        objects = query.do().get("data", {}).get("Get", {}).get(class_name, [])
+        if not objects:
+            return
+        for obj in objects:
+            yield obj["chunk_id"], obj["_additional"]["vector"]
+        after = objects[-1]["_additional"]["id"]
+
+def build_snapshot(
+    client: weaviate.Client,
+    db: Session,
+    class_name: str,
+    directory: Path = CORPUS_SNAPSHOT_DIR,
+    force: bool = False
+) -> Path:
+    """Write the snapshot for the current corpus version from Postgres rows and index vectors.
+
+    Both sides are streamed in chunk_id order and merged, so only the
+    snapshot arrays are held in memory. A snapshot that already exists for
+    this corpus version is left untouched unless force is set.
+    """
+    corpus_version = get_corpus_version(db)
+    path = snapshot_path(corpus_version, directory)
+    if path.exists() and not force:
+        return path
+
+    count = db.query(func.count(PolicyChunk.chunk_id)).scalar()
+    writer = SnapshotWriter(corpus_version, count, EMBEDDING_DIMENSION)
+
+    rows = db.query(
+        PolicyChunk.chunk_id,
+        PolicyChunk.chunk_text,
+        PolicyChunk.policy_section,
+        PolicyChunk.policy_path,
+        PolicyChunk.policy_section_level,
+        PolicyChunk.doc_id,
+        PolicyChunk.doc_url,
+        PolicyChunk.policy_source,
+        PolicyChunk.region,
+        PolicyChunk.content_type
+    ).order_by(PolicyChunk.chunk_id).execution_options(yield_per=5000)
+
+    vectors = iter_index_vectors(client, class_name)
+    vector_id, vector = next(vectors, (None, None))
+    for row in rows:
+        chunk_id = str(row.chunk_id)
+        # Skip index objects without a chunk; they are never returned by retrieval
+        while vector_id is not None and vector_id < chunk_id:
+            vector_id, vector = next(vectors, (None, None))
+        if vector_id != chunk_id:
+            raise ValueError(f"Chunk {chunk_id} has no vector in {class_name}; rebuild the index first")
+
+        writer.add(chunk_id, vector, row._asdict())
+        vector_id, vector = next(vectors, (None, None))
+
+    return writer.write(path)
+
+def prune_snapshots(directory: Path = CORPUS_SNAPSHOT_DIR, current: Optional[Path] = None, keep: int = SNAPSHOTS_KEEP) -> List[Path]:
+    """Delete all but the newest `keep` older snapshots.
+
+    Workers still mapping a deleted file keep reading it; the pages are
+    released when they switch to the new snapshot.
+    """
+    older = sorted(
+        (path for path in directory.glob("corpus_*.snap") if path != current),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True
+    )
+    removed = older[keep:]
+    for path in removed:
+        path.unlink()
+    return removed
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the memory-mapped corpus snapshot for the current corpus version")
+    parser.add_argument("--force", action="store_true", help="Rewrite the snapshot even if one exists for this version")
+    parser.add_argument("--output-dir", type=Path, default=CORPUS_SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    from ingestion.embed import get_weaviate_client
+
+    db = SessionLocal()
+    try:
+        class_name = get_active_class_name(db)
+        print(f"Reading chunks from PostgreSQL and vectors from {class_name}...")
+
+        start = time.perf_counter()
+        path = build_snapshot(get_weaviate_client(), db, class_name, args.output_dir, force=args.force)
+        elapsed = time.perf_counter() - start
+
+        snapshot = CorpusSnapshot(path)
+        print(f"Snapshot {path} ({len(snapshot)} chunks, {path.stat().st_size / 2 ** 20:.1f} MB) in {elapsed:.1f}s")
+
+        removed = prune_snapshots(args.output_dir, current=path)
+        if removed:
+            print(f"Removed old snapshots: {', '.join(p.name for p in removed)}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app.retrieval import HybridRetriever
+
+
+@pytest.fixture
+def make_retriever(mocker):
+    """
+    Build HybridRetrievers through the real __init__ with the model, Weaviate
+    and Postgres stubbed out.
+
+    The baseline is a plain flat retriever: two-phase fetch, no diversity, no
+    adaptive overfetch and no chunk catalog. Keyword arguments are set as
+    attributes afterwards, e.g. make_retriever(diversity="mmr", _catalog=catalog).
+    """
+    mocker.patch("app.retrieval.SentenceTransformer")
+    mocker.patch("app.retrieval.weaviate.Client")
+    # Keeps the pgvector backend from registering its connect listener on the real engine
+    mocker.patch("app.retrieval.event")
+    mocker.patch("app.retrieval.EMBEDDING_SERVICE_SOCKET", None)
+    mocker.patch("app.retrieval.EMBED_MICROBATCH", False)
+    mocker.patch("app.retrieval.CHUNK_CATALOG", False)
+    mocker.patch("app.retrieval.RETRIEVAL_TWO_PHASE", True)
+    mocker.patch("app.retrieval.RETRIEVAL_DIVERSITY", "none")
+    mocker.patch("app.retrieval.RETRIEVAL_MODE", "flat")
+    mocker.patch("app.retrieval.ADAPTIVE_OVERFETCH", False)
+    created = []
+
+    def _make(backend: str = "weaviate", **attributes) -> HybridRetriever:
+        retriever = HybridRetriever(backend=backend)
+        for name, value in attributes.items():
+            setattr(retriever, name, value)
+        created.append(retriever)
+        return retriever
+
+    yield _make
+    for retriever in created:
+        retriever._executor.shutdown(wait=False)
@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app.selectivity import FilterSelectivity, overfetch_limit
+
+STATS = {
+    "region": {"global": 900, "uk": 100},
+    "content_type": {"general": 800, "video": 200},
+    "policy_source": {"google": 1000},
+}
+
+
+def test_selectivity_multiplies_independent_filters():
+    """
+    Each filter contributes its share of the index; unseen values count as one chunk.
+    """
+    selectivity = FilterSelectivity(STATS)
+
+    assert selectivity.fraction() == 1.0
+    assert selectivity.fraction(region="UK") == pytest.approx(0.1)
+    assert selectivity.fraction(region="uk", content_type="video") == pytest.approx(0.02)
+    assert selectivity.fraction(region="eu") == pytest.approx(0.001)
+
+
+def test_overfetch_scales_with_selectivity():
+    """
+    Unfiltered queries fetch less than limit * 3; selective filters fetch more, up to the cap.
+    """
+    assert overfetch_limit(5, has_filters=False) == 10
+    assert overfetch_limit(5, has_filters=True, fraction=None) == 15
+    assert overfetch_limit(5, has_filters=True, fraction=0.9) == 9
+    assert overfetch_limit(5, has_filters=True, fraction=0.1) == 75
+    assert overfetch_limit(5, has_filters=True, fraction=0.0001, max_candidates=500) == 500
+
+
+@pytest.fixture
+def retriever(make_retriever, mocker):
+    """Adaptive-overfetch HybridRetriever with recorded stats, without Weaviate or Postgres."""
+    instance = make_retriever(two_phase=False, adaptive_overfetch=True)
+    mocker.patch.object(instance, "filter_selectivity", return_value=FilterSelectivity(STATS))
+    return instance
+
+
+def _hits(prefix, count, start=0):
+    return [
+        {"chunk_id": f"{prefix}{i}", "policy_section_level": "H3", "_additional": {"distance": 0.01 * i}}
+        for i in range(start, start + count)
+    ]
+
+
+def test_widening_stops_once_limit_results_pass(retriever, mocker):
+    """
+    The first round is sized from the stats; when fewer than `limit` pass,
+    the next page is fetched with an offset, and widening stops once enough do.
+    """
+    pages = {0: _hits("c", 75), 75: _hits("c", 225, start=75)}
+    search = mocker.patch.object(
+        retriever, "vector_search", side_effect=lambda query, limit, fields=None, offset=0, **_: pages[offset][:limit]
+    )
+    # Only three of the first page, and plenty of the second, are UK chunks
+    allowed = {"c1", "c2", "c3"} | {f"c{i}" for i in range(100, 140)}
+    mocker.patch.object(
+        retriever, "_filter_candidates", side_effect=lambda ids, *filters: {i for i in ids if i in allowed}
+    )
+
+    results = retriever.retrieve("alcohol", limit=5, region="uk")
+
+    assert [(c.kwargs["limit"], c.kwargs.get("offset", 0)) for c in search.call_args_list] == [(75, 0), (225, 75)]
+    # The widening page reuses the first page's query vector
+    assert search.call_args_list[1].kwargs["query_vector"] is search.call_args_list[0].kwargs["query_vector"]
+    assert len(results) == 5
+    assert all(r.chunk_id in allowed for r in results)
+
+
+def test_exhausted_index_is_not_widened(retriever, mocker):
+    """
+    A short first page means there is nothing more to fetch.
+    """
+    search = mocker.patch.object(retriever, "vector_search", return_value=_hits("c", 10))
+    mocker.patch.object(retriever, "_filter_candidates", return_value={"c1"})
+
+    results = retriever.retrieve("alcohol", limit=5, region="uk")
+
+    search.assert_called_once()
+    assert [r.chunk_id for r in results] == ["c1"]
@@ -0,0 +1,140 @@
+import sys
+import time
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.admission import LLMAdmissionController, AdmissionRejected, queue_wait_ms
+from api.main import app
+
+
+def _hold_slot(controller, lane, hold_s, started=None, order=None, name=None):
+    with controller.slot(lane):
+        if order is not None:
+            order.append(name)
+        if started is not None:
+            started.set()
+        time.sleep(hold_s)
+
+
+def test_concurrency_is_bounded():
+    """
+    No more than max_concurrency generations run at the same time.
+    """
+    controller = LLMAdmissionController(max_concurrency=2, queue_timeout_s=5)
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def _work():
+        with controller.slot("interactive"):
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            time.sleep(0.05)
+            with lock:
+                running["now"] -= 1
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert running["peak"] == 2
+
+
+def test_full_queue_rejects_with_429():
+    """
+    When a lane's queue is full, new requests are rejected immediately.
+    """
+    controller = LLMAdmissionController(
+        max_concurrency=1,
+        queue_timeout_s=5,
+        lane_queue_depth={"interactive": 1, "batch": 1}
+    )
+    started = threading.Event()
+    holder = threading.Thread(target=_hold_slot, args=(controller, "interactive", 0.3, started))
+    holder.start()
+    started.wait()
+    waiter = threading.Thread(target=_hold_slot, args=(controller, "interactive", 0))
+    waiter.start()
+    time.sleep(0.05)
+
+    start = time.monotonic()
+    with pytest.raises(AdmissionRejected) as exc:
+        with controller.slot("interactive"):
+            pass
+
+    assert exc.value.status_code == 429
+    assert exc.value.retry_after >= 1
+    assert time.monotonic() - start < 0.1
+
+    holder.join()
+    waiter.join()
+
+
+def test_queue_time_budget_rejects_with_503():
+    """
+    Requests that wait longer than the queue-time budget get a 503.
+    """
+    controller = LLMAdmissionController(max_concurrency=1, queue_timeout_s=0.1)
+    started = threading.Event()
+    holder = threading.Thread(target=_hold_slot, args=(controller, "batch", 0.5, started))
+    holder.start()
+    started.wait()
+
+    with pytest.raises(AdmissionRejected) as exc:
+        with controller.slot("batch"):
+            pass
+
+    assert exc.value.status_code == 503
+    holder.join()
+
+
+def test_interactive_lane_served_before_batch():
+    """
+    A freed slot goes to waiting interactive requests before earlier batch ones.
+    """
+    controller = LLMAdmissionController(max_concurrency=1, queue_timeout_s=5)
+    started = threading.Event()
+    order = []
+    holder = threading.Thread(target=_hold_slot, args=(controller, "batch", 0.2, started))
+    holder.start()
+    started.wait()
+
+    batch = threading.Thread(target=_hold_slot, args=(controller, "batch", 0, None, order, "batch"))
+    batch.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(
+        target=_hold_slot, args=(controller, "interactive", 0, None, order, "interactive")
+    )
+    interactive.start()
+
+    for t in (holder, batch, interactive):
+        t.join()
+
+    assert order == ["interactive", "batch"]
+    assert queue_wait_ms.count(lane="interactive") > 0
+
+
+def test_api_maps_rejection_to_retry_after(mocker):
+    """
+    /query returns the rejection status with a Retry-After header.
+    """
+    mocker.patch(
+        "api.main.coalesced_policy_response",
+        side_effect=AdmissionRejected("LLM queue full for batch requests", 429, 7)
+    )
+    client = TestClient(app)
+
+    response = client.post(
+        "/query",
+        json={"query": "Can I advertise alcohol?", "priority": "batch"}
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
@@ -0,0 +1,182 @@
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+from app import answer_store
+from app.answer_store import AnswerStore, PrecomputedAnswer
+from app.generation import generate_policy_response, fit_precomputed_answer
+from ingestion import precompute_answers
+
+CHUNK_ID = "0f8a6c1e-2b3d-4e5f-8a9b-0c1d2e3f4a5b"
+
+
+def _entry(question, embedding, doc_ids=("google_ads_alcohol_2025-12-24",)):
+    return PrecomputedAnswer(
+        question=question,
+        answer=f"Alcohol ads are restricted. [SOURCE:{CHUNK_ID}]",
+        citations=[{
+            "chunk_id": CHUNK_ID,
+            "policy_path": "Restricted content > Alcohol",
+            "doc_id": doc_ids[0],
+            "doc_url": "https://example.com"
+        }],
+        doc_ids=list(doc_ids),
+        corpus_version="abc123",
+        created_at=0.0,
+        embedding=list(embedding)
+    )
+
+
+STORE = AnswerStore([
+    _entry("Can I advertise alcohol?", [1.0, 0.0, 0.0]),
+    _entry("Are gambling ads allowed?", [0.0, 1.0, 0.0], doc_ids=("google_ads_gambling_2025-12-24",)),
+])
+CURRENT_DOCS = {"google_ads_alcohol_2025-12-24", "google_ads_gambling_2025-12-24"}
+
+
+def test_close_paraphrase_is_served():
+    match = STORE.lookup(np.array([0.98, 0.1, 0.0]), CURRENT_DOCS)
+
+    assert match is not None
+    entry, similarity = match
+    assert entry.question == "Can I advertise alcohol?"
+    assert similarity > 0.92
+
+
+def test_distant_query_is_not_served():
+    assert STORE.lookup(np.array([0.6, 0.6, 0.5]), CURRENT_DOCS) is None
+
+
+def test_entries_expire_when_cited_document_is_reversioned():
+    """
+    A new download date for a cited document invalidates the stored answer.
+    """
+    updated_docs = {"google_ads_alcohol_2026-03-01", "google_ads_gambling_2025-12-24"}
+
+    assert STORE.lookup(np.array([1.0, 0.0, 0.0]), updated_docs) is None
+    assert [e.question for e in STORE.expire(updated_docs).entries] == ["Are gambling ads allowed?"]
+
+
+def test_store_round_trips_through_disk(tmp_path):
+    path = tmp_path / "answers.json"
+    STORE.save(path)
+
+    loaded = AnswerStore.load(path)
+
+    assert len(loaded) == 2
+    assert loaded.lookup(np.array([0.0, 1.0, 0.0]), CURRENT_DOCS)[0].question == "Are gambling ads allowed?"
+
+
+def test_generation_serves_precomputed_answer_without_retrieval(mocker):
+    """
+    A hit skips retrieval and the LLM entirely.
+    """
+    mocker.patch("app.generation.answer_store_available", return_value=True)
+    mocker.patch("app.generation.get_retriever")
+    mocker.patch("app.generation.lookup_precomputed_answer", return_value=(STORE.entries[0], 0.97))
+    retrieve = mocker.patch("app.generation.retrieve_policy_chunks")
+
+    response = generate_policy_response("can i advertise alcohol")
+
+    retrieve.assert_not_called()
+    assert response.refused is False
+    assert response.finish_reason == "precomputed"
+    assert response.citations[0].chunk_id == CHUNK_ID
+
+
+def test_store_miss_reuses_the_query_vector_for_retrieval(mocker):
+    """
+    On a miss, retrieval gets the vector the store lookup used instead of
+    encoding the query a second time.
+    """
+    mocker.patch("app.generation.answer_store_available", return_value=True)
+    retriever = mocker.patch("app.generation.get_retriever").return_value
+    mocker.patch("app.generation.lookup_precomputed_answer", return_value=None)
+    retrieve = mocker.patch("app.generation.retrieve_policy_chunks", return_value=[])
+
+    generate_policy_response("can i advertise alcohol")
+
+    retriever.encode_query.assert_called_once_with("can i advertise alcohol")
+    assert retrieve.call_args.kwargs["query_vector"] is retriever.encode_query.return_value
+
+
+def test_filtered_queries_bypass_precomputed_answers(mocker):
+    lookup = mocker.patch("app.generation.lookup_precomputed_answer")
+    mocker.patch("app.generation.answer_store_available", return_value=True)
+    mocker.patch("app.generation.retrieve_policy_chunks", return_value=[])
+
+    response = generate_policy_response("can i advertise alcohol", region="uk")
+
+    lookup.assert_not_called()
+    assert response.refused is True
+
+
+def test_precomputed_answer_is_held_to_limit_and_max_tokens():
+    """
+    A stored answer citing more chunks than `limit` is not served, and one
+    longer than max_tokens is cut back to its last complete cited sentence.
+    """
+    other_id = "1a2b3c4d-5e6f-4a7b-8c9d-0e1f2a3b4c5d"
+    entry = replace(
+        STORE.entries[0],
+        answer=f"Alcohol ads are restricted. [SOURCE:{CHUNK_ID}] Some countries ban them outright. [SOURCE:{other_id}]",
+        citations=STORE.entries[0].citations + [dict(STORE.entries[0].citations[0], chunk_id=other_id)]
+    )
+
+    assert fit_precomputed_answer(entry, limit=1) is None
+
+    answer, citations, finish_reason = fit_precomputed_answer(entry, limit=1, max_tokens=7)
+    assert answer == f"Alcohol ads are restricted. [SOURCE:{CHUNK_ID}]"
+    assert [c["chunk_id"] for c in citations] == [CHUNK_ID]
+    assert finish_reason == "max_tokens"
+
+    assert fit_precomputed_answer(entry, limit=5)[2] == "precomputed"
+
+
+def test_doc_id_refresh_does_not_block_lookups(tmp_path, mocker):
+    """
+    After the first load, the doc_id query runs in the background while
+    lookups keep using the previous set.
+    """
+    path = tmp_path / "answers.json"
+    STORE.save(path)
+    handle = answer_store._StoreHandle(path)
+    mocker.patch("app.answer_store.SessionLocal")
+    release = threading.Event()
+    doc_ids = mocker.patch("app.answer_store.get_current_doc_ids", return_value=CURRENT_DOCS)
+
+    assert handle.get()[1] == CURRENT_DOCS
+
+    doc_ids.side_effect = lambda db: release.wait(5) and {"google_ads_alcohol_2026-03-01"}
+    handle._doc_ids_loaded_at -= answer_store.DOC_IDS_REFRESH_S + 1
+    start = time.monotonic()
+    assert handle.get()[1] == CURRENT_DOCS
+    assert handle.get()[1] == CURRENT_DOCS
+    assert time.monotonic() - start < 1.0
+
+    release.set()
+    for _ in range(50):
+        if handle.get()[1] != CURRENT_DOCS:
+            break
+        time.sleep(0.02)
+    assert handle.get()[1] == {"google_ads_alcohol_2026-03-01"}
+    assert doc_ids.call_count == 2
+
+
+def test_precompute_job_generates_in_the_batch_lane(mocker):
+    """
+    The offline job never competes with live traffic at interactive priority.
+    """
+    mocker.patch("ingestion.precompute_answers.get_retriever").return_value.encode_queries.return_value = [[0.0]]
+    generate = mocker.patch("ingestion.precompute_answers.generate_policy_response")
+    generate.return_value.refused = True
+
+    precompute_answers.precompute_answers(["can i advertise alcohol"], corpus_version="abc")
+
+    assert generate.call_args.kwargs["priority"] == "batch"
@@ -0,0 +1,110 @@
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app.chunk_catalog import ChunkCatalog
+from db.models import PolicySource, Region, ContentType
+
+
+def _row(chunk_id, region=Region.GLOBAL, content_type=ContentType.GENERAL, level="H3"):
+    return SimpleNamespace(
+        chunk_id=chunk_id,
+        chunk_text=f"text {chunk_id}",
+        policy_section="Alcohol",
+        policy_path="Restricted content > Alcohol",
+        policy_section_level=level,
+        doc_id="google_ads_alcohol_2025-12-24",
+        doc_url="https://support.google.com/adspolicy/answer/6012382",
+        policy_source=PolicySource.GOOGLE,
+        region=region,
+        content_type=content_type,
+    )
+
+
+@pytest.fixture
+def catalog():
+    return ChunkCatalog("v1", [
+        _row("a"),
+        _row("b", region=Region.US),
+        _row("c", content_type=ContentType.VIDEO),
+        _row("d", region=Region.US, content_type=ContentType.VIDEO),
+    ])
+
+
+def test_filter_matches_sql_semantics(catalog):
+    """
+    Candidates are kept if they exist and match every given filter; filter
+    values are parsed like the SQL path, case and whitespace insensitive.
+    """
+    candidates = ["a", "b", "c", "d", "missing"]
+
+    assert catalog.filter(candidates) == {"a", "b", "c", "d"}
+    assert catalog.filter(candidates, region="us") == {"b", "d"}
+    assert catalog.filter(candidates, region=" US ", content_type="video") == {"d"}
+    assert catalog.filter(candidates, policy_source="google", content_type="general") == {"a", "b"}
+    assert catalog.filter([], region="us") == set()
+
+    with pytest.raises(ValueError):
+        catalog.filter(candidates, region="mars")
+
+
+def test_hydrate_returns_retrieval_fields(catalog):
+    """
+    Hydration gives the same string values the Postgres lookup does, and
+    repeated strings are stored once.
+    """
+    hydrated = catalog.hydrate(["d", "missing", "a"])
+
+    assert list(hydrated) == ["d", "a"]
+    assert hydrated["d"]["region"] == "us"
+    assert hydrated["d"]["content_type"] == "video"
+    assert hydrated["d"]["policy_source"] == "google"
+    assert hydrated["a"]["chunk_text"] == "text a"
+    assert catalog.policy_paths[0] is catalog.policy_paths[3]
+
+
+def test_retrieve_uses_catalog_without_postgres(make_retriever, catalog, mocker):
+    """
+    With a catalog loaded, filtered retrieval neither opens a session nor
+    runs the Postgres candidate filter.
+    """
+    retriever = make_retriever(_catalog=catalog, _catalog_checked_at=time.monotonic())
+
+    mocker.patch.object(retriever, "vector_search", return_value=[
+        {"chunk_id": chunk_id, "policy_section_level": "H3", "_additional": {"distance": 0.1 * i}}
+        for i, chunk_id in enumerate(["a", "b", "c", "d"])
+    ])
+    session = mocker.patch("app.retrieval.SessionLocal", side_effect=AssertionError("Postgres queried"))
+    candidates = mocker.patch.object(retriever, "_filter_candidates")
+
+    results = retriever.retrieve("alcohol", limit=5, region="us")
+
+    assert [r.chunk_id for r in results] == ["b", "d"]
+    assert results[0].chunk_text == "text b"
+    session.assert_not_called()
+    candidates.assert_not_called()
+
+
+def test_catalog_reloads_only_on_corpus_version_change(make_retriever, catalog, mocker):
+    """
+    The periodic check compares corpus versions and reloads only when the
+    version moved.
+    """
+    retriever = make_retriever(_catalog=catalog)
+    mocker.patch("app.retrieval.SessionLocal")
+    mocker.patch("app.retrieval.open_snapshot", return_value=None)
+    reloaded = ChunkCatalog("v2", [_row("e")])
+    load = mocker.patch.object(ChunkCatalog, "load", return_value=reloaded)
+
+    mocker.patch("app.retrieval.get_corpus_version", return_value="v1")
+    retriever._refresh_catalog()
+    assert retriever._catalog is catalog
+    load.assert_not_called()
+
+    mocker.patch("app.retrieval.get_corpus_version", return_value="v2")
+    retriever._refresh_catalog()
+    assert retriever._catalog is reloaded
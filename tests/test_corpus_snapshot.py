@@ -0,0 +1,147 @@
+import sys
+import uuid
+from collections import namedtuple
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+from app.chunk_catalog import ChunkCatalog
+from app.snapshot import SnapshotWriter, CorpusSnapshot, open_snapshot, snapshot_path
+from db.models import PolicySource, Region, ContentType
+from ingestion.snapshot import build_snapshot
+
+
+def _row(chunk_id, region=Region.GLOBAL, content_type=ContentType.GENERAL):
+    return SimpleNamespace(
+        chunk_id=chunk_id,
+        chunk_text=f"text {chunk_id}",
+        policy_section="Alcohol",
+        policy_path="Restricted content > Alcohol",
+        policy_section_level="H3",
+        doc_id="google_ads_alcohol_2025-12-24",
+        doc_url="https://support.google.com/adspolicy/answer/6012382",
+        policy_source=PolicySource.GOOGLE,
+        region=region,
+        content_type=content_type,
+    )
+
+
+def _chunk_ids(n):
+    return sorted(str(uuid.UUID(int=i * 7919 + 1)) for i in range(n))
+
+
+def _write(tmp_path, rows, vectors, version="abc123"):
+    writer = SnapshotWriter(version, len(rows), vectors.shape[1])
+    for row, vector in zip(rows, vectors):
+        writer.add(row.chunk_id, vector, vars(row))
+    return writer.write(snapshot_path(version, tmp_path))
+
+
+@pytest.fixture
+def rows():
+    ids = _chunk_ids(4)
+    return [
+        _row(ids[0]),
+        _row(ids[1], region=Region.US),
+        _row(ids[2], content_type=ContentType.VIDEO),
+        _row(ids[3], region=Region.US, content_type=ContentType.VIDEO),
+    ]
+
+
+def test_snapshot_round_trip_is_memory_mapped(tmp_path, rows):
+    """
+    Vectors, texts and metadata read back from the file, as read-only views
+    of a single mapping.
+    """
+    rows[2].chunk_text = "Alkohol — Werbung für Bier ist eingeschränkt"
+    vectors = np.random.default_rng(0).standard_normal((4, 8)).astype(np.float32)
+    path = _write(tmp_path, rows, vectors)
+
+    snapshot = open_snapshot("abc123", tmp_path)
+
+    assert snapshot.version == "abc123"
+    assert len(snapshot) == 4
+    assert np.array_equal(snapshot.vectors, vectors)
+    assert isinstance(snapshot.vectors, np.memmap)
+    assert not snapshot.vectors.flags.writeable
+    assert snapshot.text(2) == rows[2].chunk_text
+    assert open_snapshot("other", tmp_path) is None
+    assert not list(tmp_path.glob("*.tmp"))
+    assert path.name == "corpus_abc123.snap"
+
+
+def test_snapshot_matches_catalog(tmp_path, rows):
+    """
+    Filtering and hydration give the same answers as the Postgres-loaded
+    ChunkCatalog, including for unknown and malformed ids.
+    """
+    snapshot = CorpusSnapshot(_write(tmp_path, rows, np.zeros((4, 8), dtype=np.float32)))
+    catalog = ChunkCatalog("abc123", rows)
+    candidates = [row.chunk_id for row in rows] + [str(uuid.uuid4()), "not-a-uuid"]
+
+    for filters in ({}, {"region": "us"}, {"region": "US", "content_type": "video"}, {"policy_source": "google"}):
+        assert snapshot.filter(candidates, **filters) == catalog.filter(candidates, **filters)
+    assert snapshot.hydrate(candidates[::-1]) == catalog.hydrate(candidates[::-1])
+
+    with pytest.raises(ValueError):
+        snapshot.filter(candidates, region="mars")
+
+
+def test_writer_requires_sorted_unique_ids(rows):
+    """
+    The chunk_id column is the index, so rows must arrive in chunk_id order.
+    """
+    writer = SnapshotWriter("v", 4, 8)
+    writer.add(rows[1].chunk_id, np.zeros(8), vars(rows[1]))
+
+    with pytest.raises(ValueError):
+        writer.add(rows[0].chunk_id, np.zeros(8), vars(rows[0]))
+    with pytest.raises(ValueError):
+        writer.add(rows[1].chunk_id, np.zeros(8), vars(rows[1]))
+
+
+def test_retriever_prefers_snapshot_over_postgres_load(make_retriever, tmp_path, rows, mocker):
+    """
+    When ingestion wrote a snapshot for the current corpus version, the
+    retriever maps it instead of copying the chunks out of Postgres.
+    """
+    _write(tmp_path, rows, np.zeros((4, 8), dtype=np.float32))
+    retriever = make_retriever()
+    mocker.patch("app.retrieval.SessionLocal")
+    mocker.patch("app.retrieval.get_corpus_version", return_value="abc123")
+    mocker.patch("app.retrieval.open_snapshot", side_effect=lambda version: open_snapshot(version, tmp_path))
+    load = mocker.patch.object(ChunkCatalog, "load")
+
+    retriever._refresh_catalog()
+
+    assert isinstance(retriever._catalog, CorpusSnapshot)
+    load.assert_not_called()
+
+
+def test_build_snapshot_merges_rows_with_index_vectors(tmp_path, rows, mocker):
+    """
+    Postgres rows and index vectors are merged in chunk_id order; vectors
+    without a chunk are skipped, a chunk without a vector fails the build.
+    """
+    Row = namedtuple("Row", vars(rows[0]))
+    db_rows = [Row(**vars(row)) for row in rows]
+    orphan = str(uuid.UUID(int=0))
+    vectors = [(orphan, [9.0] * 384)] + [(row.chunk_id, [float(i)] * 384) for i, row in enumerate(rows)]
+
+    db = mocker.MagicMock()
+    db.query.return_value.scalar.return_value = len(rows)
+    db.query.return_value.order_by.return_value.execution_options.return_value = db_rows
+    mocker.patch("ingestion.snapshot.get_corpus_version", return_value="abc123")
+    index = mocker.patch("ingestion.snapshot.iter_index_vectors", return_value=iter(vectors))
+
+    snapshot = CorpusSnapshot(build_snapshot(None, db, "PolicyChunk_v1", tmp_path))
+
+    assert snapshot.vectors[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert snapshot.hydrate([rows[3].chunk_id])[rows[3].chunk_id]["region"] == "us"
+
+    index.return_value = iter(vectors[:2] + vectors[3:])
+    with pytest.raises(ValueError):
+        build_snapshot(None, db, "PolicyChunk_v1", tmp_path, force=True)
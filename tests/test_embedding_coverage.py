@@ -3,19 +3,22 @@ import weaviate
 from sqlalchemy import func
 from db.session import SessionLocal
 from db.models import PolicyChunk
+from db.index_versions import current_class_name
 
 def test_embedding_coverage():
     """
     Test that every PostgreSQL chunk has exactly one vector in Weaviate.
     """
+    class_name = current_class_name()
+    
     db = SessionLocal()
     client = weaviate.Client("http://localhost:8080")
     
     try:
         pg_count = db.query(func.count(PolicyChunk.chunk_id)).scalar()
         
-        result = client.query.aggregate("PolicyChunk").with_meta_count().do()
-        wv_count = result['data']['Aggregate']['PolicyChunk'][0]['meta']['count']
+        result = client.query.aggregate(class_name).with_meta_count().do()
+        wv_count = result['data']['Aggregate'][class_name][0]['meta']['count']
         
         assert pg_count == wv_count, (
             f"Embedding coverage mismatch: PostgreSQL has {pg_count} chunks, "
@@ -29,6 +32,8 @@ def test_no_missing_embeddings():
     """
     Test that no chunks are missing embeddings.
     """
+    class_name = current_class_name()
+    
     db = SessionLocal()
     client = weaviate.Client("http://localhost:8080")
     
@@ -37,11 +42,11 @@ def test_no_missing_embeddings():
             str(chunk_id) for (chunk_id,) in db.query(PolicyChunk.chunk_id).all()
         )
         
-        result = client.query.aggregate("PolicyChunk").with_meta_count().do()
-        wv_count = result['data']['Aggregate']['PolicyChunk'][0]['meta']['count']
+        result = client.query.aggregate(class_name).with_meta_count().do()
+        wv_count = result['data']['Aggregate'][class_name][0]['meta']['count']
         
-        result = client.query.get("PolicyChunk", ["chunk_id"]).with_limit(wv_count).do()
-        wv_chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+        result = client.query.get(class_name, ["chunk_id"]).with_limit(wv_count).do()
+        wv_chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
         wv_chunk_ids = set(chunk["chunk_id"] for chunk in wv_chunks)
         
         missing_embeddings = pg_chunk_ids - wv_chunk_ids
@@ -57,13 +62,15 @@ def test_no_duplicate_vectors():
     """
     Test that no chunk has multiple vectors in Weaviate.
     """
+    class_name = current_class_name()
+    
     client = weaviate.Client("http://localhost:8080")
     
-    result = client.query.aggregate("PolicyChunk").with_meta_count().do()
-    wv_count = result['data']['Aggregate']['PolicyChunk'][0]['meta']['count']
+    result = client.query.aggregate(class_name).with_meta_count().do()
+    wv_count = result['data']['Aggregate'][class_name][0]['meta']['count']
     
-    result = client.query.get("PolicyChunk", ["chunk_id"]).with_limit(wv_count).do()
-    wv_chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+    result = client.query.get(class_name, ["chunk_id"]).with_limit(wv_count).do()
+    wv_chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
     
     chunk_id_counts = {}
     for chunk in wv_chunks:
@@ -1,19 +1,22 @@
 import pytest
 import weaviate
 from sentence_transformers import SentenceTransformer
+from db.index_versions import current_class_name
 
 def test_embedding_dimensions():
     """
     Test that all vectors in Weaviate have the expected dimension (384 for all-MiniLM-L6-v2).
     """
+    class_name = current_class_name()
+    
     client = weaviate.Client("http://localhost:8080")
     
     result = client.query.get(
-        "PolicyChunk",
+        class_name,
         ["chunk_id", "_additional { vector }"]
     ).with_limit(100).do()
     
-    chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+    chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
     
     assert len(chunks) > 0, "No chunks found in Weaviate"
     
@@ -0,0 +1,122 @@
+import sys
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+from app.embedding_service import MicroBatcher, SocketEncoder, EmbeddingServer
+
+
+def _fake_encoder(batches, delay_s=0.0):
+    """Vectors that identify their text, recording each batch it was called with."""
+    def _encode(texts):
+        batches.append(list(texts))
+        time.sleep(delay_s)
+        return np.array([[float(len(text)), float(sum(map(ord, text)))] for text in texts], dtype=np.float32)
+    return _encode
+
+
+def _expected(text):
+    return np.array([len(text), sum(map(ord, text))], dtype=np.float32)
+
+
+def test_concurrent_encodes_share_batches():
+    """
+    Concurrent callers are encoded together, each getting its own row back.
+    """
+    batches = []
+    batcher = MicroBatcher(_fake_encoder(batches, delay_s=0.05), max_batch_size=8, max_wait_ms=20)
+    texts = [f"query number {i}" for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        vectors = list(pool.map(batcher.encode, texts))
+
+    for text, vector in zip(texts, vectors):
+        assert np.array_equal(vector, _expected(text))
+    assert len(batches) < len(texts)
+    assert max(len(batch) for batch in batches) <= 8
+    assert sorted(text for batch in batches for text in batch) == sorted(texts)
+
+
+def test_lone_query_is_not_held_back_without_wait():
+    """
+    With max_wait_ms=0 a single query is encoded as soon as it arrives.
+    """
+    batches = []
+    batcher = MicroBatcher(_fake_encoder(batches), max_batch_size=8, max_wait_ms=0)
+
+    start = time.monotonic()
+    vector = batcher.encode("alcohol ads")
+
+    assert time.monotonic() - start < 0.5
+    assert np.array_equal(vector, _expected("alcohol ads"))
+    assert batches == [["alcohol ads"]]
+
+
+def test_lone_query_skips_the_batch_wait():
+    """
+    A query with nothing else queued is encoded without waiting max_wait_ms.
+    """
+    batches = []
+    batcher = MicroBatcher(_fake_encoder(batches), max_batch_size=8, max_wait_ms=2000)
+
+    start = time.monotonic()
+    vector = batcher.encode("alcohol ads")
+
+    assert time.monotonic() - start < 0.5
+    assert np.array_equal(vector, _expected("alcohol ads"))
+    assert batches == [["alcohol ads"]]
+
+
+def test_encode_error_reaches_every_caller_in_the_batch():
+    """
+    A failing batch fails all of its callers, and the batcher keeps serving.
+    """
+    calls = []
+
+    def _flaky(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("model failed")
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    batcher = MicroBatcher(_flaky, max_batch_size=4, max_wait_ms=50)
+    texts = ("a", "b", "c")
+    futures = [batcher.submit(text) for text in texts]
+    for future in futures:
+        future.exception(timeout=5)
+
+    # A lone first text is dispatched on its own, so only check the batch that failed
+    for text, future in zip(texts, futures):
+        if text in calls[0]:
+            with pytest.raises(RuntimeError):
+                future.result()
+        else:
+            assert future.result().shape == (2,)
+    assert batcher.encode("d").shape == (2,)
+
+
+def test_socket_service_batches_across_clients(tmp_path):
+    """
+    Texts from different client threads are batched by one service.
+    """
+    batches = []
+    path = str(tmp_path / "embed.sock")
+    server = EmbeddingServer(path, MicroBatcher(_fake_encoder(batches, delay_s=0.05), max_batch_size=16, max_wait_ms=20))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = SocketEncoder(path)
+        texts = [f"crypto rules {i}" for i in range(12)]
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            vectors = list(pool.map(client.encode, texts))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    for text, vector in zip(texts, vectors):
+        assert np.array_equal(vector, _expected(text))
+    assert len(batches) < len(texts)
@@ -0,0 +1,171 @@
+import sys
+import json
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app.generation import stream_generate, generate_policy_response, get_llm, STOP_SEQUENCES
+from app.citations import trim_partial_answer
+
+CHUNK_ID = "0f8a6c1e-2b3d-4e5f-8a9b-0c1d2e3f4a5b"
+
+
+class FakeStreamResponse:
+    """Stand-in for a streamed Ollama /api/generate response."""
+
+    def __init__(self, pieces, done_reason="stop"):
+        self.pieces = pieces
+        self.done_reason = done_reason
+        self.lines_read = 0
+        self.closed = False
+        self.encoding = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        for i, piece in enumerate(self.pieces):
+            self.lines_read += 1
+            done = i == len(self.pieces) - 1
+            data = {"response": piece, "done": done}
+            if done:
+                data["done_reason"] = self.done_reason
+            yield json.dumps(data)
+
+
+def _mock_ollama(mocker, pieces, done_reason="stop"):
+    response = FakeStreamResponse(pieces, done_reason=done_reason)
+    post = mocker.patch("app.generation.requests.post", return_value=response)
+    return response, post
+
+
+def test_leading_refuse_cancels_stream(mocker):
+    """
+    A leading REFUSE stops reading the stream and closes the connection
+    instead of waiting for the rest of the completion.
+    """
+    pieces = ["RE", "FUSE", " because", " the", " sources", " do", " not", " say"]
+    response, _ = _mock_ollama(mocker, pieces)
+
+    result = stream_generate(get_llm(), "prompt")
+
+    assert result.finish_reason == "refuse"
+    assert response.lines_read == 2
+    assert response.closed is True
+
+
+def test_answer_starting_like_refuse_is_not_cancelled(mocker):
+    """
+    Only an exact leading REFUSE token triggers cancellation.
+    """
+    pieces = ["RE", "STRICTED", " rules", " apply."]
+    _mock_ollama(mocker, pieces)
+
+    result = stream_generate(get_llm(), "prompt")
+
+    assert result.finish_reason == "stop"
+    assert result.text == "RESTRICTED rules apply."
+
+
+def test_max_tokens_caps_generation(mocker):
+    """
+    Generation stops at the hard token cap even if the model keeps going,
+    and the cap and stop sequences are forwarded to Ollama.
+    """
+    pieces = [" word"] * 100
+    response, post = _mock_ollama(mocker, pieces)
+
+    result = stream_generate(get_llm(), "prompt", max_tokens=10)
+
+    assert result.finish_reason == "max_tokens"
+    assert response.lines_read == 10
+    options = post.call_args.kwargs["json"]["options"]
+    assert options["num_predict"] == 10
+    assert options["stop"] == STOP_SEQUENCES
+
+
+def test_deadline_stops_generation(mocker):
+    """
+    The per-request deadline ends the stream with whatever was produced so far.
+    """
+    pieces = [" word"] * 50
+    _mock_ollama(mocker, pieces)
+    clock = iter(range(0, 1000, 5))
+    mocker.patch("app.generation.time.monotonic", side_effect=lambda: next(clock))
+
+    result = stream_generate(get_llm(), "prompt", deadline_s=12)
+
+    assert result.finish_reason == "deadline"
+    assert 0 < result.num_tokens < 50
+
+
+def test_trim_partial_answer_drops_dangling_citation():
+    """
+    Truncated output is cut back to the last complete sentence and citation.
+    """
+    text = f"Alcohol ads are restricted. [SOURCE:{CHUNK_ID}] They also need [SOURCE:0f8a6c1e-2b"
+
+    assert trim_partial_answer(text) == f"Alcohol ads are restricted. [SOURCE:{CHUNK_ID}]"
+
+
+def test_truncated_answer_still_passes_citation_validation(mocker):
+    """
+    A max-token truncated answer keeps its complete citations and is validated
+    against the retrieved chunks like any other answer.
+    """
+    mocker.patch(
+        "app.generation.retrieve_policy_chunks",
+        return_value=[{
+            "chunk_id": CHUNK_ID,
+            "chunk_text": "Alcohol advertising is restricted.",
+            "score": 0.8,
+            "policy_path": "Restricted content > Alcohol",
+            "doc_id": "doc-1",
+            "doc_url": "https://example.com"
+        }]
+    )
+    pieces = ["Alcohol", " ads", " are", " restricted.", f" [SOURCE:{CHUNK_ID}]", " Also", " [SOURCE:0f8a"]
+    _mock_ollama(mocker, pieces, done_reason="length")
+
+    response = generate_policy_response("Can I advertise alcohol?")
+
+    assert response.refused is False
+    assert response.finish_reason == "max_tokens"
+    assert response.answer.endswith(f"[SOURCE:{CHUNK_ID}]")
+    assert [c.chunk_id for c in response.citations] == [CHUNK_ID]
+
+
+def test_spent_deadline_skips_generation(mocker):
+    """
+    When retrieval and queueing use up the whole deadline, the request ends
+    with the deadline finish reason instead of starting generation.
+    """
+    mocker.patch(
+        "app.generation.retrieve_policy_chunks",
+        return_value=[{
+            "chunk_id": CHUNK_ID,
+            "chunk_text": "Alcohol advertising is restricted.",
+            "score": 0.8,
+            "policy_path": "Restricted content > Alcohol",
+            "doc_id": "doc-1",
+            "doc_url": "https://example.com"
+        }]
+    )
+    _, post = _mock_ollama(mocker, ["Alcohol", " ads"])
+    failover = mocker.patch("app.generation.generate_with_failover")
+    clock = iter(range(0, 1000, 5))
+    mocker.patch("app.generation.time.time", side_effect=lambda: next(clock))
+
+    response = generate_policy_response("Can I advertise alcohol?", deadline_s=12)
+
+    assert response.finish_reason == "deadline"
+    assert response.refused is True
+    failover.assert_not_called()
+    post.assert_not_called()
@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app.hierarchy import SectionHierarchy, parent_key
+
+
+def _row(chunk_id, chunk_index, policy_path, text_length=100, doc_id="alcohol_2024-01-01"):
+    return SimpleNamespace(
+        chunk_id=chunk_id,
+        doc_id=doc_id,
+        chunk_index=chunk_index,
+        policy_path=policy_path,
+        text_length=text_length,
+    )
+
+
+def _hierarchy():
+    # H2 "Alcohol" (intro + two H3s, one split in two), and a separate H2 "Gambling"
+    return SectionHierarchy("v1", [
+        _row("a-h3b", 2, "Alcohol > Beer"),
+        _row("a-intro", 0, "Alcohol"),
+        _row("a-h3w-1", 1, "Alcohol > Wine"),
+        _row("a-h3w-2", 3, "Alcohol > Wine"),
+        _row("g-intro", 4, "Gambling"),
+    ])
+
+
+def test_parent_children_map_follows_h2_sections_in_document_order():
+    """
+    H3 subsections and split paragraphs belong to their H2 parent, ordered
+    by chunk_index.
+    """
+    hierarchy = _hierarchy()
+    alcohol = parent_key("alcohol_2024-01-01", "Alcohol > Wine")
+
+    assert hierarchy.parent("a-h3b") == alcohol
+    assert hierarchy.children[alcohol] == ["a-intro", "a-h3w-1", "a-h3b", "a-h3w-2"]
+    assert hierarchy.titles[alcohol] == "Alcohol"
+    assert hierarchy.sizes[alcohol] == 400
+    assert hierarchy.expandable(alcohol, matched_children=2, min_children=2, max_chars=1000)
+    assert not hierarchy.expandable(alcohol, matched_children=1, min_children=2, max_chars=1000)
+    assert not hierarchy.expandable(alcohol, matched_children=3, min_children=2, max_chars=300)
+
+
+@pytest.fixture
+def retriever(make_retriever, mocker):
+    """Hierarchical HybridRetriever over _hierarchy() without the model, Weaviate or Postgres."""
+    instance = make_retriever(mode="hierarchical")
+    mocker.patch.object(instance, "hierarchy", return_value=_hierarchy())
+    return instance
+
+
+def _candidate(chunk_id, distance):
+    return {"chunk_id": chunk_id, "policy_section_level": "H3", "_additional": {"distance": distance}}
+
+
+def test_several_matched_children_expand_to_their_parent(retriever, mocker):
+    """
+    Two matched chunks of one H2 are replaced by the whole section, under the
+    best chunk's id; a lone match elsewhere stays a single chunk.
+    """
+    mocker.patch.object(retriever, "vector_search", return_value=[
+        _candidate("a-h3w-1", 0.10),
+        _candidate("g-intro", 0.20),
+        _candidate("a-h3b", 0.30),
+    ])
+    hydrate = mocker.patch.object(
+        retriever, "hydrate", side_effect=lambda ids: {i: {"chunk_text": f"<{i}>", "policy_path": i} for i in ids}
+    )
+
+    results = retriever.retrieve("wine ads", limit=5)
+
+    assert [r.chunk_id for r in results] == ["a-h3w-1", "g-intro"]
+    assert results[0].chunk_text == "<a-intro>\n\n<a-h3w-1>\n\n<a-h3b>\n\n<a-h3w-2>"
+    assert results[0].policy_path == "Alcohol"
+    assert results[0].policy_section_level == "H2"
+    assert results[1].chunk_text == "<g-intro>"
+    hydrate.assert_called_once_with(["a-intro", "a-h3w-1", "a-h3b", "a-h3w-2", "g-intro"])
+
+
+def test_single_match_is_not_expanded(retriever, mocker):
+    """
+    With one matched chunk per parent, the compact child chunks are returned.
+    """
+    mocker.patch.object(retriever, "vector_search", return_value=[
+        _candidate("a-h3b", 0.10), _candidate("g-intro", 0.20)
+    ])
+    hydrate = mocker.patch.object(retriever, "hydrate", side_effect=lambda ids: {i: {"chunk_text": i} for i in ids})
+
+    results = retriever.retrieve("beer ads", limit=5)
+
+    assert [r.chunk_text for r in results] == ["a-h3b", "g-intro"]
+    hydrate.assert_called_once_with(["a-h3b", "g-intro"])
+
+
+def test_unknown_mode_is_rejected(retriever):
+    """
+    retrieve() validates the mode before searching.
+    """
+    with pytest.raises(ValueError):
+        retriever.retrieve("alcohol", mode="tree")
@@ -2,12 +2,15 @@ import pytest
 import weaviate
 from db.session import SessionLocal
 from db.models import PolicyChunk
+from db.index_versions import current_class_name
 
 def test_weaviate_object_id_equals_chunk_id():
     """
     Test that Weaviate object ID (UUID) equals PostgreSQL chunk_id.
     This is critical for hybrid retrieval join operations.
     """
+    class_name = current_class_name()
+    
     db = SessionLocal()
     client = weaviate.Client("http://localhost:8080")
     
@@ -17,7 +20,7 @@ def test_weaviate_object_id_equals_chunk_id():
         for (pg_chunk_id,) in pg_chunks:
             result = client.data_object.get_by_id(
                 str(pg_chunk_id),
-                class_name="PolicyChunk"
+                class_name=class_name
             )
             
             assert result is not None, (
@@ -41,14 +44,16 @@ def test_metadata_fields_stored():
     Test that policy_source, region, content_type, and policy_section_level are stored in Weaviate.
     These fields are required for hybrid retrieval filtering and ranking.
     """
+    class_name = current_class_name()
+    
     client = weaviate.Client("http://localhost:8080")
     
     result = client.query.get(
-        "PolicyChunk",
+        class_name,
         ["chunk_id", "policy_source", "region", "content_type", "policy_section_level"]
     ).with_limit(1).do()
     
-    chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+    chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
     
     assert len(chunks) > 0, "No chunks found in Weaviate"
     
@@ -77,10 +82,12 @@ def test_filtering_by_metadata():
     Test that we can filter chunks by region and content_type in Weaviate.
     This validates hybrid retrieval filtering capability.
     """
+    class_name = current_class_name()
+    
     client = weaviate.Client("http://localhost:8080")
     
     result = client.query.get(
-        "PolicyChunk",
+        class_name,
         ["chunk_id", "region", "content_type"]
     ).with_where({
         "operator": "And",
@@ -98,7 +105,7 @@ def test_filtering_by_metadata():
         ]
     }).with_limit(10).do()
     
-    chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+    chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
     
     assert len(chunks) > 0, "No chunks found matching filter criteria"
     
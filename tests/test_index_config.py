@@ -0,0 +1,76 @@
+import sys
+import json
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+
+from ingestion import embed
+from ingestion.index_config import VectorIndexConfig, load_index_config
+
+
+def test_default_profile_matches_weaviate_defaults():
+    config = load_index_config("default")
+
+    assert config.to_weaviate() == {
+        "vectorIndexType": "hnsw",
+        "vectorIndexConfig": {"distance": "cosine", "ef": -1, "efConstruction": 128, "maxConnections": 64},
+    }
+
+
+def test_config_file_overrides_profile(tmp_path):
+    path = tmp_path / "index.json"
+    path.write_text(json.dumps({"ef": 48, "max_connections": 24}))
+
+    config = load_index_config("small", str(path))
+
+    assert config.ef == 48
+    assert config.max_connections == 24
+    assert config.ef_construction == 256
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        VectorIndexConfig(distance="hamming")
+    with pytest.raises(ValueError):
+        VectorIndexConfig(pq_enabled=True, pq_segments=100)
+    with pytest.raises(ValueError):
+        load_index_config("huge")
+
+
+def test_schema_carries_index_config(mocker):
+    client = mocker.Mock()
+    client.schema.exists.return_value = False
+
+    embed.create_schema(client, "PolicyChunk_v7", VectorIndexConfig(ef=64, max_connections=16))
+
+    schema = client.schema.create_class.call_args.args[0]
+    assert schema["class"] == "PolicyChunk_v7"
+    assert schema["vectorIndexConfig"]["ef"] == 64
+    assert schema["vectorIndexConfig"]["maxConnections"] == 16
+    assert "pq" not in schema["vectorIndexConfig"]
+
+
+def test_pq_is_enabled_after_upload(mocker):
+    """
+    PQ needs vectors to train on, so it is switched on once the class is filled.
+    """
+    calls = []
+    mocker.patch("ingestion.embed.create_index_version", return_value=mocker.Mock(version=1, class_name="PolicyChunk_v1"))
+    mocker.patch("ingestion.embed.get_corpus_version", return_value="abc")
+    mocker.patch("ingestion.embed.create_schema")
+    mocker.patch("ingestion.embed.embed_and_upload", side_effect=lambda *a, **k: calls.append("upload") or 3)
+    mocker.patch("ingestion.embed.validate_coverage", return_value=[])
+    promote = mocker.patch("ingestion.embed.promote_index_version")
+    mocker.patch("ingestion.embed.record_filter_stats")
+    client = mocker.Mock()
+    client.schema.update_config.side_effect = lambda *a: calls.append("pq")
+
+    embed.build_index_version(client, mocker.Mock(), encode=None, index_config=load_index_config("large"))
+
+    assert calls == ["upload", "pq"]
+    pq = client.schema.update_config.call_args.args[1]["vectorIndexConfig"]["pq"]
+    assert pq["enabled"] is True
+    assert pq["segments"] == 96
+    promote.assert_called_once()
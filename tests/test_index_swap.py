@@ -0,0 +1,254 @@
+import sys
+import time
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from db.models import VectorIndexVersion, IndexStatus, IndexFilterStats
+from db.index_versions import (
+    LEGACY_CLASS_NAME,
+    create_index_tables,
+    get_filter_stats,
+    create_index_version,
+    promote_index_version,
+    get_active_class_name,
+    collectable_index_versions
+)
+from ingestion import embed
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    VectorIndexVersion.__table__.create(engine)
+    # SQLite would apply the Postgres partial unique index to every status
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_single_active_index"))
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_promotion_swaps_pointer_and_retires_previous(db):
+    """
+    Building a version doesn't change what queries read until it is promoted.
+    """
+    v1 = create_index_version(db)
+    assert v1.class_name == "PolicyChunk_v1"
+    assert get_active_class_name(db) == LEGACY_CLASS_NAME
+
+    promote_index_version(db, v1.version)
+    v2 = create_index_version(db)
+    assert get_active_class_name(db) == "PolicyChunk_v1"
+
+    promote_index_version(db, v2.version)
+
+    assert get_active_class_name(db) == "PolicyChunk_v2"
+    assert db.get(VectorIndexVersion, v1.version).status == IndexStatus.RETIRED
+
+
+def test_retired_version_can_be_promoted_back(db):
+    v1 = create_index_version(db)
+    promote_index_version(db, v1.version)
+    v2 = create_index_version(db)
+    promote_index_version(db, v2.version)
+
+    promote_index_version(db, v1.version)
+
+    assert get_active_class_name(db) == "PolicyChunk_v1"
+    assert db.get(VectorIndexVersion, v2.version).status == IndexStatus.RETIRED
+
+
+def test_failed_build_is_never_promoted(db, mocker):
+    """
+    A version that fails coverage validation is marked failed and the active
+    index stays in place.
+    """
+    v1 = create_index_version(db)
+    promote_index_version(db, v1.version)
+    mocker.patch("ingestion.embed.get_corpus_version", return_value="abc")
+    mocker.patch("ingestion.embed.create_schema")
+    mocker.patch("ingestion.embed.embed_and_upload", return_value=2)
+    mocker.patch("ingestion.embed.validate_coverage", return_value=["count mismatch"])
+
+    with pytest.raises(RuntimeError, match="failed validation"):
+        embed.build_index_version(mocker.Mock(), db, encode=None)
+
+    assert get_active_class_name(db) == "PolicyChunk_v1"
+    assert db.get(VectorIndexVersion, 2).status == IndexStatus.FAILED
+
+
+def test_valid_build_is_promoted(db, mocker):
+    mocker.patch("ingestion.embed.get_corpus_version", return_value="abc")
+    create_schema = mocker.patch("ingestion.embed.create_schema")
+    upload = mocker.patch("ingestion.embed.embed_and_upload", return_value=3)
+    mocker.patch("ingestion.embed.validate_coverage", return_value=[])
+    stats = mocker.patch("ingestion.embed.record_filter_stats")
+    client = mocker.Mock()
+
+    index = embed.build_index_version(client, db, encode=None)
+
+    assert create_schema.call_args.args[:2] == (client, "PolicyChunk_v1")
+    assert upload.call_args.kwargs["class_name"] == "PolicyChunk_v1"
+    stats.assert_called_once_with(db, 1)
+    assert index.chunk_count == 3
+    assert get_active_class_name(db) == "PolicyChunk_v1"
+
+
+def test_garbage_collection_keeps_active_and_newest_retired(db, mocker):
+    for _ in range(4):
+        promote_index_version(db, create_index_version(db).version)
+    failed = create_index_version(db)
+    failed.status = IndexStatus.FAILED
+    db.commit()
+    client = mocker.Mock()
+    client.schema.exists.return_value = True
+
+    deleted = embed.garbage_collect_indexes(client, db, keep=1)
+
+    assert sorted(deleted) == [LEGACY_CLASS_NAME, "PolicyChunk_v1", "PolicyChunk_v2", "PolicyChunk_v5"]
+    assert [v.class_name for v in db.query(VectorIndexVersion).order_by(VectorIndexVersion.version)] == [
+        "PolicyChunk_v3", "PolicyChunk_v4"
+    ]
+    assert collectable_index_versions(db, keep_retired=1) == []
+
+
+def test_pgvector_build_writes_a_new_table_and_promotes_after_validation(db, mocker):
+    """
+    A pgvector build fills and indexes its own table while queries keep
+    reading the active one; a build that fails validation is never promoted.
+    """
+    promote_index_version(db, create_index_version(db, backend="pgvector").version)
+    mocker.patch("ingestion.embed.get_corpus_version", return_value="abc")
+    mocker.patch("ingestion.embed.SessionLocal")
+    create_table = mocker.patch("ingestion.embed.create_embedding_table")
+    mocker.patch("ingestion.embed.embed_to_pgvector", return_value=3)
+    build_index = mocker.patch("ingestion.embed.build_embedding_index", return_value=1.5)
+    validate = mocker.patch("ingestion.embed.validate_embedding_table", return_value=["1 chunks missing embeddings"])
+    mocker.patch("ingestion.embed.record_filter_stats")
+
+    with pytest.raises(RuntimeError, match="failed validation"):
+        embed.build_pgvector_version(db, encode=None)
+
+    assert get_active_class_name(db, "pgvector") == "policy_chunk_embeddings_v1"
+    assert db.get(VectorIndexVersion, 2).status == IndexStatus.FAILED
+
+    validate.return_value = []
+    index, index_mb = embed.build_pgvector_version(db, encode=None)
+
+    assert create_table.call_args.args[1] == "policy_chunk_embeddings_v3"
+    assert build_index.call_args.args[1] == "policy_chunk_embeddings_v3"
+    assert (index.chunk_count, index_mb) == (3, 1.5)
+    assert get_active_class_name(db, "pgvector") == "policy_chunk_embeddings_v3"
+
+
+def test_each_backend_collects_only_its_own_versions(db, mocker):
+    """
+    Weaviate and pgvector versions share vector_index_versions; each garbage
+    collector drops only the classes or tables it owns.
+    """
+    for backend in ("pgvector", "weaviate", "pgvector", "weaviate"):
+        promote_index_version(db, create_index_version(db, backend=backend).version)
+    client = mocker.Mock()
+    client.schema.exists.return_value = False
+    drop_table = mocker.patch("ingestion.embed.drop_embedding_table")
+
+    assert embed.garbage_collect_indexes(client, db, keep=0) == ["PolicyChunk_v2"]
+    assert embed.garbage_collect_embedding_tables(db, keep=0) == ["policy_chunk_embeddings_v1"]
+    drop_table.assert_called_once_with(db, "policy_chunk_embeddings_v1")
+    assert [v.class_name for v in db.query(VectorIndexVersion).order_by(VectorIndexVersion.version)] == [
+        "policy_chunk_embeddings_v3", "PolicyChunk_v4"
+    ]
+
+
+def test_each_backend_has_its_own_active_pointer(db):
+    """
+    Promoting a pgvector build on a Weaviate deployment leaves the Weaviate
+    class active, so Weaviate retrieval never reads a table name.
+    """
+    weaviate = create_index_version(db)
+    promote_index_version(db, weaviate.version)
+    assert get_active_class_name(db, "pgvector") is None
+
+    promote_index_version(db, create_index_version(db, backend="pgvector").version)
+
+    assert get_active_class_name(db) == "PolicyChunk_v1"
+    assert get_active_class_name(db, "pgvector") == "policy_chunk_embeddings_v2"
+    assert db.get(VectorIndexVersion, weaviate.version).status == IndexStatus.ACTIVE
+
+
+def test_index_tables_gain_the_backend_column():
+    """
+    A vector_index_versions table from before per-backend pointers gets the
+    backend column, with existing rows counted as Weaviate builds.
+    """
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE vector_index_versions (version INTEGER PRIMARY KEY, class_name VARCHAR(64) NOT NULL, "
+            "status VARCHAR(8) NOT NULL, corpus_version VARCHAR(12), chunk_count INTEGER, "
+            "created_at DATETIME NOT NULL, promoted_at DATETIME)"
+        ))
+        conn.execute(text("CREATE UNIQUE INDEX uq_single_active_index ON vector_index_versions (status)"))
+        conn.execute(text(
+            "INSERT INTO vector_index_versions VALUES (3, 'PolicyChunk_v3', 'ACTIVE', NULL, NULL, '2026-01-01', NULL)"
+        ))
+
+    create_index_tables(engine)
+
+    session = sessionmaker(bind=engine)()
+    assert get_active_class_name(session) == "PolicyChunk_v3"
+    assert get_active_class_name(session, "pgvector") is None
+    session.close()
+
+
+def test_rebuild_creates_filter_stats_table_on_existing_database(db, mocker):
+    """
+    A database from before filter statistics gets index_filter_stats from
+    embed.main, so recording them before promotion doesn't fail.
+    """
+    bind = db.get_bind()
+    assert "index_filter_stats" not in inspect(bind).get_table_names()
+    version = create_index_version(db).version
+    mocker.patch.object(embed, "SessionLocal", return_value=db)
+    mocker.patch("sys.argv", ["embed", "--promote", str(version)])
+
+    embed.main()
+
+    assert "index_filter_stats" in inspect(bind).get_table_names()
+    db.add(IndexFilterStats(index_version=version, column_name="region", value="uk", chunk_count=3))
+    db.commit()
+    assert get_filter_stats(db, "PolicyChunk_v1") == {"region": {"uk": 3}}
+
+
+def test_retriever_refreshes_pointer_off_the_query_path(make_retriever, mocker):
+    """
+    After the refresh interval, queries keep using the cached class while the
+    new pointer is read in the background.
+    """
+    mocker.patch("app.retrieval.ACTIVE_INDEX_REFRESH_S", 0)
+    release = threading.Event()
+    names = iter(["PolicyChunk_v1", "PolicyChunk_v2"])
+
+    def _slow_lookup(backend):
+        name = next(names)
+        if name == "PolicyChunk_v2":
+            release.wait(timeout=5)
+        return name
+
+    mocker.patch("app.retrieval.current_class_name", side_effect=_slow_lookup)
+    retriever = make_retriever()
+
+    assert retriever.index_class() == "PolicyChunk_v1"
+    start = time.monotonic()
+    assert retriever.index_class() == "PolicyChunk_v1"
+    assert time.monotonic() - start < 0.5
+
+    release.set()
+    retriever._index_refresh.result(timeout=5)
+    assert retriever.index_class() == "PolicyChunk_v2"
@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from app.encoding import encode_length_bucketed, length_buckets, padding_fraction, token_lengths
+
+
+class FakeModel:
+    """Whitespace 'tokenizer' and an encoder whose vector is the text's word count."""
+
+    def __init__(self, max_seq_length=8):
+        self.max_seq_length = max_seq_length
+        self.encode_batches = []
+
+    def get_max_seq_length(self):
+        return self.max_seq_length
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def tokenizer(self, texts, add_special_tokens, truncation, max_length):
+        ids = [[0] + list(range(len(t.split()))) + [0] for t in texts]
+        if truncation:
+            ids = [i[:max_length] for i in ids]
+        return {"input_ids": ids}
+
+    def encode(self, texts, batch_size, show_progress_bar, convert_to_numpy):
+        self.encode_batches.append([len(t.split()) for t in texts])
+        return np.array([[len(t.split())] * 3 for t in texts], dtype=np.float32)
+
+
+def _text(words):
+    return " ".join(["w"] * words)
+
+
+def test_token_lengths_are_truncated_to_model_limit():
+    model = FakeModel(max_seq_length=8)
+
+    lengths = token_lengths(model, [_text(1), _text(5), _text(50)])
+
+    assert lengths.tolist() == [3, 7, 8]
+
+
+def test_batches_group_similar_lengths():
+    """
+    Each encode call sees texts of similar length instead of database order.
+    """
+    model = FakeModel(max_seq_length=100)
+    texts = [_text(n) for n in (40, 2, 38, 3, 1, 39)]
+
+    encode_length_bucketed(model, texts, batch_size=3)
+
+    assert model.encode_batches == [[1, 2, 3], [38, 39, 40]]
+
+
+def test_embeddings_are_restored_to_input_order():
+    model = FakeModel(max_seq_length=100)
+    texts = [_text(n) for n in (40, 2, 38, 3, 1, 39, 7)]
+
+    embeddings = encode_length_bucketed(model, texts, batch_size=2)
+
+    assert embeddings[:, 0].tolist() == [40, 2, 38, 3, 1, 39, 7]
+
+
+def test_bucketing_reduces_padding():
+    lengths = np.array([200, 10, 190, 12, 180, 8, 11, 195])
+
+    in_order = [np.arange(0, 4), np.arange(4, 8)]
+    bucketed = length_buckets(lengths, 4)
+
+    assert padding_fraction(lengths, bucketed) < 0.1
+    assert padding_fraction(lengths, in_order) > 0.4
+
+
+def test_empty_input():
+    assert encode_length_bucketed(FakeModel(), []).shape == (0, 3)
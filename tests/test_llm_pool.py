@@ -0,0 +1,163 @@
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+import requests
+from app.llm_pool import OllamaBackendPool
+from app.generation import generate_with_failover
+
+
+class FakeOllama:
+    """Local HTTP server speaking just enough of the Ollama API for routing tests."""
+
+    def __init__(self, delay_s=0.0, status=200):
+        self.delay_s = delay_s
+        self.status = status
+        self.generate_calls = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(fake.status)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"models": []}')
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                fake.generate_calls += 1
+                time.sleep(fake.delay_s)
+                self.send_response(fake.status)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                if fake.status != 200:
+                    self.wfile.write(b'{"error": "backend failure"}')
+                    return
+                for piece, done in (("Served by ", False), (fake.url, True)):
+                    line = {"response": piece, "done": done}
+                    if done:
+                        line["done_reason"] = "stop"
+                    self.wfile.write((json.dumps(line) + "\n").encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_backends():
+    servers = []
+
+    def _make(**kwargs):
+        server = FakeOllama(**kwargs)
+        servers.append(server)
+        return server
+
+    yield _make
+    for server in servers:
+        server.stop()
+
+
+def test_least_outstanding_spreads_concurrent_load(fake_backends):
+    """
+    Concurrent generations are spread evenly across backends.
+    """
+    a = fake_backends(delay_s=0.3)
+    b = fake_backends(delay_s=0.3)
+    pool = OllamaBackendPool([a.url, b.url])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: generate_with_failover("prompt", pool=pool), range(4)))
+
+    assert a.generate_calls == 2
+    assert b.generate_calls == 2
+    assert all(r.finish_reason == "stop" for r in results)
+
+
+def test_busy_backend_is_avoided(fake_backends):
+    """
+    A backend with a request in flight is not chosen while another is idle.
+    """
+    a = fake_backends()
+    b = fake_backends()
+    pool = OllamaBackendPool([a.url, b.url])
+
+    with pool.lease() as busy:
+        result = generate_with_failover("prompt", pool=pool)
+
+    assert busy.url not in result.text
+
+
+def test_failed_backend_is_retried_elsewhere_and_ejected(fake_backends):
+    """
+    A 5xx or unreachable backend is retried on another one and, after repeated
+    failures, ejected from rotation.
+    """
+    broken = fake_backends(status=500)
+    good = fake_backends()
+    pool = OllamaBackendPool([broken.url, good.url], eject_after_failures=2)
+
+    for _ in range(4):
+        result = generate_with_failover("prompt", pool=pool)
+        assert good.url in result.text
+
+    assert broken.generate_calls == 2
+    assert pool.backends[0].healthy is False
+
+
+def test_timeout_does_not_restart_the_deadline_on_another_backend(fake_backends):
+    """
+    A backend that times out uses up the request's budget; the next backend
+    is not tried with a fresh one.
+    """
+    slow = [fake_backends(delay_s=1.5), fake_backends(delay_s=1.5)]
+    pool = OllamaBackendPool([server.url for server in slow])
+
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        generate_with_failover("prompt", deadline_s=0.5, pool=pool)
+
+    assert time.monotonic() - start < 1.0
+    assert sum(server.generate_calls for server in slow) == 1
+
+
+def test_unreachable_backend_fails_over(fake_backends):
+    """
+    Connection errors are retried on the next backend.
+    """
+    down = fake_backends()
+    down.stop()
+    good = fake_backends()
+    pool = OllamaBackendPool([down.url, good.url])
+
+    result = generate_with_failover("prompt", pool=pool)
+
+    assert good.url in result.text
+
+
+def test_health_check_readmits_recovered_backend(fake_backends):
+    """
+    An ejected backend rejoins once its health check succeeds.
+    """
+    flaky = fake_backends(status=500)
+    pool = OllamaBackendPool([flaky.url], eject_after_failures=1, ejection_cooldown_s=60)
+
+    assert pool.health_check() == 0
+    flaky.status = 200
+    assert pool.health_check() == 1
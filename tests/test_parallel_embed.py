@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from ingestion.embed import ParallelEncoder, worker_settings
+
+
+class InlinePool:
+    """Runs pool.map in-process and records the shards it was given."""
+
+    def __init__(self):
+        self.shards = []
+
+    def map(self, fn, shards):
+        self.shards = list(shards)
+        return [np.array([[float(len(t))] * 384 for t in texts], dtype=np.float32) for texts, _ in self.shards]
+
+
+def _encoder(workers=2, batch_size=2):
+    encoder = object.__new__(ParallelEncoder)
+    encoder.workers = workers
+    encoder.torch_threads = 1
+    encoder.batch_size = batch_size
+    encoder._pool = InlinePool()
+    return encoder
+
+
+def test_worker_settings_split_cores_evenly():
+    """
+    Each worker gets an equal share of cores, and batch size follows threads.
+    """
+    assert worker_settings(1, 32) == (32, 128)
+    assert worker_settings(8, 32) == (4, 32)
+    assert worker_settings(32, 32) == (1, 16)
+    assert worker_settings(64, 32) == (1, 16)
+
+
+def test_shards_group_similar_lengths():
+    encoder = _encoder(batch_size=2)
+    texts = ["a" * 50, "a", "a" * 10, "a" * 49]
+
+    encoder.encode(texts)
+
+    assert [[len(t) for t in shard] for shard, _ in encoder._pool.shards] == [[1, 10], [49, 50]]
+
+
+def test_embeddings_come_back_in_input_order():
+    """
+    Sorting for sharding does not change which row belongs to which text.
+    """
+    encoder = _encoder(batch_size=2)
+    texts = ["a" * 50, "a", "a" * 10, "a" * 49, "a" * 3]
+
+    embeddings = encoder.encode(texts)
+
+    assert embeddings.shape == (5, 384)
+    assert embeddings[:, 0].tolist() == [50, 1, 10, 49, 3]
+
+
+def test_empty_input():
+    assert _encoder().encode([]).shape == (0, 384)
@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from db.models import Base, Vector, Region, ContentType, PolicySource
+from db.pgvector import embedding_index_ddl, ivfflat_lists
+
+
+@pytest.fixture
+def retriever(make_retriever):
+    """pgvector HybridRetriever without the model or Postgres; any Weaviate or hydrate call fails."""
+    return make_retriever(
+        backend="pgvector",
+        adaptive_overfetch=True,
+        _query_encoder=lambda query: np.full(384, 0.5, dtype=np.float32)
+    )
+
+
+def _row(chunk_id, distance, level="H3"):
+    return SimpleNamespace(
+        chunk_id=chunk_id,
+        chunk_text=f"text {chunk_id}",
+        policy_section="Alcohol",
+        policy_path="Alcohol > Beer",
+        policy_section_level=level,
+        doc_id="alcohol",
+        doc_url=None,
+        policy_source=PolicySource.GOOGLE,
+        region=Region.UK,
+        content_type=ContentType.VIDEO,
+        distance=distance
+    )
+
+
+def test_similarity_and_filters_are_one_statement(retriever, mocker):
+    """
+    The distance, the metadata filters and the returned text come from a
+    single SELECT ordered by the cosine distance operator.
+    """
+    mocker.patch.object(retriever, "index_class", return_value="policy_chunk_embeddings_v3")
+    session = mocker.patch("app.retrieval.SessionLocal")
+    session.return_value.execute.return_value.all.return_value = [_row("a", 0.1), _row("b", 0.3)]
+
+    rows = retriever.pgvector_search("alcohol", limit=15, region="uk", content_type="video")
+
+    session.return_value.execute.assert_called_once()
+    statement = session.return_value.execute.call_args.args[0]
+    sql = str(statement.compile(dialect=postgresql.psycopg2.dialect()))
+    assert "policy_chunk_embeddings_v3.embedding <=> CAST(%(embedding_1)s AS VECTOR(384)) AS distance" in sql
+    assert "FROM policy_chunk_embeddings_v3 JOIN policy_chunks ON" in sql
+    assert "policy_chunks.region = %(region_1)s AND policy_chunks.content_type = %(content_type_1)s" in sql
+    assert "ORDER BY distance" in sql and "LIMIT" in sql
+    assert rows[0]["chunk_id"] == "a"
+    assert rows[0]["region"] == "uk"
+    assert rows[0]["doc_url"] == ""
+    assert rows[0]["_additional"]["distance"] == 0.1
+
+
+def test_search_needs_a_promoted_pgvector_build(retriever, mocker):
+    """
+    Until a pgvector build is promoted there is no embeddings table to read,
+    whatever Weaviate class is active.
+    """
+    mocker.patch.object(retriever, "index_class", return_value=None)
+    session = mocker.patch("app.retrieval.SessionLocal")
+
+    with pytest.raises(RuntimeError, match="--backend pgvector"):
+        retriever.pgvector_search("alcohol")
+
+    session.assert_not_called()
+
+
+def test_weaviate_deployments_need_no_vector_extension():
+    """
+    The embeddings tables live outside Base.metadata, so init_db creates no
+    vector column and never needs the extension.
+    """
+    columns = [column for table in Base.metadata.tables.values() for column in table.columns]
+
+    assert not any(isinstance(column.type, Vector) for column in columns)
+    assert "policy_chunk_embeddings_v1" not in Base.metadata.tables
+
+
+def test_retrieve_skips_weaviate_and_separate_filter_and_hydrate_queries(retriever, mocker):
+    """
+    Rows from the single statement are reranked and returned as they are:
+    no Weaviate search, no filter lookup and no hydration round trip.
+    """
+    search = mocker.patch.object(retriever, "pgvector_search", return_value=[
+        {"chunk_id": "a", "chunk_text": "text a", "policy_section_level": "H2", "_additional": {"distance": 0.1}},
+        {"chunk_id": "b", "chunk_text": "text b", "policy_section_level": "H3", "_additional": {"distance": 0.15}},
+    ])
+    for method in ("vector_search", "_filter_candidates", "hydrate", "filter_selectivity"):
+        mocker.patch.object(retriever, method, side_effect=AssertionError(method))
+
+    results = retriever.retrieve("alcohol", limit=5, region="uk")
+
+    assert [r.chunk_id for r in results] == ["b", "a"]
+    assert results[0].chunk_text == "text b"
+    assert search.call_args.args[1:5] == (10, "uk", None, None)
+
+
+def test_vector_binds_as_text_and_index_ddl():
+    """
+    Vectors round-trip through pgvector's text form; the ANN index uses
+    cosine ops with IVFFlat lists sized from the row count.
+    """
+    vector = Vector(3)
+    bind = vector.bind_processor(postgresql.dialect())
+    load = vector.result_processor(postgresql.dialect(), None)
+
+    assert bind(np.array([0.25, -1.0, 1e-3], dtype=np.float32)) == "[0.25,-1,0.00100000005]"
+    assert load("[0.25,-1,0.001]") == [0.25, -1.0, 0.001]
+    assert (
+        "CREATE INDEX ix_policy_chunk_embeddings_v3_embedding ON policy_chunk_embeddings_v3 "
+        "USING hnsw (embedding vector_cosine_ops)"
+    ) in embedding_index_ddl("policy_chunk_embeddings_v3", "hnsw")
+    assert "WITH (lists = 100)" in embedding_index_ddl("policy_chunk_embeddings_v3", "ivfflat", rows=100_000)
+    assert ivfflat_lists(4_000_000) == 2000
+    with pytest.raises(ValueError):
+        embedding_index_ddl("policy_chunk_embeddings_v3", "flat")
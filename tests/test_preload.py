@@ -0,0 +1,98 @@
+import sys
+import runpy
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app import preload, admission
+
+CONF_PATH = Path(__file__).parent.parent / "api" / "gunicorn_conf.py"
+
+
+def test_preload_loads_shared_state_and_freezes_gc(mocker):
+    """
+    The parent loads the retriever, the active index pointer and the answer
+    store, then freezes the GC so workers keep sharing those pages.
+    """
+    retriever = mocker.MagicMock()
+    mocker.patch("app.preload.get_retriever", return_value=retriever)
+    mocker.patch("app.preload.answer_store_available", return_value=True)
+    answers = mocker.patch("app.preload.preload_answer_store")
+    freeze = mocker.patch("app.preload.gc.freeze")
+
+    preload.preload_shared_state()
+
+    retriever.index_class.assert_called_once()
+    retriever.encode_query.assert_not_called()
+    answers.assert_called_once()
+    freeze.assert_called_once()
+
+
+def test_worker_drops_inherited_connections(mocker):
+    """
+    After fork a worker discards the parent's Postgres pool without closing
+    its sockets and rebuilds its per-process retriever state.
+    """
+    retriever = mocker.MagicMock()
+    mocker.patch("app.preload.get_retriever", return_value=retriever)
+    engine = mocker.patch("app.preload.engine")
+    set_threads = mocker.patch("torch.set_num_threads")
+    mocker.patch("app.admission._controller_instance", None)
+
+    preload.reinit_after_fork(torch_threads=2)
+
+    engine.dispose.assert_called_once_with(close=False)
+    retriever.reset_after_fork.assert_called_once()
+    set_threads.assert_called_once_with(2)
+
+
+@pytest.mark.parametrize("limit,workers,per_worker", [(8, 4, 2), (2, 4, 1), (5, 2, 2), (2, 1, 2), (4, 3, 1)])
+def test_workers_split_the_llm_concurrency_limit(mocker, limit, workers, per_worker):
+    """
+    Workers sharing one Ollama each admit LLM_MAX_CONCURRENCY // workers
+    generations (at least one), so together they never exceed the limit.
+    """
+    mocker.patch("app.preload.get_retriever")
+    mocker.patch("app.preload.engine")
+    mocker.patch("torch.set_num_threads")
+    mocker.patch("app.admission.LLM_MAX_CONCURRENCY", limit)
+    mocker.patch("app.admission._controller_instance", None)
+
+    preload.reinit_after_fork(torch_threads=1, workers=workers)
+
+    assert admission.get_admission_controller().max_concurrency == per_worker
+
+
+def test_reset_after_fork_keeps_model_and_catalog(make_retriever, mocker):
+    """
+    Connections, threads and locks are replaced; the preloaded model and
+    catalog are kept.
+    """
+    retriever = make_retriever(_catalog=object(), weaviate_client=object())
+    mocker.patch("app.retrieval.weaviate.Client", return_value="client")
+    model, catalog, executor = retriever.model, retriever._catalog, retriever._executor
+
+    retriever.reset_after_fork()
+
+    assert retriever.weaviate_client == "client"
+    assert retriever._executor is not executor
+    assert retriever.model is model
+    assert retriever._catalog is catalog
+
+
+@pytest.mark.parametrize("cpus,workers,threads", [(8, 4, 2), (8, 16, 1), (2, 1, 2)])
+def test_gunicorn_conf_splits_cores_between_workers(monkeypatch, mocker, cpus, workers, threads):
+    """
+    Each worker gets cores // workers torch threads, at least one.
+    """
+    mocker.patch("multiprocessing.cpu_count", return_value=cpus)
+    monkeypatch.setenv("WEB_CONCURRENCY", str(workers))
+    monkeypatch.delenv("TORCH_THREADS_PER_WORKER", raising=False)
+
+    conf = runpy.run_path(str(CONF_PATH))
+
+    assert conf["workers"] == workers
+    assert conf["torch_threads"] == threads
+    assert conf["preload_app"] is True
+    assert conf["worker_class"] == "uvicorn.workers.UvicornWorker"
@@ -0,0 +1,144 @@
+import sys
+import time
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.profiling import StackSampler, should_profile, run_profiled
+from app.schemas import PolicyResponse
+from api.main import app
+
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def profile_dir(tmp_path, mocker):
+    mocker.patch("app.profiling.PROFILE_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def profile_access(mocker):
+    mocker.patch("app.profiling.PROFILE_ON_REQUEST", True)
+    mocker.patch("app.profiling.PROFILE_TOKEN", TOKEN)
+    return {"X-Profile-Token": TOKEN}
+
+
+def _slow_retrieval_stage():
+    time.sleep(0.1)
+
+
+def _fake_generate(**kwargs):
+    _slow_retrieval_stage()
+    return PolicyResponse(answer="", refused=True, refusal_reason="No relevant policies found for this query.")
+
+
+def test_sampler_captures_request_thread_stacks():
+    """
+    Samples are folded stacks of the target thread, root first.
+    """
+    sampler = StackSampler(threading.get_ident(), interval_s=0.005)
+    sampler.start()
+    _slow_retrieval_stage()
+    sampler.stop()
+
+    lines = sampler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert "_slow_retrieval_stage" in stack.split(";")[-1]
+    assert int(count) > 5
+
+
+def test_profiling_disabled_by_default(mocker):
+    """
+    Without a request flag and with a zero sample rate nothing is profiled.
+    """
+    mocker.patch("app.profiling.PROFILE_SAMPLE_RATE", 0)
+    rand = mocker.patch("app.profiling.random.random")
+
+    assert should_profile(False) is False
+    rand.assert_not_called()
+
+
+def test_run_profiled_stores_profile(profile_dir):
+    result, profile_id = run_profiled("test", _fake_generate, query="q")
+
+    assert result.refused is True
+    assert profiling.read_profile(profile_id)
+    assert profiling.list_profiles()[0]["profile_id"] == profile_id
+
+
+def test_query_profile_flag_exposes_flamegraph(profile_dir, profile_access, mocker):
+    """
+    ?profile=1 with the token profiles the request, returns its id, and the
+    folded stacks are served under /debug/profiles.
+    """
+    mocker.patch("api.main.generate_policy_response", side_effect=_fake_generate)
+    coalesced = mocker.patch("api.main.coalesced_policy_response")
+    client = TestClient(app)
+
+    response = client.post("/query?profile=1", json={"query": "Can I advertise alcohol?"}, headers=profile_access)
+
+    coalesced.assert_not_called()
+    profile_id = response.headers["X-Profile-Id"]
+    listed = client.get("/debug/profiles", headers=profile_access).json()
+    assert profile_id in [p["profile_id"] for p in listed]
+    assert "alcohol" not in listed[0]["label"]
+    collapsed = client.get(f"/debug/profiles/{profile_id}", headers=profile_access).text
+    assert "_slow_retrieval_stage" in collapsed
+
+
+@pytest.mark.parametrize("enabled, headers", [
+    (False, {"X-Profile-Token": TOKEN}),
+    (True, {}),
+    (True, {"X-Profile-Token": "guess"}),
+])
+def test_profiling_needs_server_setting_and_token(profile_dir, mocker, enabled, headers):
+    """
+    Without PROFILE_ON_REQUEST or the right token the flag is ignored and the
+    debug routes are hidden.
+    """
+    mocker.patch("app.profiling.PROFILE_ON_REQUEST", enabled)
+    mocker.patch("app.profiling.PROFILE_TOKEN", TOKEN)
+    mocker.patch("api.main.coalesced_policy_response", side_effect=_fake_generate)
+    client = TestClient(app)
+
+    response = client.post("/query?profile=1", json={"query": "Can I advertise alcohol?"}, headers=headers)
+
+    assert "X-Profile-Id" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+    assert client.get("/debug/profiles", headers=headers).status_code == 404
+    assert client.get(f"/debug/profiles/{'0' * 32}", headers=headers).status_code == 404
+
+
+def test_stored_profiles_are_capped(profile_dir, mocker):
+    mocker.patch("app.profiling.PROFILE_MAX_STORED", 2)
+
+    for _ in range(4):
+        run_profiled("test", lambda: None)
+
+    assert len(profiling.list_profiles()) == 2
+    assert len(list(profile_dir.glob("*.collapsed"))) == 2
+
+
+def test_unprofiled_query_has_no_profile(profile_dir, mocker):
+    mocker.patch("api.main.coalesced_policy_response", side_effect=_fake_generate)
+    client = TestClient(app)
+
+    response = client.post("/query", json={"query": "Can I advertise alcohol?"})
+
+    assert "X-Profile-Id" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_unknown_profile_returns_404(profile_dir, profile_access):
+    client = TestClient(app)
+
+    assert client.get("/debug/profiles/../../etc/passwd", headers=profile_access).status_code == 404
+    assert client.get(f"/debug/profiles/{'0' * 32}", headers=profile_access).status_code == 404
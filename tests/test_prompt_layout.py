@@ -0,0 +1,81 @@
+import sys
+import os
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app.generation import build_prompt, stream_generate, get_llm, PROMPT_PREFIX
+
+RESULTS = [
+    {"chunk_id": "c-chunk", "chunk_text": "Gambling ads need certification."},
+    {"chunk_id": "a-chunk", "chunk_text": "Alcohol ads are restricted."},
+    {"chunk_id": "b-chunk", "chunk_text": "Beer ads cannot target minors."},
+]
+
+
+def _common_prefix(a: str, b: str) -> str:
+    return a[:len(os.path.commonprefix([a, b]))]
+
+
+def test_prefix_cache_layout_puts_question_last():
+    """
+    Different questions over the same sources share everything up to the question.
+    """
+    first = build_prompt("Can I advertise alcohol?", RESULTS, layout="prefix_cache")
+    second = build_prompt("Are beer ads allowed?", RESULTS, layout="prefix_cache")
+
+    shared = _common_prefix(first, second)
+    for result in RESULTS:
+        assert result["chunk_text"] in shared
+    assert first.rstrip().endswith("Answer:")
+    assert first.index("Sources:") < first.index("Question:")
+
+
+def test_prefix_cache_layout_orders_sources_by_chunk_id():
+    """
+    Sources are in chunk_id order regardless of retrieval rank, so the same
+    source set always produces the same prefix.
+    """
+    prompt = build_prompt("q", RESULTS, layout="prefix_cache")
+    reordered = build_prompt("q", list(reversed(RESULTS)), layout="prefix_cache")
+
+    assert prompt == reordered
+    assert prompt.index("SOURCE a-chunk") < prompt.index("SOURCE b-chunk") < prompt.index("SOURCE c-chunk")
+
+
+def test_question_first_layout_is_unchanged():
+    """
+    The default layout keeps the question before the sources, in retrieval order.
+    """
+    prompt = build_prompt("Can I advertise alcohol?", RESULTS, layout="question_first")
+
+    assert prompt.startswith(PROMPT_PREFIX)
+    assert prompt.index("Question:") < prompt.index("Sources:")
+    assert prompt.index("SOURCE c-chunk") < prompt.index("SOURCE a-chunk")
+
+
+def test_unknown_layout_rejected():
+    with pytest.raises(ValueError):
+        build_prompt("q", RESULTS, layout="sideways")
+
+
+def test_stream_generate_reports_prompt_eval_stats(mocker):
+    """
+    prompt_eval count and duration from Ollama's final message are surfaced
+    for benchmarking.
+    """
+    final = (
+        '{"response": "", "done": true, "done_reason": "stop", '
+        '"eval_count": 3, "prompt_eval_count": 42, "prompt_eval_duration": 12500000}'
+    )
+    response = mocker.MagicMock()
+    response.__enter__.return_value = response
+    response.iter_lines.return_value = ['{"response": "Yes.", "done": false}', final]
+    post = mocker.patch("app.generation.requests.post", return_value=response)
+
+    result = stream_generate(get_llm(), "prompt")
+
+    assert result.prompt_eval_count == 42
+    assert result.prompt_eval_ms == pytest.approx(12.5)
+    assert post.call_args.kwargs["json"]["keep_alive"]
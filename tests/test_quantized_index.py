@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+
+from benchmarks.quantized_index import QuantizedIndex
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(0)
+    base = rng.standard_normal((2000, 384)).astype(np.float32)
+    queries = base[:20] + 0.05 * rng.standard_normal((20, 384)).astype(np.float32)
+    return base, queries
+
+
+def _unit(vector):
+    return vector / np.linalg.norm(vector)
+
+
+def _exact(base, query, k):
+    base = base / np.linalg.norm(base, axis=1, keepdims=True)
+    return np.argsort(-(base @ (query / np.linalg.norm(query))))[:k]
+
+
+def test_rescored_int8_search_matches_exact_search(vectors):
+    """
+    With float rescoring, the int8 index returns the exact top-k.
+    """
+    base, queries = vectors
+    index = QuantizedIndex(base, quantization="int8", rescore_factor=4)
+
+    for i, query in enumerate(queries):
+        found, scores = index.search(query, 5)
+        assert found[0] == i
+        assert found.tolist() == _exact(base, query, 5).tolist()
+        assert np.all(np.diff(scores) <= 0)
+
+
+def test_rescoring_recovers_pq_recall(vectors):
+    """
+    PQ codes alone lose neighbours; rescoring candidates with float vectors
+    brings most of them back and returns exact similarities.
+    """
+    base, queries = vectors
+    index = QuantizedIndex(base, quantization="pq", pq_segments=48, rescore_factor=1)
+
+    def _recall(rescore_factor):
+        index.rescore_factor = rescore_factor
+        hits = [len(set(index.search(q, 10)[0]) & set(_exact(base, q, 10))) for q in queries]
+        return sum(hits) / (10 * len(queries))
+
+    assert _recall(8) > _recall(1)
+    assert _recall(8) >= 0.8
+    found, scores = index.search(queries[0], 1)
+    assert found[0] == 0
+    assert scores[0] == pytest.approx(float(_unit(base[0]) @ _unit(queries[0])), abs=1e-5)
+
+
+def test_compressed_codes_use_less_memory(vectors):
+    base, _ = vectors
+
+    int8 = QuantizedIndex(base, quantization="int8")
+    pq = QuantizedIndex(base, quantization="pq", pq_segments=48)
+
+    assert int8.memory_bytes() < base.nbytes / 3.9
+    assert pq.codes.nbytes == len(base) * 48
+
+
+def test_saved_index_memory_maps_float_vectors(vectors, tmp_path):
+    base, queries = vectors
+    QuantizedIndex(base, quantization="int8").save(tmp_path)
+
+    index = QuantizedIndex.load(tmp_path)
+
+    assert isinstance(index.float_vectors, np.memmap)
+    assert index.search(queries[3], 1)[0][0] == 3
+
+
+def test_unknown_quantization_is_rejected(vectors):
+    with pytest.raises(ValueError):
+        QuantizedIndex(vectors[0], quantization="binary")
@@ -0,0 +1,114 @@
+import sys
+import json
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.query_log import QueryLogWriter, build_query_record, dropped_records
+from app.schemas import PolicyResponse, Citation
+from benchmarks.replay_queries import load_log, replay
+from api.main import app
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_are_written_in_batches(tmp_path):
+    """
+    Records are buffered and written together once the batch fills up.
+    """
+    path = tmp_path / "query_log.jsonl"
+    writer = QueryLogWriter(path, batch_size=3, flush_interval_s=60)
+
+    for i in range(3):
+        writer.log({"query": f"q{i}"})
+    time.sleep(0.2)
+
+    assert [r["query"] for r in _read(path)] == ["q0", "q1", "q2"]
+    writer.close()
+
+
+def test_partial_batch_flushes_on_interval_and_close(tmp_path):
+    path = tmp_path / "query_log.jsonl"
+    writer = QueryLogWriter(path, batch_size=100, flush_interval_s=0.1)
+
+    writer.log({"query": "early"})
+    time.sleep(0.3)
+    assert len(_read(path)) == 1
+
+    writer.log({"query": "late"})
+    writer.close()
+    assert [r["query"] for r in _read(path)] == ["early", "late"]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    """
+    Logging never blocks the request path; overflow is counted and dropped.
+    """
+    writer = QueryLogWriter(tmp_path / "query_log.jsonl", max_queue=1, flush_interval_s=60)
+    writer._queue.put({"query": "occupying the only slot"})
+    before = dropped_records.value()
+
+    start = time.monotonic()
+    writer.log({"query": "overflow"})
+
+    assert time.monotonic() - start < 0.05
+    assert dropped_records.value() == before + 1
+
+
+def test_record_captures_filters_timings_and_citations():
+    response = PolicyResponse(
+        answer="Restricted. [SOURCE:abc]",
+        refused=False,
+        citations=[Citation(chunk_id="abc", policy_path="p", doc_id="d", doc_url="u")],
+        latency_ms=1200.0,
+        finish_reason="stop",
+        stage_timings_ms={"retrieval": 80.0, "generation": 1100.0}
+    )
+
+    record = build_query_record("Can I advertise alcohol?", 5, "uk", None, None, "batch", 200, response)
+
+    assert record["region"] == "uk"
+    assert record["priority"] == "batch"
+    assert record["stage_timings_ms"]["retrieval"] == 80.0
+    assert record["cited_chunk_ids"] == ["abc"]
+
+
+def test_api_logs_each_query(mocker, tmp_path):
+    writer = mocker.MagicMock()
+    mocker.patch("api.main.get_query_logger", return_value=writer)
+    mocker.patch(
+        "api.main.coalesced_policy_response",
+        return_value=PolicyResponse(answer="", refused=True, refusal_reason="No relevant policies found for this query.")
+    )
+
+    TestClient(app).post("/query", json={"query": "What is the weather today?"})
+
+    record = writer.log.call_args.args[0]
+    assert record["status_code"] == 200
+    assert record["refused"] is True
+    assert record["refusal_reason"].startswith("No relevant")
+
+
+def test_replay_is_open_loop(tmp_path):
+    """
+    Arrivals keep coming at the target rate even when responses are slow, and
+    latency includes time queued behind slow requests.
+    """
+    path = tmp_path / "query_log.jsonl"
+    path.write_text(json.dumps({"query": "Can I advertise alcohol?", "limit": 5, "status_code": 200}) + "\n")
+
+    def _slow(payload):
+        time.sleep(0.2)
+        return 200, False
+
+    report = replay(load_log(path), _slow, qps=50, duration_s=0.5, max_inflight=4)
+
+    assert report["sent"] > 10
+    assert report["error_rate"] == 0
+    assert report["p99_ms"] > 200
@@ -6,6 +6,7 @@ from sqlalchemy import func
 from db.session import SessionLocal
 from db.models import PolicyChunk
 from sentence_transformers import SentenceTransformer
+from db.index_versions import current_class_name
 
 def test_rebuildability():
     """
@@ -21,8 +22,10 @@ def test_rebuildability():
         
         print(f"PostgreSQL chunks before deletion: {pg_count_before}")
         
+        class_before = current_class_name()
+        
         try:
-            client.schema.delete_class("PolicyChunk")
+            client.schema.delete_class(class_before)
             print("Weaviate schema deleted")
         except Exception as e:
             print(f"Schema deletion (expected if already deleted): {e}")
@@ -37,8 +40,12 @@ def test_rebuildability():
         assert result.returncode == 0, f"embed.py failed: {result.stderr}"
         print("Embedding pipeline re-run complete")
         
-        result = client.query.aggregate("PolicyChunk").with_meta_count().do()
-        wv_count_after = result['data']['Aggregate']['PolicyChunk'][0]['meta']['count']
+        # The rebuild lands in a new index version, promoted only once complete
+        class_after = current_class_name()
+        assert class_after != class_before, f"Rebuild did not promote a new index (still {class_after})"
+        
+        result = client.query.aggregate(class_after).with_meta_count().do()
+        wv_count_after = result['data']['Aggregate'][class_after][0]['meta']['count']
         
         pg_count_after = db.query(func.count(PolicyChunk.chunk_id)).scalar()
         
@@ -66,12 +73,14 @@ def test_retrieval_after_rebuild():
     query = "Can I advertise alcohol?"
     query_vector = model.encode(query).tolist()
     
+    class_name = current_class_name()
+    
     result = client.query.get(
-        "PolicyChunk",
+        class_name,
         ["chunk_id", "policy_section", "policy_path"]
     ).with_near_vector({"vector": query_vector}).with_limit(1).do()
     
-    chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+    chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
     
     assert len(chunks) > 0, "Semantic search returned no results after rebuild"
     
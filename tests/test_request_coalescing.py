@@ -0,0 +1,133 @@
+import sys
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app.coalescing import SingleFlight, normalize_query_key, coalesced_requests
+from app.generation import coalesced_policy_response, GenerationResult
+
+CHUNK_ID = "0f8a6c1e-2b3d-4e5f-8a9b-0c1d2e3f4a5b"
+
+MOCK_CHUNKS = [{
+    "chunk_id": CHUNK_ID,
+    "chunk_text": "Alcohol advertising is restricted.",
+    "score": 0.8,
+    "policy_path": "Restricted content > Alcohol",
+    "doc_id": "doc-1",
+    "doc_url": "https://example.com"
+}]
+
+
+@pytest.fixture
+def slow_ollama(mocker):
+    """Count Ollama generations; each one takes long enough for requests to pile up."""
+    calls = {"count": 0}
+    lock = threading.Lock()
+
+    def _generate(*args, **kwargs):
+        with lock:
+            calls["count"] += 1
+        time.sleep(0.3)
+        return GenerationResult(
+            text=f"Alcohol ads are restricted. [SOURCE:{CHUNK_ID}]",
+            finish_reason="stop",
+            num_tokens=6
+        )
+
+    mocker.patch("app.generation.retrieve_policy_chunks", return_value=MOCK_CHUNKS)
+    mocker.patch("app.generation.stream_generate", side_effect=_generate)
+    return calls
+
+
+def test_concurrent_identical_queries_call_ollama_once(slow_ollama):
+    """
+    Load test: 20 concurrent reviewers asking the same question (with case and
+    whitespace differences) trigger a single Ollama generation.
+    """
+    before = coalesced_requests.value()
+    queries = ["Can I advertise alcohol?", "can i  advertise ALCOHOL?"] * 10
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        responses = list(pool.map(lambda q: coalesced_policy_response(q, limit=5), queries))
+
+    assert slow_ollama["count"] == 1
+    assert coalesced_requests.value() - before == 19
+    assert all(not r.refused for r in responses)
+    assert all(r.citations[0].chunk_id == CHUNK_ID for r in responses)
+
+
+def test_different_filters_are_not_coalesced(slow_ollama):
+    """
+    Queries with different filters are independent computations.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(
+            lambda region: coalesced_policy_response("Can I advertise alcohol?", region=region),
+            ["us", "eu"]
+        ))
+
+    assert slow_ollama["count"] == 2
+
+
+def test_sequential_queries_are_not_cached(slow_ollama):
+    """
+    Single-flight only dedups in-flight work; it is not a response cache.
+    """
+    coalesced_policy_response("Can I advertise alcohol?")
+    coalesced_policy_response("Can I advertise alcohol?")
+
+    assert slow_ollama["count"] == 2
+
+
+def test_waiters_receive_leader_exception():
+    """
+    If the shared computation fails, every coalesced caller sees the error.
+    """
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def _fail():
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError("ollama down")
+
+    def _call():
+        try:
+            flight.do("key", _fail)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        first = pool.submit(_call)
+        started.wait()
+        rest = [pool.submit(_call) for _ in range(2)]
+        errors = [first.result()] + [f.result() for f in rest]
+
+    assert errors == ["ollama down"] * 3
+
+
+def test_normalize_query_key():
+    """
+    Normalization ignores case and whitespace in the query and filters.
+    """
+    assert normalize_query_key("Can I  advertise alcohol?", 5, region=" US ") == \
+        normalize_query_key("can i advertise alcohol?", 5, region="us")
+    assert normalize_query_key("alcohol", 5) != normalize_query_key("alcohol", 3)
+
+
+def test_priorities_are_not_coalesced(slow_ollama):
+    """
+    An interactive request never joins an in-flight batch request, whose
+    admission ticket is in the batch lane.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(
+            lambda priority: coalesced_policy_response("Can I advertise alcohol?", priority=priority),
+            ["batch", "interactive"]
+        ))
+
+    assert slow_ollama["count"] == 2
@@ -0,0 +1,113 @@
+import importlib
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from app import diversity
+from app.diversity import cap_per_section, mmr_order
+
+
+def test_mmr_demotes_near_duplicates():
+    """
+    A slightly less relevant but different candidate is picked before a
+    near-duplicate of the top hit.
+    """
+    vectors = np.array([[1.0, 0.0], [0.99, 0.14], [0.0, 1.0]])
+
+    order = mmr_order(np.array([0.9, 0.88, 0.8]), vectors, lambda_=0.7, duplicate_similarity=1.01)
+
+    assert order == [0, 2, 1]
+
+
+def test_mmr_drops_duplicates_and_keeps_score_order_at_lambda_one():
+    """
+    Candidates above the duplicate threshold are dropped; with lambda=1 the
+    rest stay in relevance order.
+    """
+    vectors = np.array([[1.0, 0.0], [1.0, 0.01], [0.6, 0.8], [0.0, 0.0]])
+
+    order = mmr_order(np.array([0.9, 0.85, 0.7, 0.6]), vectors, lambda_=1.0, duplicate_similarity=0.95)
+
+    assert order == [0, 2, 3]
+
+
+def test_cap_per_section_keeps_best_of_each_section():
+    """
+    Only the first max_per_section chunks of a policy_path are kept; chunks
+    without a path are never grouped.
+    """
+    sections = ["A > x", "A > x", "B", "A > x", "", ""]
+
+    assert cap_per_section(sections, max_per_section=2) == [0, 1, 2, 4, 5]
+    assert cap_per_section(sections, max_per_section=0) == list(range(6))
+
+
+def test_retrieve_diversifies_before_hydrating_top_k(make_retriever, mocker):
+    """
+    With diversity on, Weaviate also returns paths but no vectors; only the
+    top-k vectors are loaded, and a near-duplicate in the top-k gives way to
+    the next candidate before hydration.
+    """
+    retriever = make_retriever(diversity="mmr")
+    vectors = {"a1": [1.0, 0.0], "a2": [0.98, 0.2], "a3": [0.97, 0.25], "g1": [0.0, 1.0]}
+
+    def _candidate(chunk_id, distance, path):
+        return {
+            "chunk_id": chunk_id,
+            "policy_section_level": "H3",
+            "policy_path": path,
+            "_additional": {"distance": distance},
+        }
+
+    search = mocker.patch.object(retriever, "vector_search", return_value=[
+        _candidate("a1", 0.10, "Alcohol"),
+        _candidate("a2", 0.11, "Alcohol"),
+        _candidate("a3", 0.12, "Alcohol"),
+        _candidate("g1", 0.30, "Gambling"),
+    ])
+    top_k = mocker.patch.object(
+        retriever, "top_k_vectors",
+        side_effect=lambda ids, catalog: {i: np.array(vectors[i], dtype=np.float32) for i in ids}
+    )
+    hydrate = mocker.patch.object(retriever, "hydrate", side_effect=lambda ids: {i: {"chunk_text": i} for i in ids})
+
+    results = retriever.retrieve("alcohol", limit=2)
+
+    fields = search.call_args.kwargs["fields"]
+    assert "policy_path" in fields
+    assert "_additional { distance }" in fields
+    top_k.assert_called_once_with(["a1", "a2"], None)
+    assert [r.chunk_id for r in results] == ["a1", "g1"]
+    hydrate.assert_called_once_with(["a1", "g1"])
+
+
+def test_top_k_vectors_are_one_query_by_id(make_retriever, mocker):
+    """
+    Without a snapshot, the top-k vectors come from one Weaviate query
+    filtered to those ids.
+    """
+    retriever = make_retriever(diversity="mmr")
+    mocker.patch.object(retriever, "index_class", return_value="PolicyChunk_v2")
+    get = retriever.weaviate_client.query.get
+    query = get.return_value.with_additional.return_value.with_where.return_value.with_limit.return_value
+    query.do.return_value = {"data": {"Get": {"PolicyChunk_v2": [
+        {"chunk_id": "a1", "_additional": {"vector": [1.0, 0.0]}},
+    ]}}}
+
+    vectors = retriever.top_k_vectors(["a1", "g1"], None)
+
+    get.assert_called_once_with("PolicyChunk_v2", ["chunk_id"])
+    where = get.return_value.with_additional.return_value.with_where.call_args.args[0]
+    assert where["operator"] == "ContainsAny" and where["valueTextArray"] == ["a1", "g1"]
+    assert list(vectors) == ["a1"]
+
+
+def test_diversity_is_opt_in(monkeypatch):
+    """
+    Unless RETRIEVAL_DIVERSITY=mmr is set, results keep descending score order.
+    """
+    monkeypatch.delenv("RETRIEVAL_DIVERSITY", raising=False)
+
+    assert importlib.reload(diversity).RETRIEVAL_DIVERSITY == "none"
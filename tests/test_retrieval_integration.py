@@ -13,6 +13,7 @@ from app.retrieval import retrieve_policy_chunks
 from db.session import SessionLocal
 from db.models import PolicyChunk
 import weaviate
+from db.index_versions import current_class_name
 
 
 class TestPostgresWeaviateAlignment:
@@ -42,13 +43,14 @@ class TestPostgresWeaviateAlignment:
     def test_no_orphan_vectors_in_weaviate(self):
         # Get all Weaviate chunk_ids
         client = weaviate.Client(url="http://localhost:8080")
+        class_name = current_class_name()
         
         result = client.query.get(
-            "PolicyChunk",
+            class_name,
             ["chunk_id"]
         ).with_limit(100).do()
         
-        weaviate_chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+        weaviate_chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
         weaviate_chunk_ids = {chunk["chunk_id"] for chunk in weaviate_chunks}
         
         # Get all PostgreSQL chunk_ids
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, Query
+from sqlalchemy.schema import CreateIndex
+
+from db.models import PolicyChunk
+from app.retrieval import HybridRetriever
+
+
+def _compiled_sql_filter(mocker, chunk_ids, **filters):
+    captured = []
+    mocker.patch.object(Query, "all", autospec=True, side_effect=lambda query: captured.append(query) or [])
+    retriever = object.__new__(HybridRetriever)
+
+    retriever.sql_filter(Session(), chunk_ids, **filters)
+
+    mocker.stopall()
+    return captured[0].statement.compile(dialect=postgresql.psycopg2.dialect())
+
+
+def test_sql_filter_binds_ids_as_one_array(mocker):
+    """
+    Candidate ids are one UUID[] parameter, so 3 or 60 ids give the same SQL
+    text, and only chunk_id is selected.
+    """
+    few = [str(uuid4()) for _ in range(3)]
+    many = [str(uuid4()) for _ in range(60)]
+
+    compiled_few = _compiled_sql_filter(mocker, few, region="uk")
+    compiled_many = _compiled_sql_filter(mocker, many, region="uk")
+
+    sql = str(compiled_many)
+    assert "= ANY (%(chunk_ids)s::UUID[])" in sql
+    assert " IN " not in sql
+    assert sql.split("FROM")[0].strip() == "SELECT policy_chunks.chunk_id"
+    assert str(compiled_few) == sql
+    assert compiled_many.params["chunk_ids"] == many
+
+
+def test_filter_index_covers_the_candidate_query():
+    """
+    The candidate filter can run as an index-only scan.
+    """
+    ddl = {
+        index.name: str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+        for index in PolicyChunk.__table__.indexes
+    }
+
+    assert "(chunk_id) INCLUDE (region, content_type, policy_source)" in ddl["ix_chunk_id_filters"]
+    assert "ix_filters_chunk_id" not in ddl
+    assert "ix_policy_chunks_region" not in ddl
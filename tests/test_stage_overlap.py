@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app import generation
+from app.llm_pool import OllamaBackendPool
+from app.generation import warm_prompt_prefix, PROMPT_PREFIX, OLLAMA_KEEP_ALIVE
+
+
+def _vector_hit(chunk_id, distance=0.2, level="H3"):
+    return {
+        "chunk_id": chunk_id,
+        "chunk_text": f"text {chunk_id}",
+        "policy_section": "Alcohol",
+        "policy_path": "Restricted content > Alcohol",
+        "policy_section_level": level,
+        "doc_id": "doc-1",
+        "doc_url": "https://example.com",
+        "policy_source": "google",
+        "region": "global",
+        "content_type": "general",
+        "_additional": {"distance": distance},
+    }
+
+
+@pytest.fixture
+def retriever(make_retriever):
+    """HybridRetriever without loading the embedding model or connecting to Weaviate."""
+    return make_retriever(two_phase=False)
+
+
+def test_filtered_sql_checks_only_the_candidates(retriever, mocker):
+    """
+    With filters, Postgres is asked about the vector candidates only, not for
+    every chunk matching the filters.
+    """
+    mocker.patch.object(retriever, "vector_search", return_value=[_vector_hit("a"), _vector_hit("b"), _vector_hit("c")])
+    candidates = mocker.patch.object(retriever, "_filter_candidates", return_value={"a", "c"})
+
+    results = retriever.retrieve("alcohol", limit=5, region="global")
+
+    assert [r.chunk_id for r in results] == ["a", "c"]
+    candidates.assert_called_once_with(["a", "b", "c"], "global", None, None)
+
+
+def test_unfiltered_retrieval_checks_candidates_after_search(retriever, mocker):
+    """
+    Without filters, Postgres only confirms the vector candidates exist.
+    """
+    mocker.patch.object(retriever, "vector_search", return_value=[_vector_hit("a"), _vector_hit("b")])
+    candidates = mocker.patch.object(retriever, "_filter_candidates", return_value={"b"})
+
+    results = retriever.retrieve("alcohol", limit=5)
+
+    assert [r.chunk_id for r in results] == ["b"]
+    candidates.assert_called_once_with(["a", "b"], None, None, None)
+
+
+def test_warmup_targets_idle_backends_once_per_interval(mocker):
+    """
+    The static prompt prefix is prefilled only on idle backends, and not again
+    within the warmup interval.
+    """
+    executor = mocker.patch("app.generation._warmup_executor")
+    mocker.patch.dict(generation._last_warmup, clear=True)
+    pool = OllamaBackendPool(["http://idle:11434", "http://busy:11434"])
+    pool.backends[1].outstanding = 1
+
+    assert warm_prompt_prefix(pool) == 1
+    assert warm_prompt_prefix(pool) == 0
+
+    executor.submit.assert_called_once_with(generation._warm_backend, "http://idle:11434")
+
+
+def test_warmup_request_uses_static_prefix_and_keep_alive(mocker):
+    """
+    Warmup sends only the request-independent prefix and keeps the model loaded.
+    """
+    post = mocker.patch("app.generation.requests.post")
+
+    generation._warm_backend("http://ollama:11434")
+
+    payload = post.call_args.kwargs["json"]
+    assert payload["prompt"] == PROMPT_PREFIX
+    assert "{question}" not in payload["prompt"]
+    assert payload["keep_alive"] == OLLAMA_KEEP_ALIVE
@@ -0,0 +1,138 @@
+import sys
+import time
+import uuid
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+
+from db.models import PolicyChunk, PolicySource, Region, ContentType
+from ingestion.embed import embed_and_upload, iter_chunk_batches
+
+
+class FakeBatch:
+    """Stands in for weaviate.Client.batch; records uploads and their timing."""
+
+    def __init__(self, delay_s=0.0, fail_after=None):
+        self.delay_s = delay_s
+        self.fail_after = fail_after
+        self.batch_size = None
+        self.objects = []
+        self.upload_intervals = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_data_object(self, data_object, class_name, uuid, vector):
+        if self.fail_after is not None and len(self.objects) >= self.fail_after:
+            raise ConnectionError("weaviate unavailable")
+        start = time.monotonic()
+        time.sleep(self.delay_s)
+        self.objects.append((uuid, vector))
+        self.upload_intervals.append((start, time.monotonic()))
+
+
+class FakeClient:
+    def __init__(self, batch):
+        self.batch = batch
+
+
+def _records(n, start=0):
+    return [{"chunk_id": f"chunk-{i}", "chunk_text": f"text {i}"} for i in range(start, start + n)]
+
+
+def _fake_encode(texts):
+    return np.arange(len(texts) * 4, dtype=np.float32).reshape(len(texts), 4)
+
+
+def test_every_chunk_is_uploaded_in_order_with_numpy_vectors():
+    batch = FakeBatch()
+    batches = [_records(3, 0), _records(3, 3), _records(2, 6)]
+
+    total = embed_and_upload(FakeClient(batch), iter(batches), _fake_encode)
+
+    assert total == 8
+    assert [uuid for uuid, _ in batch.objects] == [f"chunk-{i}" for i in range(8)]
+    assert all(isinstance(vector, np.ndarray) for _, vector in batch.objects)
+
+
+def test_encoding_overlaps_upload():
+    """
+    The next batch is encoded while the previous one is still uploading.
+    """
+    batch = FakeBatch(delay_s=0.05)
+    encode_intervals = []
+
+    def _slow_encode(texts):
+        start = time.monotonic()
+        time.sleep(0.1)
+        encode_intervals.append((start, time.monotonic()))
+        return _fake_encode(texts)
+
+    start = time.monotonic()
+    embed_and_upload(FakeClient(batch), iter([_records(2, i * 2) for i in range(4)]), _slow_encode)
+    elapsed = time.monotonic() - start
+
+    # Serial would be 4 * (0.1 + 2 * 0.05) = 0.8s
+    assert elapsed < 0.65
+    second_encode_start = encode_intervals[1][0]
+    first_upload_end = batch.upload_intervals[1][1]
+    assert second_encode_start < first_upload_end
+
+
+def test_upload_failure_stops_encoding_and_is_raised():
+    batch = FakeBatch(fail_after=2)
+    encoded = []
+
+    def _encode(texts):
+        encoded.append(texts)
+        time.sleep(0.02)
+        return _fake_encode(texts)
+
+    with pytest.raises(ConnectionError):
+        embed_and_upload(FakeClient(batch), iter([_records(2, i * 2) for i in range(50)]), _encode, queue_depth=1)
+
+    assert len(encoded) < 50
+    assert not [t for t in threading.enumerate() if t.name == "weaviate-upload"]
+
+
+def _chunk(i):
+    return PolicyChunk(
+        chunk_id=uuid.UUID(int=i),
+        doc_id="doc-1",
+        chunk_index=i,
+        chunk_text=f"text {i}",
+        policy_source=PolicySource.GOOGLE,
+        policy_section="Alcohol",
+        policy_section_level="H3",
+        policy_path="Restricted content > Alcohol",
+        region=Region.GLOBAL,
+        content_type=ContentType.GENERAL,
+        doc_url="https://example.com"
+    )
+
+
+def test_chunks_are_streamed_with_server_side_cursor(mocker):
+    """
+    Chunks are read with yield_per and handed on as property dicts one
+    partition at a time.
+    """
+    db = mocker.Mock()
+    db.execute.return_value.scalars.return_value.partitions.return_value = iter([
+        [_chunk(0), _chunk(1)],
+        [_chunk(2)],
+    ])
+
+    batches = list(iter_chunk_batches(db, batch_size=2))
+
+    stmt = db.execute.call_args.args[0]
+    assert stmt.get_execution_options()["yield_per"] == 2
+    assert [[r["chunk_text"] for r in b] for b in batches] == [["text 0", "text 1"], ["text 2"]]
+    assert batches[0][0]["chunk_id"] == str(uuid.UUID(int=0))
+    assert batches[0][0]["region"] == "global"
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from app.retrieval import CANDIDATE_FIELDS
+
+
+def _candidate(chunk_id, distance, level="H3"):
+    return {"chunk_id": chunk_id, "policy_section_level": level, "_additional": {"distance": distance}}
+
+
+def _row(chunk_id, level="H3"):
+    return {
+        "chunk_text": f"text {chunk_id}",
+        "policy_section": "Alcohol",
+        "policy_path": "Restricted content > Alcohol",
+        "policy_section_level": level,
+        "doc_id": "doc-1",
+        "doc_url": "https://example.com",
+        "policy_source": "google",
+        "region": "global",
+        "content_type": "general",
+    }
+
+
+@pytest.fixture
+def retriever(make_retriever):
+    """Two-phase HybridRetriever without the embedding model, Weaviate or Postgres."""
+    return make_retriever()
+
+
+def test_only_final_top_k_is_hydrated(retriever, mocker):
+    """
+    Weaviate is asked for ids, levels and distances only; text and metadata
+    are loaded in one lookup for the reranked top-k.
+    """
+    search = mocker.patch.object(retriever, "vector_search", return_value=[
+        _candidate("a", 0.10, level="H2"),
+        _candidate("b", 0.20),
+        _candidate("c", 0.30),
+        _candidate("d", 0.40),
+    ])
+    hydrate = mocker.patch.object(retriever, "hydrate", side_effect=lambda ids: {i: _row(i) for i in ids})
+    candidates = mocker.patch.object(retriever, "_filter_candidates")
+
+    results = retriever.retrieve("alcohol", limit=2)
+
+    assert search.call_args.kwargs["fields"] == CANDIDATE_FIELDS
+    # H2 "a" drops below the H3 hits after reranking, so it is never hydrated
+    assert [r.chunk_id for r in results] == ["b", "c"]
+    hydrate.assert_called_once_with(["b", "c"])
+    assert results[0].chunk_text == "text b"
+    assert results[0].score == pytest.approx(1 / 1.2 + 0.1)
+    candidates.assert_not_called()
+
+
+def test_missing_rows_are_backfilled_from_next_candidates(retriever, mocker):
+    """
+    A candidate Postgres no longer has is replaced by the next ranked one.
+    """
+    mocker.patch.object(retriever, "vector_search", return_value=[
+        _candidate("a", 0.1), _candidate("gone", 0.2), _candidate("c", 0.3), _candidate("d", 0.4)
+    ])
+    hydrate = mocker.patch.object(
+        retriever, "hydrate", side_effect=lambda ids: {i: _row(i) for i in ids if i != "gone"}
+    )
+
+    results = retriever.retrieve("alcohol", limit=3)
+
+    assert [r.chunk_id for r in results] == ["a", "c", "d"]
+    assert [call.args[0] for call in hydrate.call_args_list] == [["a", "gone", "c"], ["d"]]
+
+
+def test_filters_apply_before_hydration(retriever, mocker):
+    """
+    Filtered-out candidates are dropped before the hydration lookup.
+    """
+    mocker.patch.object(retriever, "vector_search", return_value=[
+        _candidate("a", 0.1), _candidate("b", 0.2), _candidate("c", 0.3)
+    ])
+    mocker.patch.object(retriever, "_filter_candidates", return_value={"b", "c"})
+    hydrate = mocker.patch.object(retriever, "hydrate", side_effect=lambda ids: {i: _row(i) for i in ids})
+
+    results = retriever.retrieve("alcohol", limit=5, region="global")
+
+    assert [r.chunk_id for r in results] == ["b", "c"]
+    hydrate.assert_called_once_with(["b", "c"])
@@ -2,12 +2,15 @@ import pytest
 import weaviate
 from db.session import SessionLocal
 from db.models import PolicyChunk
+from db.index_versions import current_class_name
 
 def test_vector_id_alignment():
     """
     Test that Weaviate object IDs match PostgreSQL chunk_ids.
     This ensures both systems can be joined on chunk_id.
     """
+    class_name = current_class_name()
+    
     db = SessionLocal()
     client = weaviate.Client("http://localhost:8080")
     
@@ -16,11 +19,11 @@ def test_vector_id_alignment():
             str(chunk_id) for (chunk_id,) in db.query(PolicyChunk.chunk_id).all()
         )
         
-        result = client.query.aggregate("PolicyChunk").with_meta_count().do()
-        wv_count = result['data']['Aggregate']['PolicyChunk'][0]['meta']['count']
+        result = client.query.aggregate(class_name).with_meta_count().do()
+        wv_count = result['data']['Aggregate'][class_name][0]['meta']['count']
         
-        result = client.query.get("PolicyChunk", ["chunk_id"]).with_limit(wv_count).do()
-        wv_chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+        result = client.query.get(class_name, ["chunk_id"]).with_limit(wv_count).do()
+        wv_chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
         wv_chunk_ids = set(chunk["chunk_id"] for chunk in wv_chunks)
         
         missing_in_weaviate = pg_chunk_ids - wv_chunk_ids
@@ -46,6 +49,8 @@ def test_no_regenerated_ids():
     Test that chunk_ids are preserved during embedding ingestion.
     Re-running embed.py should not generate new UUIDs.
     """
+    class_name = current_class_name()
+    
     db = SessionLocal()
     client = weaviate.Client("http://localhost:8080")
     
@@ -54,7 +59,7 @@ def test_no_regenerated_ids():
         
         for pg_chunk_id, pg_text in pg_chunks:
             result = client.query.get(
-                "PolicyChunk",
+                class_name,
                 ["chunk_id", "chunk_text"]
             ).with_where({
                 "path": ["chunk_id"],
@@ -62,7 +67,7 @@ def test_no_regenerated_ids():
                 "valueText": str(pg_chunk_id)
             }).do()
             
-            wv_chunks = result.get("data", {}).get("Get", {}).get("PolicyChunk", [])
+            wv_chunks = result.get("data", {}).get("Get", {}).get(class_name, [])
             
             assert len(wv_chunks) == 1, (
                 f"Expected 1 Weaviate object for chunk_id {pg_chunk_id}, found {len(wv_chunks)}"